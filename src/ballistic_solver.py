@@ -0,0 +1,375 @@
+"""
+ballistic_solver.py
+---
+This file contains the BallisticSolver and BallisticTable classes, which find the launch pitch needed to hit a target height at a distance with gravity and air drag acting on the lacrosse ball, instead of aiming in a straight line
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# Physical constants (in ft., lb., and s.)
+GRAVITY = 32.174
+AIR_DENSITY = 0.0765
+# A lacrosse ball weighs 5 oz. and is 2.5 inches across
+BALL_MASS = 0.3125
+BALL_DIAMETER = 2.5/12
+# Drag coefficient of a smooth sphere at the speeds Ball-E shoots at
+DRAG_COEFFICIENT = 0.5
+
+
+class BallisticSolver:
+    """This class models the flight of the ball with gravity and quadratic air drag:
+
+        dv/dt = -g*y_hat - k*|v|*v, where k = 0.5*air density*drag coefficient*cross-sectional area/mass
+
+    The equations are integrated with fixed-step RK4 using the horizontal distance as the independent variable, so every
+    flight ends exactly at the goal. The launch pitch is found with the secant method, warm-started from the drag-free
+    solution (or from the last solve at the same height), which usually converges in three or four iterations.
+    Everything is vectorized, so a whole grid of shots can be solved at once.
+
+    NOTE: Heights are measured from the launcher, and pitches are the launch angle of the ball from level (in degrees)
+    """
+
+    def __init__(self, muzzle_speed=70, drag_coefficient=DRAG_COEFFICIENT, ball_mass=BALL_MASS, ball_diameter=BALL_DIAMETER,
+                 air_density=AIR_DENSITY, num_steps=40, tolerance=1e-6, max_iterations=20, resolution=0.01, cache_size=4096):
+        """Initializer for the ballistic solver
+
+        Args:
+            muzzle_speed (float, optional): Speed of the ball as it leaves Ball-E (in ft./s). Defaults to 70.
+            drag_coefficient (float, optional): Drag coefficient of the ball. Defaults to DRAG_COEFFICIENT.
+            ball_mass (float, optional): Mass of the ball (in lb.). Defaults to BALL_MASS.
+            ball_diameter (float, optional): Diameter of the ball (in ft.). Defaults to BALL_DIAMETER.
+            air_density (float, optional): Density of the air (in lb./ft.^3). Defaults to AIR_DENSITY.
+            num_steps (int, optional): RK4 steps per flight. Defaults to 40.
+            tolerance (float, optional): Largest allowed miss in height (in ft.). Defaults to 1e-6.
+            max_iterations (int, optional): Most secant iterations. Defaults to 20.
+            resolution (float, optional): Distances and heights are rounded to this (in ft.) before pitch() caches them. Defaults to 0.01.
+            cache_size (int, optional): Most pitches that pitch() remembers. Defaults to 4096.
+        """
+
+        self.muzzle_speed = muzzle_speed
+        self.drag_constant = 0.5*air_density*drag_coefficient * \
+            math.pi*(ball_diameter/2)**2/ball_mass
+        self.num_steps = num_steps
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.resolution = resolution
+
+        # Last pitch (in radians) solved at each height, along with its distance, to warm-start the next solve
+        self._last_solution = {}
+        self._cached_pitch = lru_cache(maxsize=cache_size)(self._solve_pitch)
+
+    def height_at(self, distances, angles):
+        """Height of the ball when it reaches a distance
+
+        Args:
+            distances (array_like): Horizontal distances (in ft.)
+            angles (array_like): Launch angles (in radians)
+
+        Returns:
+            numpy.ndarray: Heights (in ft.) in the broadcast shape of distances and angles
+        """
+
+        distances, angles = np.broadcast_arrays(np.asarray(distances, dtype=float),
+                                                np.asarray(angles, dtype=float))
+        step = distances/self.num_steps
+        k = self.drag_constant
+
+        def derivatives(vx, vy):
+            # d/dx of (y, vx, vy): the time derivatives divided by dx/dt = vx
+            speed = np.sqrt(vx*vx + vy*vy)
+            return vy/vx, -k*speed, (-GRAVITY - k*speed*vy)/vx
+
+        y = np.zeros_like(distances)
+        vx = self.muzzle_speed*np.cos(angles)
+        vy = self.muzzle_speed*np.sin(angles)
+        for _ in range(self.num_steps):
+            dy1, dvx1, dvy1 = derivatives(vx, vy)
+            dy2, dvx2, dvy2 = derivatives(
+                vx + 0.5*step*dvx1, vy + 0.5*step*dvy1)
+            dy3, dvx3, dvy3 = derivatives(
+                vx + 0.5*step*dvx2, vy + 0.5*step*dvy2)
+            dy4, dvx4, dvy4 = derivatives(vx + step*dvx3, vy + step*dvy3)
+            y = y + step*(dy1 + 2*dy2 + 2*dy3 + dy4)/6
+            vx = vx + step*(dvx1 + 2*dvx2 + 2*dvx3 + dvx4)/6
+            vy = vy + step*(dvy1 + 2*dvy2 + 2*dvy3 + dvy4)/6
+
+        return y
+
+    def vacuum_pitch(self, distances, heights):
+        """Low launch angle that hits the target without any drag
+
+        Args:
+            distances (array_like): Horizontal distances (in ft.)
+            heights (array_like): Target heights (in ft.)
+
+        Returns:
+            numpy.ndarray: Launch angles (in radians), or 45 degrees where the target is out of reach
+        """
+
+        distances, heights = np.broadcast_arrays(np.asarray(distances, dtype=float),
+                                                 np.asarray(heights, dtype=float))
+        speed_squared = self.muzzle_speed**2
+        discriminant = speed_squared**2 - GRAVITY * \
+            (GRAVITY*distances**2 + 2*heights*speed_squared)
+
+        with np.errstate(invalid="ignore"):
+            angles = np.arctan((speed_squared - np.sqrt(discriminant)) /
+                               (GRAVITY*distances))
+
+        return np.where(discriminant >= 0, angles, math.pi/4)
+
+    def solve(self, distances, heights, initial_angles=None):
+        """Finds the launch angles that hit the targets
+
+        Args:
+            distances (array_like): Horizontal distances to the goal (in ft.)
+            heights (array_like): Target heights (in ft.)
+            initial_angles (array_like, optional): Starting guesses (in radians). Defaults to the drag-free solution.
+
+        Returns:
+            numpy.ndarray: Launch angles (in radians) in the broadcast shape of distances and heights, which are NaN where the target is out of reach
+        """
+
+        distances, heights = np.broadcast_arrays(np.asarray(distances, dtype=float),
+                                                 np.asarray(heights, dtype=float))
+        if initial_angles is None:
+            initial_angles = self.vacuum_pitch(distances, heights)
+
+        previous = np.broadcast_to(np.asarray(
+            initial_angles, dtype=float), distances.shape).copy()
+        previous_miss = self.height_at(distances, previous) - heights
+        # Second starting point, a little higher (a steeper shot lands higher for low angles)
+        current = previous + 0.01
+        current_miss = self.height_at(distances, current) - heights
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for _ in range(self.max_iterations):
+                if np.all(np.abs(current_miss) <= self.tolerance):
+                    break
+
+                slope = (current_miss - previous_miss)/(current - previous)
+                step = np.where(np.abs(current_miss) <= self.tolerance,
+                                0.0, current_miss/slope)
+                # Keep the steps small enough that the secant does not jump to the high (lob) solution
+                step = np.clip(step, -0.2, 0.2)
+
+                previous, previous_miss = current, current_miss
+                current = current - step
+                current_miss = np.where(step == 0, previous_miss,
+                                        self.height_at(distances, current) - heights)
+
+        solved = (np.abs(current_miss) <= self.tolerance) & (
+            current > -math.pi/2) & (current < math.pi/2)
+
+        return np.where(solved, current, np.nan)
+
+    def _solve_pitch(self, distance, height):
+        """Solves one pitch (in degrees), warm-started from the last solve at the same height"""
+
+        initial_angle = None
+        last_solution = self._last_solution.get(height)
+        if last_solution is not None and abs(last_solution[0] - distance) < 2:
+            initial_angle = last_solution[1]
+
+        angle = float(self.solve(distance, height, initial_angle))
+        if math.isnan(angle):
+            raise ValueError("A target {} ft. high at {} ft. is out of reach at {} ft./s".format(
+                height, distance, self.muzzle_speed))
+
+        self._last_solution[height] = (distance, angle)
+
+        return math.degrees(angle)
+
+    def pitch(self, distance, height):
+        """Launch pitch for one shot. Results are remembered, so repeated shots only cost a dictionary lookup.
+
+        Args:
+            distance (float): Horizontal distance to the goal (in ft.)
+            height (float): Target height (in ft.)
+
+        Raises:
+            ValueError: If the target is out of reach
+
+        Returns:
+            float: The launch pitch (in degrees)
+        """
+
+        return self._cached_pitch(round(distance/self.resolution)*self.resolution,
+                                  round(height/self.resolution)*self.resolution)
+
+    def pitch_batch(self, distances, heights):
+        """Launch pitches for many shots at once
+
+        Args:
+            distances (array_like): Horizontal distances to the goal (in ft.)
+            heights (array_like): Target heights (in ft.)
+
+        Raises:
+            ValueError: If any target is out of reach
+
+        Returns:
+            numpy.ndarray: Launch pitches (in degrees) in the broadcast shape of distances and heights
+        """
+
+        angles = self.solve(distances, heights)
+        if np.any(np.isnan(angles)):
+            raise ValueError(
+                "Some targets are out of reach at {} ft./s".format(self.muzzle_speed))
+
+        return np.degrees(angles)
+
+    def cache_info(self):
+        """Hits and misses of the pitch() cache"""
+
+        return self._cached_pitch.cache_info()
+
+
+class BallisticTable:
+    """This class precomputes the launch pitch for a few target heights on a grid of distances, and answers queries in
+    between grid points with linear interpolation, so each shot costs about as much as TrajectoryTable.lookup().
+    Heights that are not in the table (e.g.: the rows of a finer ZoneGrid) are solved with the solver instead.
+    """
+
+    def __init__(self, ballistic_solver, heights, min_distance=3, max_distance=60, distance_step=0.25):
+        """Initializer for the ballistic table. The whole grid is solved in one vectorized pass.
+
+        Args:
+            ballistic_solver (BallisticSolver): Solver to precompute the pitches with
+            heights (list): Target heights (in ft.) that can be looked up
+            min_distance (float, optional): Closest distance (in ft.). Defaults to 3.
+            max_distance (float, optional): Furthest distance (in ft.). Defaults to 60.
+            distance_step (float, optional): Spacing of the distance grid (in ft.). Defaults to 0.25.
+
+        Raises:
+            ValueError: If the distance grid is empty or not positive, or a target is out of reach
+        """
+
+        if min_distance <= 0 or distance_step <= 0 or max_distance <= min_distance:
+            raise ValueError(
+                "The distance grid must be positive and non-empty")
+
+        self.ballistic_solver = ballistic_solver
+        self.heights = [float(height) for height in heights]
+        self.min_distance = min_distance
+        self.distance_step = distance_step
+
+        num_distances = int(
+            math.ceil((max_distance - min_distance)/distance_step)) + 1
+        self.distances = min_distance + distance_step*np.arange(num_distances)
+        self.max_distance = float(self.distances[-1])
+
+        # Table of pitches with shape (distances, heights)
+        self.table = ballistic_solver.pitch_batch(
+            self.distances[:, np.newaxis], np.asarray(self.heights)[np.newaxis])
+        self._table_list = self.table.tolist()
+        self._height_columns = {height: column for column,
+                                height in enumerate(self.heights)}
+
+    def pitch(self, distance, height):
+        """Interpolates the launch pitch for one shot
+
+        Args:
+            distance (float): Horizontal distance to the goal (in ft.)
+            height (float): Target height (in ft.)
+
+        Raises:
+            ValueError: If the distance is outside of the table
+
+        Returns:
+            float: The launch pitch (in degrees)
+        """
+
+        if not self.min_distance <= distance <= self.max_distance:
+            raise ValueError("Distance {} ft. is outside of the table ({} ft. to {} ft.)".format(
+                distance, self.min_distance, self.max_distance))
+
+        column = self._height_columns.get(height)
+        if column is None:
+            return self.ballistic_solver.pitch(distance, height)
+
+        position = (distance - self.min_distance)/self.distance_step
+        index = min(int(position), len(self._table_list) - 2)
+        fraction = position - index
+        lower = self._table_list[index][column]
+        upper = self._table_list[index + 1][column]
+
+        return lower + fraction*(upper - lower)
+
+    def pitch_batch(self, distances, heights):
+        """Interpolates the launch pitches for many shots at once
+
+        Args:
+            distances (array_like): Horizontal distances to the goal (in ft.)
+            heights (array_like): Target heights (in ft.)
+
+        Raises:
+            ValueError: If any distance is outside of the table
+
+        Returns:
+            numpy.ndarray: Launch pitches (in degrees) in the broadcast shape of distances and heights
+        """
+
+        distances, heights = np.broadcast_arrays(np.asarray(distances, dtype=float),
+                                                 np.asarray(heights, dtype=float))
+        shape = distances.shape
+        # Work on 1-d arrays so that scalars can be filled in like any other shot
+        distances = np.array(distances, ndmin=1).ravel()
+        heights = np.array(heights, ndmin=1).ravel()
+        # Written so that NaN distances are rejected too
+        if not np.all((distances >= self.min_distance) & (distances <= self.max_distance)):
+            raise ValueError("Distances must be within {} ft. and {} ft.".format(
+                self.min_distance, self.max_distance))
+
+        # Column of every height, or -1 for heights that are not in the table
+        unique_heights, height_inverse = np.unique(heights, return_inverse=True)
+        columns = np.array([self._height_columns.get(float(height), -1) for height in unique_heights],
+                           dtype=np.intp)[height_inverse.ravel()]
+        in_table = columns >= 0
+
+        positions = (distances - self.min_distance)/self.distance_step
+        indices = np.minimum(positions.astype(np.intp), len(self.table) - 2)
+        fractions = positions - indices
+        lower = self.table[indices, columns]
+        pitches = lower + fractions*(self.table[indices + 1, columns] - lower)
+
+        if not np.all(in_table):
+            pitches[~in_table] = self.ballistic_solver.pitch_batch(
+                distances[~in_table], heights[~in_table])
+
+        return pitches.reshape(shape)
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    ballistic_solver = BallisticSolver(muzzle_speed=70)
+    # Top, center, and bottom of the goal (in ft. from the launcher)
+    ballistic_table = BallisticTable(ballistic_solver, heights=(2, 0, -2))
+
+    for distance in (5, 15, 30, 45):
+        print("{} ft.: straight line {:.3f}, ballistic {:.3f}, table {:.3f} degrees".format(
+            distance, math.degrees(math.atan(2/distance)), ballistic_solver.pitch(distance, 2),
+            ballistic_table.pitch(distance, 2)))
+    print(ballistic_solver.cache_info())
+
+    # A finer grid than 3x3 aims at rows that are not in the table, which are solved instead
+    from trajectory_algorithm import TrajectoryAlgorithm
+    from zone_grid import ZoneGrid
+
+    trajectory_alg = TrajectoryAlgorithm(15, pitch_model=ballistic_table)
+    yaw, pitch = ZoneGrid([(100, 100), (400, 100), (400, 400), (100, 400)], rows=4, cols=5).calc_angles(
+        trajectory_alg, 15)
+    print("4x5 grid pitches at 15 ft.:\n{}".format(np.round(pitch, 3)))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
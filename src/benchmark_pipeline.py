@@ -0,0 +1,250 @@
+"""
+benchmark_pipeline.py
+---
+This file contains the PipelineBenchmark class, which measures the throughput and latency of every stage from a captured frame to the motor angles, and compares the results against a saved baseline to catch slowdowns
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from frame_source import SyntheticGoalFrameSource
+from goal_corner_detector import GoalCornerDetector, draw_goal_overlay
+from goal_distance_calculator import GoalDistanceCalculator
+from trajectory_algorithm import TrajectoryAlgorithm
+
+# Names of the benchmarked stages, in the order that they run
+BENCHMARK_STAGES = ("frame_decode", "corner_finding", "goal_distance",
+                    "trajectory", "overlay_drawing", "end_to_end")
+
+
+class PipelineBenchmark:
+    """This class runs synthetic frames through the whole vision pipeline and records how long each stage takes per frame
+    """
+
+    def __init__(self, num_frames=300, distances=(120, 180, 240, 360), frame_size=(960, 540), target="TL", warmup_frames=10,
+                 pyramid_levels=0):
+        """Initializer for the pipeline benchmark
+
+        Args:
+            num_frames (int, optional): Number of frames to time (spread across the distances). Defaults to 300.
+            distances (tuple, optional): Distances of Ball-E from the Goal to render (in inches). Defaults to (120, 180, 240, 360).
+            frame_size (tuple, optional): Width and height of the frames (in pixels). Defaults to (960, 540).
+            target (string, optional): Section of the goal to calculate the angles for. Defaults to "TL".
+            warmup_frames (int, optional): Number of untimed frames to run first so that caches and allocators are warm. Defaults to 10.
+            pyramid_levels (int, optional): Pyramid levels of the goal corner detector (0 for full resolution detection). Defaults to 0.
+        """
+
+        self.num_frames = num_frames
+        self.distances = distances
+        self.frame_size = frame_size
+        self.target = target
+        self.warmup_frames = warmup_frames
+        self.pyramid_levels = pyramid_levels
+
+        # Time (in seconds) of every frame, per stage
+        self.stage_samples = OrderedDict((stage, [])
+                                         for stage in BENCHMARK_STAGES)
+        self.frames_without_goal = 0
+
+    def encoded_frames(self):
+        """Renders the synthetic frames and encodes them as JPEG, like a camera or video file would provide them
+
+        Returns:
+            list: Tuples of the JPEG bytes and the focal length (in pixels) they were rendered with
+        """
+
+        encoded_frames = []
+        for distance in self.distances:
+            frame_source = SyntheticGoalFrameSource(
+                distance=distance, frame_size=self.frame_size, num_frames=1, noise_sigma=2).open()
+            frame = frame_source.read()[1]
+            encoded_frames.append(
+                (cv2.imencode(".jpg", frame)[1], frame_source.focal_length))
+
+        return encoded_frames
+
+    def run(self):
+        """Runs the benchmark
+
+        Returns:
+            OrderedDict: Results per stage (see summarize())
+        """
+
+        detector = GoalCornerDetector(pyramid_levels=self.pyramid_levels)
+        encoded_frames = self.encoded_frames()
+        perf_counter = time.perf_counter
+
+        for frame_number in range(self.warmup_frames):
+            detector.detect(cv2.imdecode(
+                encoded_frames[frame_number % len(encoded_frames)][0], cv2.IMREAD_COLOR))
+
+        for frame_number in range(self.num_frames):
+            encoded_frame, focal_length = encoded_frames[frame_number % len(
+                encoded_frames)]
+
+            frame_start = perf_counter()
+            frame = cv2.imdecode(encoded_frame, cv2.IMREAD_COLOR)
+            decode_end = perf_counter()
+
+            corners = detector.detect(frame)
+            detect_end = perf_counter()
+
+            if corners is None:
+                self.frames_without_goal += 1
+                continue
+
+            distance_calculator = GoalDistanceCalculator(corners)
+            distance_calculator.focal_length = focal_length
+            # The trajectory algorithm works in feet
+            distance_from_goal = distance_calculator.get_obj_distance()/12
+            distance_end = perf_counter()
+
+            trajectory_alg = TrajectoryAlgorithm(distance_from_goal)
+            trajectory_alg.calc_yaw(self.target)
+            trajectory_alg.calc_pitch(self.target)
+            trajectory_end = perf_counter()
+
+            draw_goal_overlay(frame, corners)
+            overlay_end = perf_counter()
+
+            self.stage_samples["frame_decode"].append(decode_end - frame_start)
+            self.stage_samples["corner_finding"].append(
+                detect_end - decode_end)
+            self.stage_samples["goal_distance"].append(
+                distance_end - detect_end)
+            self.stage_samples["trajectory"].append(
+                trajectory_end - distance_end)
+            self.stage_samples["overlay_drawing"].append(
+                overlay_end - trajectory_end)
+            self.stage_samples["end_to_end"].append(overlay_end - frame_start)
+
+        return self.summarize()
+
+    def summarize(self):
+        """Summarizes the recorded samples
+
+        Returns:
+            OrderedDict: Per stage, the number of samples, throughput (per second), and mean, p50, and p99 latency (in ms)
+        """
+
+        results = OrderedDict()
+        for stage, samples in self.stage_samples.items():
+            if not samples:
+                continue
+            samples_ms = 1000*np.asarray(samples)
+            results[stage] = OrderedDict([
+                ("count", len(samples)),
+                ("throughput_per_s", 1000/samples_ms.mean()),
+                ("mean_ms", float(samples_ms.mean())),
+                ("p50_ms", float(np.percentile(samples_ms, 50))),
+                ("p99_ms", float(np.percentile(samples_ms, 99))),
+            ])
+
+        return results
+
+
+def compare_results(results, baseline, tolerance=0.15, metrics=("p50_ms", "p99_ms")):
+    """Compares benchmark results against a baseline
+
+    Args:
+        results (dict): Results per stage from PipelineBenchmark.run()
+        baseline (dict): Results per stage from an earlier run
+        tolerance (float, optional): Fraction a latency can grow by before it is a regression. Defaults to 0.15.
+        metrics (tuple, optional): Latencies to compare. Defaults to ("p50_ms", "p99_ms").
+
+    Returns:
+        list: Description of every regression (empty if there are none)
+    """
+
+    regressions = []
+    for stage, stage_results in results.items():
+        if stage not in baseline:
+            continue
+        for metric in metrics:
+            baseline_value = baseline[stage][metric]
+            if stage_results[metric] > baseline_value*(1 + tolerance):
+                regressions.append("{} {}: {:.3f} ms -> {:.3f} ms (+{:.0%})".format(
+                    stage, metric, baseline_value, stage_results[metric], stage_results[metric]/baseline_value - 1))
+
+    return regressions
+
+
+def format_results(results):
+    """Formats benchmark results as a text table
+
+    Args:
+        results (dict): Results per stage from PipelineBenchmark.run()
+
+    Returns:
+        string: The table
+    """
+
+    lines = ["{:<16}{:>8}{:>14}{:>10}{:>10}{:>10}".format(
+        "stage", "count", "per second", "mean ms", "p50 ms", "p99 ms")]
+    for stage, stage_results in results.items():
+        lines.append("{:<16}{:>8}{:>14.1f}{:>10.3f}{:>10.3f}{:>10.3f}".format(stage, stage_results["count"],
+                                                                             stage_results["throughput_per_s"], stage_results["mean_ms"],
+                                                                             stage_results["p50_ms"], stage_results["p99_ms"]))
+
+    return "\n".join(lines)
+
+
+def main():
+    """Main prototype/testing area. Runs the benchmark, optionally saving the results and comparing them against a baseline."""
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Ball-E vision pipeline on synthetic frames")
+    parser.add_argument("--frames", type=int, default=300,
+                        help="number of frames to time")
+    parser.add_argument("--frame-size", type=int, nargs=2, default=(960, 540), metavar=("WIDTH", "HEIGHT"),
+                        help="size of the frames, e.g.: 1920 1080 for full capture resolution")
+    parser.add_argument("--pyramid-levels", type=int, default=0,
+                        help="detect the goal coarse-to-fine, halving the frame this many times")
+    parser.add_argument("--output", help="save the results as JSON to this file")
+    parser.add_argument(
+        "--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="fraction a latency can grow by before it is a regression")
+    args = parser.parse_args()
+
+    benchmark = PipelineBenchmark(num_frames=args.frames, frame_size=tuple(args.frame_size),
+                                  pyramid_levels=args.pyramid_levels)
+    results = benchmark.run()
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({
+                "python": platform.python_version(),
+                "opencv": cv2.__version__,
+                "machine": platform.machine(),
+                "frames_without_goal": benchmark.frames_without_goal,
+                "stages": results,
+            }, output_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["stages"]
+        regressions = compare_results(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("REGRESSION {}".format(regression))
+        # A non-zero exit code lets scripts fail on a slowdown
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -0,0 +1,286 @@
+"""
+calibration_store.py
+---
+This file contains the CalibrationProfile and CalibrationStore classes, which save the camera's focal length, intrinsics, and lens distortion per camera and capture resolution so that Ball-E does not have to be recalibrated every time it starts
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Version of the profile layout. Profiles saved with any other version are treated as invalid.
+PROFILE_VERSION = 1
+
+# The Jetson's CSI camera at the resolution that gstreamer_pipeline() displays by default
+DEFAULT_CAMERA_ID = "csi0"
+DEFAULT_RESOLUTION = (960, 540)
+
+# Focal length (in pixels) used by the distance calculators when the camera has not been calibrated yet
+DEFAULT_FOCAL_LENGTH = 10
+
+DEFAULT_STORE_PATH = Path.home() / ".ball_e" / "calibration_profiles.json"
+
+
+class CalibrationProfile:
+    """This class holds the calibration of one camera at one capture resolution
+    """
+
+    def __init__(self, camera_id, resolution, focal_length, camera_matrix=None, dist_coeffs=None, created=None,
+                 version=PROFILE_VERSION, metadata=None):
+        """Initializer for the calibration profile
+
+        Args:
+            camera_id (string): Name of the camera (e.g.: "csi0")
+            resolution (tuple): Width and height (in pixels) the camera captures at
+            focal_length (float): Focal length of the camera (in pixels)
+            camera_matrix (array_like, optional): 3x3 intrinsic matrix of the camera. Defaults to None.
+            dist_coeffs (array_like, optional): Lens distortion coefficients of the camera. Defaults to None.
+            created (float, optional): Time the profile was made (seconds since the epoch). Defaults to now.
+            version (int, optional): Version of the profile layout. Defaults to PROFILE_VERSION.
+            metadata (dict, optional): Anything else worth keeping, such as calibration residuals. Defaults to None.
+        """
+
+        self.camera_id = camera_id
+        self.resolution = tuple(int(side) for side in resolution)
+        self.focal_length = float(focal_length)
+        self.camera_matrix = None if camera_matrix is None else np.asarray(
+            camera_matrix, dtype=np.float64).reshape(3, 3)
+        self.dist_coeffs = None if dist_coeffs is None else np.asarray(
+            dist_coeffs, dtype=np.float64).ravel()
+        self.created = time.time() if created is None else created
+        self.version = version
+        self.metadata = metadata if metadata is not None else {}
+
+    @property
+    def key(self):
+        """Key of this profile in the store"""
+
+        return profile_key(self.camera_id, self.resolution)
+
+    def to_dict(self):
+        """Converts the profile to something that can be saved as JSON
+
+        Returns:
+            dict: The profile
+        """
+
+        return {
+            "version": self.version,
+            "camera_id": self.camera_id,
+            "resolution": list(self.resolution),
+            "focal_length": self.focal_length,
+            "camera_matrix": None if self.camera_matrix is None else self.camera_matrix.tolist(),
+            "dist_coeffs": None if self.dist_coeffs is None else self.dist_coeffs.tolist(),
+            "created": self.created,
+            "metadata": self.metadata,
+        }
+
+    @classmethod
+    def from_dict(cls, profile_dict):
+        """Converts a dictionary made by to_dict() back into a profile
+
+        Args:
+            profile_dict (dict): The profile
+
+        Returns:
+            CalibrationProfile: The profile
+        """
+
+        return cls(camera_id=profile_dict["camera_id"], resolution=profile_dict["resolution"],
+                   focal_length=profile_dict["focal_length"], camera_matrix=profile_dict.get("camera_matrix"),
+                   dist_coeffs=profile_dict.get("dist_coeffs"), created=profile_dict.get("created"),
+                   version=profile_dict.get("version"), metadata=profile_dict.get("metadata"))
+
+
+def profile_key(camera_id, resolution):
+    """Key of a camera and resolution in the store
+
+    Args:
+        camera_id (string): Name of the camera
+        resolution (tuple): Width and height (in pixels) the camera captures at
+
+    Returns:
+        string: The key, e.g.: "csi0@960x540"
+    """
+
+    return "{}@{}x{}".format(camera_id, int(resolution[0]), int(resolution[1]))
+
+
+class CalibrationStore:
+    """This class saves and loads calibration profiles to and from a JSON file. The file is only read the first time a
+    profile is needed, and is written atomically so that a crash can not leave a half-written file behind.
+    """
+
+    def __init__(self, file_path=DEFAULT_STORE_PATH, max_age=None):
+        """Initializer for the calibration store
+
+        Args:
+            file_path (string, optional): Location of the file. Defaults to ~/.ball_e/calibration_profiles.json.
+            max_age (float, optional): Age (in seconds) after which a profile is no longer valid. Defaults to never.
+        """
+
+        self.file_path = Path(file_path)
+        self.max_age = max_age
+        self._profiles = None
+
+    @property
+    def profiles(self):
+        """Every profile in the store, keyed by profile_key()"""
+
+        if self._profiles is None:
+            self.reload()
+        return self._profiles
+
+    def reload(self):
+        """Reads the profiles from the file again"""
+
+        self._profiles = {}
+        if not self.file_path.exists():
+            return
+
+        with open(str(self.file_path)) as store_file:
+            for key, profile_dict in json.load(store_file).get("profiles", {}).items():
+                self._profiles[key] = CalibrationProfile.from_dict(
+                    profile_dict)
+
+    def is_valid(self, profile):
+        """Whether a profile can still be used
+
+        Args:
+            profile (CalibrationProfile): The profile
+
+        Returns:
+            bool: False if the profile was saved with a different layout version or is older than max_age
+        """
+
+        if profile.version != PROFILE_VERSION:
+            return False
+        if self.max_age is not None and time.time() - profile.created > self.max_age:
+            return False
+        return True
+
+    def get(self, camera_id=DEFAULT_CAMERA_ID, resolution=DEFAULT_RESOLUTION):
+        """Gets the profile of a camera at a resolution
+
+        Args:
+            camera_id (string, optional): Name of the camera. Defaults to DEFAULT_CAMERA_ID.
+            resolution (tuple, optional): Width and height (in pixels) the camera captures at. Defaults to DEFAULT_RESOLUTION.
+
+        Returns:
+            CalibrationProfile: The profile, or None if there is no valid profile
+        """
+
+        profile = self.profiles.get(profile_key(camera_id, resolution))
+        if profile is None or not self.is_valid(profile):
+            return None
+        return profile
+
+    def put(self, profile):
+        """Adds or replaces a profile and saves the store
+
+        Args:
+            profile (CalibrationProfile): The profile
+        """
+
+        self.profiles[profile.key] = profile
+        self.save()
+
+    def invalidate(self, camera_id=None, resolution=None):
+        """Removes profiles and saves the store
+
+        Args:
+            camera_id (string, optional): Name of the camera to remove the profiles of. Defaults to every camera.
+            resolution (tuple, optional): Only remove the profile at this resolution. Defaults to every resolution.
+
+        Returns:
+            int: Number of profiles removed
+        """
+
+        removed_keys = [key for key, profile in self.profiles.items()
+                        if (camera_id is None or profile.camera_id == camera_id) and
+                        (resolution is None or profile.resolution == tuple(resolution))]
+        for key in removed_keys:
+            del self._profiles[key]
+
+        if removed_keys:
+            self.save()
+
+        return len(removed_keys)
+
+    def save(self):
+        """Writes every profile to the file"""
+
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.file_path.with_suffix(".tmp")
+
+        with open(str(temp_path), "w") as store_file:
+            json.dump({"version": PROFILE_VERSION, "profiles": {key: profile.to_dict() for key, profile in self.profiles.items()}},
+                      store_file, indent=2)
+        # Replace the old file in one step
+        os.replace(str(temp_path), str(self.file_path))
+
+
+# Store shared by everything that does not pass in its own, created the first time it is needed
+_default_store = None
+
+
+def get_default_store():
+    """Gets the store at DEFAULT_STORE_PATH
+
+    Returns:
+        CalibrationStore: The default store
+    """
+
+    global _default_store
+    if _default_store is None:
+        _default_store = CalibrationStore()
+    return _default_store
+
+
+def load_focal_length(calibration_store=None, camera_id=DEFAULT_CAMERA_ID, resolution=DEFAULT_RESOLUTION):
+    """Gets the calibrated focal length of a camera at a resolution
+
+    Args:
+        calibration_store (CalibrationStore, optional): Store to load from. Defaults to the default store.
+        camera_id (string, optional): Name of the camera. Defaults to DEFAULT_CAMERA_ID.
+        resolution (tuple, optional): Width and height (in pixels) the camera captures at. Defaults to DEFAULT_RESOLUTION.
+
+    Returns:
+        float: The focal length (in pixels), or DEFAULT_FOCAL_LENGTH if the camera has not been calibrated
+    """
+
+    if calibration_store is None:
+        calibration_store = get_default_store()
+
+    profile = calibration_store.get(camera_id, resolution)
+
+    return profile.focal_length if profile is not None else DEFAULT_FOCAL_LENGTH
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    calibration_store = CalibrationStore("calibration_profiles.json")
+    calibration_store.put(CalibrationProfile(
+        DEFAULT_CAMERA_ID, DEFAULT_RESOLUTION, focal_length=1000))
+
+    # A new store only reads the file when a profile is needed
+    calibration_store = CalibrationStore("calibration_profiles.json")
+    print("Focal length: {}".format(load_focal_length(calibration_store)))
+
+    calibration_store.invalidate(DEFAULT_CAMERA_ID)
+    print("Focal length after invalidating: {}".format(
+        load_focal_length(calibration_store)))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
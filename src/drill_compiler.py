@@ -0,0 +1,356 @@
+"""
+drill_compiler.py
+---
+This file contains the DrillCompiler class, which turns a scripted drill (stations at different distances, each with a list of targets and timing) into a compact binary stream of precomputed motor commands for the controller
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import copy
+import json
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+from trajectory_algorithm import Target, TrajectoryAlgorithm, encode_targets
+
+# Identifies a drill command stream and the version of its layout
+DRILL_STREAM_MAGIC = b"BEDS"
+DRILL_STREAM_VERSION = 1
+# Magic, version, number of commands
+DRILL_STREAM_HEADER = struct.Struct("<4sHI")
+
+# Opcodes of the commands in the stream
+OPCODE_REPOSITION = 1
+OPCODE_SHOT = 2
+# Opcode, distance from the goal (in ft.), lateral offset of the goal (in ft.)
+REPOSITION_COMMAND = struct.Struct("<Bff")
+# Opcode, target code, yaw (in motor degrees), pitch (in motor degrees), delay after the previous shot (in ms)
+SHOT_COMMAND = struct.Struct("<BBffH")
+
+# Interval between shots (in seconds) for stations that do not set one
+DEFAULT_INTERVAL = 2.0
+
+# A shot after compiling
+# station: Index of the station in the drill
+# target: Target the ball is shot at
+# distance: Distance of Ball-E from the Goal (in ft.)
+# yaw, pitch: Gear-adjusted motor angles (in degrees)
+# delay: Time to wait after the previous shot (in seconds)
+DrillShot = namedtuple(
+    "DrillShot", ["station", "target", "distance", "yaw", "pitch", "delay"])
+
+# A compiled drill
+# name: Name of the drill
+# stations: Station dictionaries from the drill definition
+# shots: DrillShot tuples in the order they are fired
+# travel: Total motor travel of the compiled order (in motor degrees, or seconds with a cost model, see DrillCompiler.move_cost)
+# unordered_travel: Total motor travel if the shots were fired in the order they were written
+CompiledDrill = namedtuple(
+    "CompiledDrill", ["name", "stations", "shots", "travel", "unordered_travel"])
+
+
+class DrillCompiler:
+    """This class compiles drill definitions. A drill is a dictionary (or JSON file) such as:
+
+        {"name": "Corners",
+         "stations": [{"distance": 15, "targets": ["TL", "BR", "TR", "BL"], "interval": 1.5},
+                      {"distance": 25, "lateral_offset": 2, "targets": ["CM", "TL"], "ordered": true}]}
+
+    Stations are always run in the order they are written, since Ball-E has to be moved between them. Within a station,
+    shots are reordered to minimise the total motor travel unless the station is "ordered".
+    """
+
+    def __init__(self, trajectory_alg=None, home=(0, 0), cost_model=None):
+        """Initializer for the drill compiler
+
+        Args:
+            trajectory_alg (TrajectoryAlgorithm, optional): Source of the offsets, constants, and gear ratios. Defaults to TrajectoryAlgorithm's defaults.
+            home (tuple, optional): Yaw and pitch (in motor degrees) of the motors before the first shot. Defaults to (0, 0).
+            cost_model (MotorCostModel, optional): Model of the motors to order shots by move time instead of travel. Defaults to None.
+        """
+
+        self.trajectory_alg = trajectory_alg if trajectory_alg is not None else TrajectoryAlgorithm(
+            1)
+        self.home = home
+        self.cost_model = cost_model
+
+    def move_cost(self, start, end):
+        """Motor travel between two sets of angles. Yaw and pitch move at the same time, so the larger of the two moves counts.
+        With a cost model, the move time is used instead.
+
+        Args:
+            start (array_like): Yaw and pitch (in motor degrees) with shape (..., 2)
+            end (array_like): Yaw and pitch (in motor degrees) with shape (..., 2)
+
+        Returns:
+            numpy.ndarray: Travel (in motor degrees, or seconds with a cost model) with the broadcast shape of start and end, without the last axis
+        """
+
+        if self.cost_model is not None:
+            return self.cost_model.move_time(start, end)
+
+        return np.max(np.abs(np.asarray(end) - np.asarray(start)), axis=-1)
+
+    def path_cost(self, angles, start):
+        """Total motor travel when shooting at angles in order
+
+        Args:
+            angles (numpy.ndarray): Yaw and pitch (in motor degrees) of each shot with shape (shots, 2)
+            start (array_like): Yaw and pitch (in motor degrees) before the first shot
+
+        Returns:
+            float: The travel (in motor degrees, or seconds with a cost model)
+        """
+
+        if len(angles) == 0:
+            return 0.0
+
+        path = np.concatenate((np.asarray(start, dtype=float)[np.newaxis], angles))
+        return float(np.sum(self.move_cost(path[:-1], path[1:])))
+
+    def order_shots(self, angles, start):
+        """Finds the order of shots with the least motor travel
+
+        Every shot at the same angles is fired back to back, so only the distinct angles (at most one per section of the goal)
+        are ordered. With so few of them, the best order is found exactly (Held-Karp dynamic programming over open paths).
+
+        Args:
+            angles (numpy.ndarray): Yaw and pitch (in motor degrees) of each shot with shape (shots, 2)
+            start (array_like): Yaw and pitch (in motor degrees) before the first shot
+
+        Returns:
+            numpy.ndarray: Indices of the shots in the order they should be fired
+        """
+
+        if len(angles) == 0:
+            return np.zeros(0, dtype=np.intp)
+
+        unique_angles, first_indices, inverse = np.unique(
+            angles, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        # Keep the distinct angles in the order they were written, so ties are broken the same way every time
+        written_order = np.argsort(first_indices, kind="stable")
+        unique_angles = unique_angles[written_order]
+        group_of_shot = np.argsort(written_order)[inverse]
+        num_groups = len(unique_angles)
+
+        start_costs = self.move_cost(start, unique_angles)
+        costs = self.move_cost(
+            unique_angles[:, np.newaxis], unique_angles[np.newaxis])
+
+        # best[(visited, last)] is the least travel that visits every group in the visited bit mask and ends at last
+        best = {(1 << group, group): (float(start_costs[group]), None)
+                for group in range(num_groups)}
+        for visited in range(1, 1 << num_groups):
+            for last in range(num_groups):
+                state = best.get((visited, last))
+                if state is None:
+                    continue
+                for following in range(num_groups):
+                    if visited & (1 << following):
+                        continue
+                    key = (visited | (1 << following), following)
+                    cost = state[0] + float(costs[last, following])
+                    if key not in best or cost < best[key][0]:
+                        best[key] = (cost, last)
+
+        # Walk back from the cheapest end to recover the order of the groups
+        everything = (1 << num_groups) - 1
+        last = min(range(num_groups), key=lambda group: best[(everything, group)][0])
+        group_order = []
+        visited = everything
+        while last is not None:
+            group_order.append(last)
+            previous = best[(visited, last)][1]
+            visited &= ~(1 << last)
+            last = previous
+        group_order.reverse()
+
+        # Shots in the same group keep the order they were written in
+        group_rank = np.empty(num_groups, dtype=np.intp)
+        group_rank[group_order] = np.arange(num_groups)
+        return np.lexsort((np.arange(len(angles)), group_rank[group_of_shot]))
+
+    def compile(self, drill):
+        """Compiles a drill definition
+
+        Args:
+            drill (dict): The drill definition (see the class docstring)
+
+        Raises:
+            ValueError: If the drill has no stations or any station is invalid
+
+        Returns:
+            CompiledDrill: The compiled drill
+        """
+
+        stations = drill.get("stations")
+        if not stations:
+            raise ValueError("The drill needs at least one station")
+
+        shots = []
+        travel = 0.0
+        unordered_travel = 0.0
+        position = np.asarray(self.home, dtype=float)
+        unordered_position = position
+
+        for station_index, station in enumerate(stations):
+            if "distance" not in station or station["distance"] <= 0:
+                raise ValueError(
+                    "Station {} needs a positive distance".format(station_index))
+
+            distance = float(station["distance"])
+            interval = float(station.get("interval", DEFAULT_INTERVAL))
+            codes = encode_targets(station.get("targets", [])).ravel()
+
+            # Every angle of the station is computed in one pass
+            trajectory_alg = copy.copy(self.trajectory_alg)
+            trajectory_alg.distance_from_goal = distance
+            trajectory_alg.lateral_offset = float(
+                station.get("lateral_offset", 0))
+            yaw, pitch = trajectory_alg.calc_batch(distance, codes)
+            angles = np.stack((yaw, pitch), axis=-1).reshape(-1, 2)
+
+            unordered_travel += self.path_cost(angles, unordered_position)
+            if len(angles):
+                unordered_position = angles[-1]
+
+            if station.get("ordered", False):
+                order = np.arange(len(angles))
+            else:
+                order = self.order_shots(angles, position)
+            angles = angles[order]
+            codes = codes[order]
+
+            travel += self.path_cost(angles, position)
+            if len(angles):
+                position = angles[-1]
+
+            shots.extend(DrillShot(station_index, Target(int(code)), distance, float(shot_yaw), float(shot_pitch), interval)
+                         for code, (shot_yaw, shot_pitch) in zip(codes, angles))
+
+        return CompiledDrill(drill.get("name", ""), list(stations), shots, travel, unordered_travel)
+
+    def compile_file(self, file_path):
+        """Compiles a drill definition saved as JSON
+
+        Args:
+            file_path (string): Location of the drill definition
+
+        Returns:
+            CompiledDrill: The compiled drill
+        """
+
+        with open(file_path) as drill_file:
+            return self.compile(json.load(drill_file))
+
+
+def encode_command_stream(compiled_drill):
+    """Packs a compiled drill into the binary command stream that the controller runs
+
+    Each station starts with a REPOSITION command, which the controller holds on until Ball-E is in place, followed by its SHOT commands.
+
+    Args:
+        compiled_drill (CompiledDrill): The compiled drill
+
+    Raises:
+        ValueError: If a delay does not fit in the stream
+
+    Returns:
+        bytes: The command stream
+    """
+
+    commands = []
+    current_station = None
+    for shot in compiled_drill.shots:
+        if shot.station != current_station:
+            current_station = shot.station
+            station = compiled_drill.stations[current_station]
+            commands.append(REPOSITION_COMMAND.pack(
+                OPCODE_REPOSITION, shot.distance, float(station.get("lateral_offset", 0))))
+
+        delay_ms = int(round(shot.delay*1000))
+        if not 0 <= delay_ms <= 0xFFFF:
+            raise ValueError("Delay of {} s does not fit in the command stream".format(shot.delay))
+        commands.append(SHOT_COMMAND.pack(OPCODE_SHOT, int(
+            shot.target), shot.yaw, shot.pitch, delay_ms))
+
+    header = DRILL_STREAM_HEADER.pack(
+        DRILL_STREAM_MAGIC, DRILL_STREAM_VERSION, len(commands))
+
+    return header + b"".join(commands)
+
+
+def decode_command_stream(data):
+    """Unpacks a binary command stream, e.g.: to check what the controller will do
+
+    Args:
+        data (bytes): The command stream
+
+    Raises:
+        ValueError: If the data is not a command stream or is truncated
+
+    Returns:
+        list: Tuples of the command name followed by its fields
+    """
+
+    if len(data) < DRILL_STREAM_HEADER.size:
+        raise ValueError("Not a drill command stream")
+
+    magic, version, num_commands = DRILL_STREAM_HEADER.unpack_from(data)
+    if magic != DRILL_STREAM_MAGIC or version != DRILL_STREAM_VERSION:
+        raise ValueError(
+            "Not a version {} drill command stream".format(DRILL_STREAM_VERSION))
+
+    commands = []
+    offset = DRILL_STREAM_HEADER.size
+    try:
+        for _ in range(num_commands):
+            opcode = data[offset]
+            if opcode == OPCODE_REPOSITION:
+                _, distance, lateral_offset = REPOSITION_COMMAND.unpack_from(
+                    data, offset)
+                commands.append(("REPOSITION", distance, lateral_offset))
+                offset += REPOSITION_COMMAND.size
+            elif opcode == OPCODE_SHOT:
+                _, code, yaw, pitch, delay_ms = SHOT_COMMAND.unpack_from(
+                    data, offset)
+                commands.append(("SHOT", Target(code), yaw, pitch, delay_ms))
+                offset += SHOT_COMMAND.size
+            else:
+                raise ValueError("Unknown opcode {} at byte {}".format(opcode, offset))
+    except (IndexError, struct.error):
+        raise ValueError("Drill command stream is truncated")
+
+    return commands
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    drill = {
+        "name": "Corners then doubles",
+        "stations": [
+            {"distance": 15, "targets": ["TL", "BR", "TR", "BL", "CM"]*4, "interval": 1.5},
+            {"distance": 25, "lateral_offset": 2, "targets": ["TL", "TR", "BL", "BR"], "ordered": True},
+        ],
+    }
+
+    compiled_drill = DrillCompiler().compile(drill)
+    command_stream = encode_command_stream(compiled_drill)
+
+    print("{}: {} shots, {} bytes\nTravel: {:.1f} (as written: {:.1f})".format(compiled_drill.name, len(compiled_drill.shots),
+                                                                             len(command_stream), compiled_drill.travel,
+                                                                             compiled_drill.unordered_travel))
+    for command in decode_command_stream(command_stream)[:8]:
+        print(command)
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
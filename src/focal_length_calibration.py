@@ -0,0 +1,245 @@
+"""
+focal_length_calibration.py
+---
+This file contains the FocalLengthCalibration class, which fits the camera's focal length from many calibration captures at several known distances using robust least squares, and saves the result as a calibration profile
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import math
+import multiprocessing
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from calibration_store import (DEFAULT_CAMERA_ID, DEFAULT_RESOLUTION,
+                               CalibrationProfile, get_default_store)
+from frame_source import SyntheticGoalFrameSource, load_image
+from goal_corner_detector import GoalCornerDetector
+from goal_distance_calculator import GoalDistanceCalculator
+
+# Result of fitting the focal length
+# focal_length: Fitted focal length (in pixels)
+# standard_error: Standard error of the focal length (in pixels)
+# confidence_interval: 95% confidence interval of the focal length (in pixels)
+# residuals: Pixels perceived minus the pixels predicted by the fit, per capture
+# weights: Weight each capture ended up with in the robust fit (captures near 0 are outliers)
+# num_captures: Number of captures the goal was found in
+FocalLengthFit = namedtuple("FocalLengthFit", ["focal_length", "standard_error", "confidence_interval", "residuals",
+                                               "weights", "num_captures"])
+
+
+def measure_pixels_perceived(capture):
+    """Finds the length (in pixels) of the bottom side of the goal in a calibration capture
+
+    NOTE: This is a module level function so that it can be sent to worker processes
+
+    Args:
+        capture (tuple): The image (or location of the image) and the known distance (in inches) it was taken at
+
+    Returns:
+        tuple: The pixels perceived (or None if the goal was not found) and the known distance
+    """
+
+    image, known_distance = capture
+    if not isinstance(image, np.ndarray):
+        image = load_image(image)
+
+    corners = GoalCornerDetector().detect(image)
+    if corners is None:
+        return None, known_distance
+
+    # Refine the corners to sub-pixel accuracy before measuring
+    distance_calculator = GoalDistanceCalculator(corners)
+    bottom_right, bottom_left = distance_calculator.refine_corners(image)[2:]
+
+    return math.hypot(bottom_left[0] - bottom_right[0], bottom_left[1] - bottom_right[1]), known_distance
+
+
+class FocalLengthCalibration:
+    """This class fits the focal length to many (pixels perceived, known distance) pairs.
+
+    From Triangle Similarity, pixels perceived = focal length * (goal length/known distance), which is a line through the origin.
+    The slope is fit with iteratively reweighted least squares using Huber weights, so that a few bad captures do not skew it.
+    """
+
+    def __init__(self, huber_threshold=1.345, max_iterations=50, tolerance=1e-9, side_length_uncertainty=0.5):
+        """Initializer for the focal length calibration
+
+        Args:
+            huber_threshold (float, optional): Residual (in robust standard deviations) after which a capture is down-weighted. Defaults to 1.345.
+            max_iterations (int, optional): Most reweighting iterations. Defaults to 50.
+            tolerance (float, optional): Relative change of the focal length below which the fit stops. Defaults to 1e-9.
+            side_length_uncertainty (float, optional): Uncertainty (in pixels) of the measured side length that every capture shares, such as where the edge of the goal is taken to be. Defaults to 0.5.
+        """
+
+        # Lax Goal is 72 inches (i.e.: 6 ft) - it is also square.
+        self.lax_goal_length = 72
+
+        self.huber_threshold = huber_threshold
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        self.side_length_uncertainty = side_length_uncertainty
+
+        self.pixels_perceived = []
+        self.known_distances = []
+
+    def add_measurement(self, pixels_perceived, known_distance):
+        """Adds a measurement that was already made
+
+        Args:
+            pixels_perceived (float): Length of a side (in pixels)
+            known_distance (float): The given distance (in inches)
+        """
+
+        self.pixels_perceived.append(pixels_perceived)
+        self.known_distances.append(known_distance)
+
+    def add_captures(self, captures, processes=None):
+        """Measures many calibration captures in parallel across the cores
+
+        Args:
+            captures (list): Tuples of the image (or location of the image) and the known distance (in inches) it was taken at
+            processes (int, optional): Number of worker processes. Defaults to the number of cores.
+
+        Returns:
+            int: Number of captures the goal could not be found in
+        """
+
+        captures = list(captures)
+        if processes == 1 or len(captures) < 2:
+            measurements = [measure_pixels_perceived(
+                capture) for capture in captures]
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                measurements = pool.map(measure_pixels_perceived, captures)
+
+        missed_captures = 0
+        for pixels_perceived, known_distance in measurements:
+            if pixels_perceived is None:
+                missed_captures += 1
+            else:
+                self.add_measurement(pixels_perceived, known_distance)
+
+        return missed_captures
+
+    def fit(self):
+        """Fits the focal length to every measurement
+
+        Raises:
+            ValueError: If there are fewer than two measurements
+
+        Returns:
+            FocalLengthFit: The fitted focal length along with its residuals and confidence
+        """
+
+        if len(self.pixels_perceived) < 2:
+            raise ValueError("At least two measurements are needed")
+
+        pixels_perceived = np.asarray(self.pixels_perceived, dtype=float)
+        x = self.lax_goal_length/np.asarray(self.known_distances, dtype=float)
+        weights = np.ones_like(x)
+
+        # Start from ordinary least squares through the origin
+        focal_length = np.sum(x*pixels_perceived)/np.sum(x*x)
+        for _ in range(self.max_iterations):
+            residuals = pixels_perceived - focal_length*x
+            robust_std = 1.4826*np.median(np.abs(residuals))
+            if robust_std == 0:
+                break
+
+            # Huber weights: 1 for small residuals and threshold/|residual| for large ones
+            scaled_residuals = np.abs(residuals)/robust_std
+            weights = np.minimum(
+                1, self.huber_threshold/np.maximum(scaled_residuals, 1e-12))
+
+            new_focal_length = np.sum(
+                weights*x*pixels_perceived)/np.sum(weights*x*x)
+            converged = abs(new_focal_length -
+                            focal_length) <= self.tolerance*abs(focal_length)
+            focal_length = new_focal_length
+            if converged:
+                break
+
+        residuals = pixels_perceived - focal_length*x
+        degrees_of_freedom = max(len(x) - 1, 1)
+        residual_variance = np.sum(weights*residuals**2)/degrees_of_freedom
+        random_variance = residual_variance/np.sum(weights*x*x)
+        # An error shared by every capture does not average out: an offset of b pixels moves the slope by
+        # b*sum(w*x)/sum(w*x^2), so it is added on top of the scatter of the residuals
+        systematic_error = self.side_length_uncertainty * \
+            np.sum(weights*x)/np.sum(weights*x*x)
+        standard_error = math.sqrt(random_variance + systematic_error**2)
+
+        return FocalLengthFit(focal_length=float(focal_length),
+                              standard_error=standard_error,
+                              confidence_interval=(float(focal_length - 1.96*standard_error),
+                                                   float(focal_length + 1.96*standard_error)),
+                              residuals=residuals,
+                              weights=weights,
+                              num_captures=len(x))
+
+    def save_profile(self, focal_length_fit, calibration_store=None, camera_id=DEFAULT_CAMERA_ID,
+                     resolution=DEFAULT_RESOLUTION):
+        """Saves a fitted focal length as a calibration profile. The rest of an existing profile, such as the camera
+        matrix and lens distortion, is kept.
+
+        Args:
+            focal_length_fit (FocalLengthFit): The fit from fit()
+            calibration_store (CalibrationStore, optional): Store to save to. Defaults to the default store.
+            camera_id (string, optional): Name of the camera. Defaults to DEFAULT_CAMERA_ID.
+            resolution (tuple, optional): Width and height (in pixels) the captures were taken at. Defaults to DEFAULT_RESOLUTION.
+
+        Returns:
+            CalibrationProfile: The saved profile
+        """
+
+        if calibration_store is None:
+            calibration_store = get_default_store()
+
+        fit_metadata = {
+            "standard_error": focal_length_fit.standard_error,
+            "confidence_interval": list(focal_length_fit.confidence_interval),
+            "residual_rms": float(np.sqrt(np.mean(focal_length_fit.residuals**2))),
+            "num_captures": focal_length_fit.num_captures,
+        }
+
+        profile = calibration_store.get(camera_id, resolution)
+        if profile is None:
+            profile = CalibrationProfile(
+                camera_id, resolution, focal_length_fit.focal_length, metadata=fit_metadata)
+        else:
+            profile.focal_length = float(focal_length_fit.focal_length)
+            profile.metadata.update(fit_metadata)
+            profile.created = time.time()
+        calibration_store.put(profile)
+
+        return profile
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    # Captures at several known distances, with sensor noise
+    captures = []
+    for known_distance in (120, 180, 240, 300, 360):
+        frame_source = SyntheticGoalFrameSource(
+            distance=known_distance, focal_length=800, num_frames=4, noise_sigma=4).open()
+        captures.extend((frame, known_distance) for frame in frame_source)
+
+    calibration = FocalLengthCalibration()
+    missed_captures = calibration.add_captures(captures)
+    focal_length_fit = calibration.fit()
+
+    print("Focal Length of Camera: {:.2f} pixels (95% CI {:.2f} to {:.2f})\nMissed captures: {}\nResiduals: {}".format(
+        focal_length_fit.focal_length, focal_length_fit.confidence_interval[0], focal_length_fit.confidence_interval[1],
+        missed_captures, np.round(focal_length_fit.residuals, 3)))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -0,0 +1,226 @@
+"""
+component_overlay.py
+---
+This file contains the GoalOverlayLayer class, which keeps the points, goal perimeter, and zone grid drawn on top of an image in their own transparent layer so that they can be redrawn without touching the image underneath.
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import sys
+from pathlib import Path
+
+from PyQt5.QtCore import QPointF, QRect, QRectF, QSize, Qt
+from PyQt5.QtGui import QBrush, QPainter, QPen, QPixmap, QPolygonF
+
+# The shared vision modules live one directory up, in src/
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from zone_grid import ZoneGrid  # noqa: E402
+
+
+class GoalOverlayLayer:
+    """GoalOverlayLayer.
+
+    This class draws the user's points, the goal's perimeter, and the zone grid (3x3 by default) onto a transparent pixmap.
+    It keeps track of which part of the layer changed (the dirty region) so that only that part has to be composited onto the image again.
+    """
+
+    def __init__(self, size=QSize(), point_radius=20, point_pen_width=12, line_width=12, color=Qt.green, grid_rows=3, grid_cols=3):
+        """__init__.
+
+        Initializes the overlay layer
+
+        :param size: QSize of the image the layer is drawn over
+        :param point_radius: Radius (in pixels) of each point
+        :param point_pen_width: Width (in pixels) of the outline of each point
+        :param line_width: Width (in pixels) of the perimeter and grid lines
+        :param color: Colour of everything drawn on the layer
+        :param grid_rows: Number of rows of zones to draw
+        :param grid_cols: Number of columns of zones to draw
+        """
+
+        self.point_radius = point_radius
+        self.point_pen_width = point_pen_width
+        self.line_width = line_width
+        self.color = color
+        self.grid_rows = grid_rows
+        self.grid_cols = grid_cols
+
+        self.pixmap = QPixmap()
+        self.points = []
+        self.goal_corners = None
+        # Part of the layer (in image coordinates) that changed since it was last composited
+        self.dirty_rect = QRect()
+
+        self.resize(size)
+
+    def resize(self, size):
+        """resize.
+
+        Matches the layer to the size of the image, which clears it
+
+        :param size: QSize of the image the layer is drawn over
+        """
+
+        if size == self.pixmap.size() and not self.pixmap.isNull():
+            return
+
+        self.pixmap = QPixmap(size)
+        self.clear()
+
+    def clear(self):
+        """clear.
+
+        Removes everything from the layer
+        """
+
+        self.points = []
+        self.goal_corners = None
+        if not self.pixmap.isNull():
+            self.pixmap.fill(Qt.transparent)
+        self.dirty_rect = self.pixmap.rect()
+
+    def is_empty(self):
+        """is_empty.
+
+        :return: Whether nothing is drawn on the layer
+        """
+
+        return not self.points and self.goal_corners is None
+
+    def add_point(self, point):
+        """add_point.
+
+        Draws a point
+
+        :param point: QPoint or QPointF (in image coordinates) of the point
+        """
+
+        point = QPointF(point)
+        self.points.append(point)
+
+        painter_obj = QPainter(self.pixmap)
+        painter_obj.setPen(
+            QPen(self.color, self.point_pen_width, Qt.SolidLine))
+        painter_obj.setBrush(QBrush(self.color, Qt.SolidPattern))
+        painter_obj.drawEllipse(point, self.point_radius, self.point_radius)
+        painter_obj.end()
+
+        extent = self.point_radius + self.point_pen_width
+        self.mark_dirty(QRectF(point.x() - extent, point.y() -
+                               extent, 2*extent, 2*extent))
+
+    def set_goal(self, corners):
+        """set_goal.
+
+        Draws the goal's perimeter and zone grid, replacing the previous ones. Nothing is redrawn if the corners did not change.
+
+        :param corners: Four (x,y) tuples in Top Left, Top Right, Bottom Right, Bottom Left order, or None to remove the goal
+        """
+
+        corners = None if corners is None else [
+            QPointF(x, y) for x, y in corners]
+        if corners == self.goal_corners:
+            return
+
+        if self.goal_corners is not None:
+            # Only clear the area that the previous goal covered, and redraw any points in it
+            old_rect = self.goal_rect(self.goal_corners)
+            painter_obj = QPainter(self.pixmap)
+            painter_obj.setCompositionMode(QPainter.CompositionMode_Clear)
+            painter_obj.fillRect(old_rect, Qt.transparent)
+            painter_obj.end()
+            self.mark_dirty(old_rect)
+
+            points = self.points
+            self.points = []
+            for point in points:
+                self.add_point(point)
+
+        self.goal_corners = corners
+        if corners is None:
+            return
+
+        painter_obj = QPainter(self.pixmap)
+        painter_obj.setPen(QPen(self.color, self.line_width, Qt.SolidLine))
+        self.draw_goal(painter_obj, corners)
+        painter_obj.end()
+
+        self.mark_dirty(self.goal_rect(corners))
+
+    def draw_goal(self, painter_obj, corners):
+        """draw_goal.
+
+        Draws the goal's perimeter and the perspective-correct latitudes and longitudes of its zone grid
+
+        :param painter_obj: QPainter to draw with
+        :param corners: Four QPointF objects in Top Left, Top Right, Bottom Right, Bottom Left order
+        """
+
+        # Draw the perimeter
+        painter_obj.drawPolygon(QPolygonF(corners))
+
+        # Draw latitudes and longitudes
+        zone_grid = ZoneGrid([(corner.x(), corner.y()) for corner in corners],
+                             self.grid_rows, self.grid_cols)
+        for start, end in zone_grid.grid_lines():
+            painter_obj.drawLine(QPointF(*start), QPointF(*end))
+
+    def goal_rect(self, corners):
+        """goal_rect.
+
+        :param corners: Four QPointF objects of the goal
+        :return: QRectF covering everything drawn for the goal
+        """
+
+        return QPolygonF(corners).boundingRect().adjusted(-self.line_width, -self.line_width,
+                                                          self.line_width, self.line_width)
+
+    def mark_dirty(self, rect):
+        """mark_dirty.
+
+        Adds an area to the dirty region
+
+        :param rect: QRect or QRectF (in image coordinates) that changed
+        """
+
+        rect = QRectF(rect).toAlignedRect() & self.pixmap.rect()
+        self.dirty_rect = self.dirty_rect | rect
+
+    def take_dirty_rect(self):
+        """take_dirty_rect.
+
+        :return: QRect of the dirty region, which is then considered clean
+        """
+
+        dirty_rect = self.dirty_rect
+        self.dirty_rect = QRect()
+
+        return dirty_rect
+
+    def composite(self, base_pixmap, target_pixmap, rect=None):
+        """composite.
+
+        Copies the base image and then this layer onto the target, only within the dirty region (or a given area)
+
+        :param base_pixmap: QPixmap of the clean image
+        :param target_pixmap: QPixmap to composite onto (the same size as the base image)
+        :param rect: Optional QRect to composite instead of the dirty region
+        :return: QRect that was composited
+        """
+
+        if rect is None:
+            rect = self.take_dirty_rect()
+        if rect.isEmpty():
+            return rect
+
+        painter_obj = QPainter(target_pixmap)
+        painter_obj.setCompositionMode(QPainter.CompositionMode_Source)
+        painter_obj.drawPixmap(rect, base_pixmap, rect)
+        painter_obj.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        painter_obj.drawPixmap(rect, self.pixmap, rect)
+        painter_obj.end()
+
+        return rect
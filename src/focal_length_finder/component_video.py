@@ -0,0 +1,230 @@
+"""
+component_video.py
+---
+This file contains the VideoThread and VideoWidget classes, which show the live camera feed (along with the detected goal) inside of the GUI app for Ball-E without blocking it.
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import threading
+
+import numpy as np
+from PyQt5.QtCore import QRect, QSize, Qt, QThread, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+from component_overlay import GoalOverlayLayer
+
+# QImage can only read BGR pixels directly from Qt 5.14 on. Older Qt (e.g.: the Jetson's Qt 5.9) swaps them into a copy instead.
+HAS_BGR888 = hasattr(QImage, "Format_BGR888")
+
+
+def cv_frame_to_qimage(frame):
+    """cv_frame_to_qimage.
+
+    Wraps an OpenCV BGR frame in a QImage that uses the same memory, so no pixels are copied.
+    NOTE: The frame must be kept alive (and not be modified) for as long as the QImage is used.
+    Before Qt 5.14 (see HAS_BGR888) the pixels are copied once with their red and blue swapped, since there is no BGR format.
+
+    :param frame: BGR image with shape (height, width, 3) and dtype uint8
+    :return: QImage over the frame's memory
+    :raises ValueError: If the frame's rows are not laid out one after the other
+    """
+
+    # QImage needs every row to be laid out one after the other
+    if not frame.flags["C_CONTIGUOUS"]:
+        raise ValueError("Frame must be C-contiguous to be wrapped without a copy")
+
+    height, width = frame.shape[:2]
+
+    if HAS_BGR888:
+        return QImage(frame.data, width, height, frame.strides[0], QImage.Format_BGR888)
+
+    return QImage(frame.data, width, height, frame.strides[0], QImage.Format_RGB888).rgbSwapped()
+
+
+class VideoThread(QThread):
+    """VideoThread.
+
+    This class reads frames from a frame source on its own thread, optionally tracks the goal in them, and sends them to the GUI.
+    A new frame is only sent once the GUI has shown the previous one, so the GUI never falls behind the camera.
+    """
+
+    # The frame and the corners of the goal in it (or None)
+    frame_ready = pyqtSignal(np.ndarray, object)
+
+    def __init__(self, frame_source, goal_tracker=None, parent=None):
+        """__init__.
+
+        Initializes the QThread object with appropriate arguments
+
+        :param frame_source: FrameSource to read frames from
+        :param goal_tracker: Optional GoalTracker to find the goal in each frame
+        :param parent: Default arg.
+        """
+
+        super().__init__(parent=parent)
+
+        self.frame_source = frame_source
+        self.goal_tracker = goal_tracker
+
+        self._running = False
+        # Set while a frame is waiting to be shown by the GUI
+        self._frame_pending = threading.Event()
+
+        # Counters for how well the GUI is keeping up
+        self.frames_read = 0
+        self.frames_dropped = 0
+
+    def run(self):
+        """run.
+
+        Reads frames until the frame source runs out or stop() is called
+        """
+
+        self._running = True
+        cap = self.frame_source.open()
+
+        while self._running:
+            ret, cv_img = cap.read()
+            if not ret:
+                break
+            self.frames_read += 1
+
+            corners = self.goal_tracker.update(
+                cv_img) if self.goal_tracker is not None else None
+
+            # Drop the frame if the GUI is still busy with the previous one
+            if self._frame_pending.is_set():
+                self.frames_dropped += 1
+                continue
+
+            self._frame_pending.set()
+            self.frame_ready.emit(cv_img, corners)
+
+        cap.release()
+
+    @pyqtSlot()
+    def frame_shown(self):
+        """frame_shown.
+
+        Lets the thread know that the GUI is ready for the next frame
+        """
+
+        self._frame_pending.clear()
+
+    def stop(self):
+        """stop.
+
+        Stops reading frames and waits for the thread to finish
+        """
+
+        self._running = False
+        self.wait()
+
+
+class VideoWidget(QWidget):
+    """VideoWidget.
+
+    This class paints the latest frame (scaled to fit while keeping its aspect ratio) with the goal overlay layer on top.
+    """
+
+    # Emitted after a frame has been painted
+    frame_shown = pyqtSignal()
+
+    def __init__(self, parent=None):
+        """__init__.
+
+        Initializes the QWidget object with appropriate arguments
+
+        :param parent: Default arg.
+        """
+
+        super().__init__(parent=parent)
+
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        # Every pixel is painted, so Qt does not need to clear the background first
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+        # The frame is kept alongside its QImage since the QImage uses the frame's memory
+        self.frame = None
+        self.frame_image = None
+        self.corners = None
+
+        # The goal is drawn on its own layer, which is reused across frames and only redrawn when the corners move
+        self.overlay_layer = GoalOverlayLayer(line_width=3)
+
+    def connect_thread(self, video_thread):
+        """connect_thread.
+
+        Shows the frames from a VideoThread in this widget
+
+        :param video_thread: VideoThread to show the frames of
+        """
+
+        video_thread.frame_ready.connect(self.update_frame)
+        self.frame_shown.connect(video_thread.frame_shown)
+
+    @pyqtSlot(np.ndarray, object)
+    def update_frame(self, frame, corners):
+        """update_frame.
+
+        Slot for a new frame
+
+        :param frame: BGR image from the camera
+        :param corners: Four (x,y) tuples in Top Left, Top Right, Bottom Right, Bottom Left order, or None
+        """
+
+        # Only copies if the frame is a view with gaps between its rows (e.g.: a crop)
+        self.frame = np.ascontiguousarray(frame)
+        self.frame_image = cv_frame_to_qimage(self.frame)
+        self.corners = corners
+
+        self.overlay_layer.resize(QSize(frame.shape[1], frame.shape[0]))
+        self.overlay_layer.set_goal(corners)
+        # The whole widget is repainted for a new frame anyway
+        self.overlay_layer.take_dirty_rect()
+        self.update()
+
+    def image_rect(self):
+        """image_rect.
+
+        Finds where the frame is painted in the widget
+
+        :return: QRect of the scaled frame, centered in the widget
+        """
+
+        image_size = self.frame_image.size()
+        image_size.scale(self.size(), Qt.KeepAspectRatio)
+
+        return QRect((self.width() - image_size.width())//2, (self.height() - image_size.height())//2,
+                     image_size.width(), image_size.height())
+
+    def paintEvent(self, event):
+        """paintEvent.
+
+        Paints the latest frame and the goal overlay
+
+        :param event: Paint event
+        """
+
+        painter_obj = QPainter(self)
+        painter_obj.fillRect(self.rect(), Qt.black)
+
+        if self.frame_image is None:
+            painter_obj.end()
+            return
+
+        target_rect = self.image_rect()
+        painter_obj.drawImage(target_rect, self.frame_image)
+
+        # The overlay layer is in frame coordinates, so it is scaled the same way as the frame
+        if not self.overlay_layer.is_empty():
+            painter_obj.drawPixmap(target_rect, self.overlay_layer.pixmap)
+
+        painter_obj.end()
+
+        self.frame_shown.emit()
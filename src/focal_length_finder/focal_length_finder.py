@@ -6,26 +6,42 @@ This file contains the VideoView, TrainingGoalCalibrationScreen, and FocalLength
 
 Author: Andrei Biswas (@codeabiswas)
 Date: May 4, 2021
-Last Modified: May 08, 2021
+Last Modified: Oct 17, 2026
 """
 
 import math
 import sys
+import threading
+import time
 from pathlib import Path
 
 import cv2
+import numpy as np
 from PyQt5 import QtGui
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, pyqtSlot
-from PyQt5.QtGui import QBrush, QPainter, QPen, QPixmap
+from PyQt5.QtCore import QPoint, Qt, QThread, pyqtSignal, pyqtSlot
+from PyQt5.QtGui import QPixmap
 from PyQt5.QtWidgets import (QApplication, QHBoxLayout, QLabel, QMainWindow,
                              QPushButton, QSizePolicy, QVBoxLayout, QWidget)
 
 import style_constants as sc
 from component_button import GenericButton
 from component_labels import ProfileLabel
+from component_overlay import GoalOverlayLayer
 from component_toolbar import ToolbarComponent
+from component_video import VideoThread, VideoWidget, cv_frame_to_qimage
 from window_test import TestWindow
 
+# The shared vision modules live one directory up, in src/
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import pipeline_metrics  # noqa: E402
+from calibration_store import (DEFAULT_CAMERA_ID,  # noqa: E402
+                               DEFAULT_RESOLUTION, load_focal_length)
+from frame_buffer import FrameRingBuffer  # noqa: E402
+from frame_source import GStreamerFrameSource, gstreamer_pipeline  # noqa: E402
+from goal_corner_detector import GoalCornerDetector  # noqa: E402
+from goal_tracker import GoalTracker  # noqa: E402
+from lens_undistortion import LensUndistorter  # noqa: E402
+
 
 class VideoView():
     """VideoView.
@@ -33,26 +49,39 @@ class VideoView():
     This class gets the video stream from from the camera using OpenCV.
     """
 
-    def __init__(self):
+    def __init__(self, frame_source=None):
         """__init__.
 
         Initializes OpenCV appropriately
+
+        :param frame_source: Optional FrameSource to get frames from instead of the Jetson's CSI camera (e.g.: a video file, a directory of images, or a synthetic goal)
         """
         super().__init__()
 
+        if frame_source is None:
+            frame_source = GStreamerFrameSource()
+        self.frame_source = frame_source
+
     def run(self):
         """run.
 
         Captures the video stream
         """
-        # capture from web cam
-        cap = cv2.VideoCapture(self.gstreamer_pipeline(), cv2.CAP_GSTREAMER)
+        # capture from the frame source
+        cap = self.frame_source.open()
         while True:
-            ret, cv_img = cap.read()
-            cv2.imshow(cv_img)
+            with pipeline_metrics.stage("video_view.capture"):
+                ret, cv_img = cap.read()
+            # File, directory, and synthetic sources run out of frames
+            if not ret:
+                break
+            pipeline_metrics.increment("video_view.frames")
+            with pipeline_metrics.stage("video_view.display"):
+                cv2.imshow("Ball-E", cv_img)
+                key = cv2.waitKey(25)
 
             # When user presses 'q', save the image
-            if cv2.waitKey(25) & 0xFF == ord('q'):
+            if key & 0xFF == ord('q'):
                 cv2.imwrite('images/curr_img.png', cv_img)
                 break
 
@@ -61,6 +90,74 @@ class VideoView():
         # Close all frames
         cv2.destroyAllWindows()
 
+    def run_threaded(self, process_frame=None, buffer_capacity=2):
+        """run_threaded.
+
+        Captures the video stream on a separate reader thread so that capturing, processing, and displaying happen at the same time.
+        Frames are handed over through a bounded ring buffer which drops the oldest frame when it is full,
+        so the processing always works on the freshest frame.
+
+        :param process_frame: Optional function that takes a frame and returns the frame to display
+        :param buffer_capacity: Most frames that can be waiting to be processed
+        :return: Counters for the frames put in, frames dropped, and the depth of the buffer
+        """
+        # capture from the frame source
+        cap = self.frame_source.open()
+        frame_buffer = FrameRingBuffer(buffer_capacity)
+        stop_event = threading.Event()
+
+        def read_frames():
+            try:
+                # Keep reading until the camera stops or the user quits
+                while not stop_event.is_set():
+                    with pipeline_metrics.stage("video_view.capture"):
+                        ret, cv_img = cap.read()
+                    if not ret:
+                        break
+                    frame_buffer.put(cv_img)
+                    pipeline_metrics.increment("video_view.frames_captured")
+            finally:
+                # Also wakes up the display loop if reading failed
+                frame_buffer.close()
+
+        reader_thread = threading.Thread(target=read_frames, daemon=True)
+        reader_thread.start()
+
+        try:
+            while True:
+                with pipeline_metrics.stage("video_view.wait_for_frame"):
+                    buffered_frame = frame_buffer.get_latest()
+                # The camera stopped sending frames
+                if buffered_frame is None:
+                    break
+                pipeline_metrics.increment("video_view.frames_processed")
+                # Time from capture until processing starts
+                pipeline_metrics.observe("video_view.frame_age",
+                                         (time.perf_counter() - buffered_frame.timestamp)*1000)
+
+                cv_img = buffered_frame.frame
+                with pipeline_metrics.stage("video_view.process"):
+                    display_img = process_frame(
+                        cv_img) if process_frame is not None else cv_img
+                with pipeline_metrics.stage("video_view.display"):
+                    cv2.imshow("Ball-E", display_img)
+                    # Only poll the keyboard for 1 ms since the wait for the next frame happens in the ring buffer.
+                    key = cv2.waitKey(1)
+
+                # When user presses 'q', save the image
+                if key & 0xFF == ord('q'):
+                    cv2.imwrite('images/curr_img.png', cv_img)
+                    break
+        finally:
+            # Stop the reader thread before shutting down the capture system, even if processing a frame failed
+            stop_event.set()
+            reader_thread.join()
+            cap.release()
+            # Close all frames
+            cv2.destroyAllWindows()
+
+        return frame_buffer.stats()
+
     def gstreamer_pipeline(
         self,
         capture_width=1920,
@@ -82,24 +179,7 @@ class VideoView():
         :param flip_method: Argument for rotation of image capturing and displaying
         """
 
-        return (
-            "nvarguscamerasrc ! "
-            "video/x-raw(memory:NVMM), "
-            "width=(int)%d, height=(int)%d, "
-            "format=(string)NV12, framerate=(fraction)%d/1 ! "
-            "nvvidconv flip-method=%d ! "
-            "video/x-raw, width=(int)%d, height=(int)%d, format=(string)BGRx ! "
-            "videoconvert ! "
-            "video/x-raw, format=(string)BGR ! appsink"
-            % (
-                capture_width,
-                capture_height,
-                framerate,
-                flip_method,
-                display_width,
-                display_height,
-            )
-        )
+        return gstreamer_pipeline(capture_width, capture_height, display_width, display_height, framerate, flip_method)
 
 
 class TrainingGoalCalibrationScreen(QWidget):
@@ -141,18 +221,30 @@ class TrainingGoalCalibrationScreen(QWidget):
         self.lax_goal_img_location = str(
             Path.home()) + '/Developer/ball_e_image_processing/src/focal_length_finder/images/curr_img.png'
 
+        # Points and lines are drawn on their own layer on top of the clean image of the goal
+        self.overlay_layer = GoalOverlayLayer()
+
+        # The clean image of the goal is kept in memory so that resetting does not have to read the file again
+        self.base_frame = None
+        self.base_image = None
+        self.base_pixmap = QPixmap()
         self.pixmap_object = QPixmap()
-        self.pixmap_object.load(self.lax_goal_img_location)
         self.lax_goal_label.mousePressEvent = self.draw_user_input
-        self.lax_goal_label.setPixmap(self.pixmap_object)
+        self.update_lax_goal_pic()
+
+        # Finds the corners of the goal without the user having to click on them
+        self.corner_detector = GoalCornerDetector()
 
         self.button_layout = QHBoxLayout()
+        self.auto_detect_button = GenericButton("Auto Detect")
+        self.auto_detect_button.clicked.connect(self.auto_detect_corners)
         self.reset_button = GenericButton("Reset")
         self.reset_button.clicked.connect(self.reset_lines)
         self.reset_button.setVisible(False)
         self.next_page_button = GenericButton("Next")
         self.next_page_button.setVisible(False)
 
+        self.button_layout.addWidget(self.auto_detect_button)
         self.button_layout.addWidget(self.reset_button)
         self.button_layout.addWidget(self.next_page_button)
 
@@ -169,14 +261,48 @@ class TrainingGoalCalibrationScreen(QWidget):
 
         self.setLayout(screen_layout)
 
-    def update_lax_goal_pic(self):
+    def update_lax_goal_pic(self, frame=None):
         """update_lax_goal_pic.
 
         Updates the label with the latest image of the goal.
+
+        :param frame: Optional BGR image of the goal (e.g.: straight from the camera). If not given, the image is read from lax_goal_img_location
         """
-        self.pixmap_object = QPixmap()
-        self.pixmap_object.load(self.lax_goal_img_location)
-        self.lax_goal_label.mousePressEvent = self.draw_user_input
+        if frame is None:
+            frame = cv2.imread(self.lax_goal_img_location)
+
+        if frame is None:
+            # The image could not be read, so show nothing
+            self.base_frame = None
+            self.base_image = None
+            self.base_pixmap = QPixmap()
+        else:
+            # Wrap the frame's memory in a QImage and only convert it to a QPixmap once
+            self.base_frame = np.ascontiguousarray(frame)
+            self.base_image = cv_frame_to_qimage(self.base_frame)
+            self.base_pixmap = QPixmap.fromImage(self.base_image)
+
+        self.overlay_layer.resize(self.base_pixmap.size())
+        self.restore_lax_goal_pic()
+
+    def restore_lax_goal_pic(self):
+        """restore_lax_goal_pic.
+
+        Removes everything drawn on the image by clearing the overlay layer and copying the clean image of the goal from memory
+        """
+        self.overlay_layer.clear()
+        self.overlay_layer.take_dirty_rect()
+        self.pixmap_object = self.base_pixmap.copy()
+        self.lax_goal_label.setPixmap(self.pixmap_object)
+
+    def refresh_lax_goal_pic(self):
+        """refresh_lax_goal_pic.
+
+        Composites the overlay layer onto the image, only where the overlay changed
+        """
+        if self.pixmap_object.isNull():
+            return
+        self.overlay_layer.composite(self.base_pixmap, self.pixmap_object)
         self.lax_goal_label.setPixmap(self.pixmap_object)
 
     def reset_lines(self):
@@ -189,15 +315,12 @@ class TrainingGoalCalibrationScreen(QWidget):
         self.click_counter = 0
 
         # Clear the image
-        # NOTE: This will change to temp_training_lax_goal.png
-        self.lax_goal_img_location = str(
-            Path.home()) + '/Developer/ball_e_image_processing/src/focal_length_finder/images/curr_img.png'
+        self.restore_lax_goal_pic()
 
-        self.pixmap_object = QPixmap()
-        self.pixmap_object.load(self.lax_goal_img_location)
-        self.lax_goal_label.mousePressEvent = self.draw_user_input
-        self.lax_goal_label.setPixmap(self.pixmap_object)
+        # Forget the previously selected points
+        self.selected_points = []
 
+        self.auto_detect_button.setVisible(True)
         self.reset_button.setVisible(False)
         self.next_page_button.setVisible(False)
 
@@ -220,17 +343,11 @@ class TrainingGoalCalibrationScreen(QWidget):
         if self.click_counter < 4:
             self.click_counter += 1
 
-            # Set the painter object so that points can be visually seen on the image as the user clicks on them
-            painter_obj = QPainter(self.pixmap_object)
-            painter_obj.setPen(QPen(Qt.green, 12, Qt.SolidLine))
-            painter_obj.setBrush(QBrush(Qt.green, Qt.SolidPattern))
-
-            painter_obj.drawEllipse(event.pos(), 20, 20)
-
-            painter_obj.end()
+            # Draw the point on the overlay layer so that it can be visually seen on the image as the user clicks on it
+            self.overlay_layer.add_point(event.pos())
 
             # Update the image with the newly drawn point
-            self.lax_goal_label.setPixmap(self.pixmap_object)
+            self.refresh_lax_goal_pic()
 
             # We assume that the user is going in a clockwise direction, starting with the top-left coordinate
             if self.click_counter == 1:
@@ -251,73 +368,149 @@ class TrainingGoalCalibrationScreen(QWidget):
                 self.selected_points.append(self.bottom_left_coord)
                 # Make appropriate buttons visible, draw the lines given the coordinates to show the bounds,
                 # and update the text to guide the user
+                self.auto_detect_button.setVisible(False)
                 self.reset_button.setVisible(True)
                 self.next_page_button.setVisible(True)
                 self.draw_lines()
                 self.info_label.setText(
                     "These will be your bounds. If you would like to redo this, click on the Reset button")
 
+    def auto_detect_corners(self):
+        """auto_detect_corners.
+
+        Finds the 4 corners of the goal in the image automatically instead of having the user click on them
+        """
+
+        corners = self.corner_detector.detect(
+            self.base_frame) if self.base_frame is not None else None
+
+        if corners is None:
+            self.info_label.setText(
+                "Could not find the goal. Please select the 4 corners of the goal, going clockwise from the top-left corner")
+            return
+
+        # Convert to whole pixels, which is what a click on the image would give
+        self.top_left_coord, self.top_right_coord, self.bottom_right_coord, self.bottom_left_coord = [
+            (int(round(x_coord)), int(round(y_coord))) for x_coord, y_coord in corners]
+        self.selected_points = [self.top_left_coord, self.top_right_coord,
+                                self.bottom_right_coord, self.bottom_left_coord]
+        self.click_counter = 4
+
+        # Show the detected points the same way as clicked points
+        for x_coord, y_coord in self.selected_points:
+            self.overlay_layer.add_point(QPoint(x_coord, y_coord))
+
+        self.auto_detect_button.setVisible(False)
+        self.reset_button.setVisible(True)
+        self.next_page_button.setVisible(True)
+        self.draw_lines()
+        self.info_label.setText(
+            "These will be your bounds. If you would like to redo this, click on the Reset button")
+
     def draw_lines(self):
         """draw_lines.
 
         This function draws the boundaries of the goal given the 4 coordinates drawn by the user
         """
 
-        # Set the painter object so that the lines can be seen
-        painter_obj = QPainter(self.pixmap_object)
-        painter_obj.setPen(QPen(Qt.green, 12, Qt.SolidLine))
+        # Draw the perimeter, latitudes, and longitudes on the overlay layer
+        self.overlay_layer.set_goal([self.top_left_coord, self.top_right_coord,
+                                     self.bottom_right_coord, self.bottom_left_coord])
 
-        # Draw the perimeter
-        painter_obj.drawLine(
-            self.top_left_coord[0], self.top_left_coord[1], self.top_right_coord[0], self.top_right_coord[1])
+        # Update the image label with the new lines
+        self.refresh_lax_goal_pic()
 
-        painter_obj.drawLine(
-            self.top_left_coord[0], self.top_left_coord[1], self.bottom_left_coord[0], self.bottom_left_coord[1])
+    def get_window_title(self):
+        """get_window_title.
 
-        painter_obj.drawLine(
-            self.top_right_coord[0], self.top_right_coord[1], self.bottom_right_coord[0], self.bottom_right_coord[1])
+        Getter function for Window Title
+        """
 
-        painter_obj.drawLine(
-            self.bottom_left_coord[0], self.bottom_left_coord[1], self.bottom_right_coord[0], self.bottom_right_coord[1])
+        return self.window_title
 
-        # Calculate Left and Right coordinates for the latitudes
-        top_one_third_coord_left = (int((2/3)*(self.top_left_coord[0]))+int((1/3)*(self.bottom_left_coord[0])), int(
-            (2/3)*(self.top_left_coord[1]))+int((1/3)*(self.bottom_left_coord[1])))
-        top_two_third_coord_left = (int((1/3)*(self.top_left_coord[0]))+int((2/3)*(self.bottom_left_coord[0])), int(
-            (1/3)*(self.top_left_coord[1]))+int((2/3)*(self.bottom_left_coord[1])))
 
-        top_one_third_coord_right = (int((2/3)*(self.top_right_coord[0]))+int((1/3)*(self.bottom_right_coord[0])), int(
-            (2/3)*(self.top_right_coord[1]))+int((1/3)*(self.bottom_right_coord[1])))
-        top_two_third_coord_right = (int((1/3)*(self.top_right_coord[0]))+int((2/3)*(self.bottom_right_coord[0])), int(
-            (1/3)*(self.top_right_coord[1]))+int((2/3)*(self.bottom_right_coord[1])))
+class LiveGoalCalibrationScreen(QWidget):
+    """LiveGoalCalibrationScreen.
 
-        # Draw latitudes
-        painter_obj.drawLine(top_one_third_coord_left[0], top_one_third_coord_left[1],
-                             top_one_third_coord_right[0], top_one_third_coord_right[1])
-        painter_obj.drawLine(top_two_third_coord_left[0], top_two_third_coord_left[1],
-                             top_two_third_coord_right[0], top_two_third_coord_right[1])
+    Screen for calibrating Ball-E with the goal using the live camera feed, with the detected goal drawn on top
+    """
+
+    def __init__(self, frame_source=None, parent=None):
+        """__init__.
 
-        # Calculate Top and Bottom coordinates for the longitudes
-        left_one_third_coord_top = (int((2/3)*(self.top_left_coord[0]))+int((1/3)*(self.top_right_coord[0])), int(
-            (2/3)*(self.top_left_coord[1]))+int((1/3)*(self.top_right_coord[1])))
-        left_two_third_coord_top = (int((1/3)*(self.top_left_coord[0]))+int((2/3)*(self.top_right_coord[0])), int(
-            (1/3)*(self.top_left_coord[1]))+int((2/3)*(self.top_right_coord[1])))
+        Initializes the Widget object with appropriate arguments
 
-        left_one_third_coord_bottom = (int((2/3)*(self.bottom_left_coord[0]))+int((1/3)*(self.bottom_right_coord[0])), int(
-            (2/3)*(self.bottom_left_coord[1]))+int((1/3)*(self.bottom_right_coord[1])))
-        left_two_third_coord_bottom = (int((1/3)*(self.bottom_left_coord[0]))+int((2/3)*(self.bottom_right_coord[0])), int(
-            (1/3)*(self.bottom_left_coord[1]))+int((2/3)*(self.bottom_right_coord[1])))
+        :param frame_source: Optional FrameSource to get frames from instead of the Jetson's CSI camera
+        :param parent: Default arg.
+        """
 
-        # Draw longitudes
-        painter_obj.drawLine(left_one_third_coord_top[0], left_one_third_coord_top[1],
-                             left_one_third_coord_bottom[0], left_one_third_coord_bottom[1])
-        painter_obj.drawLine(left_two_third_coord_top[0], left_two_third_coord_top[1],
-                             left_two_third_coord_bottom[0], left_two_third_coord_bottom[1])
+        super().__init__(parent=parent)
 
-        painter_obj.end()
+        # Set a title for the widget
+        self.window_title = "Goal Calibration"
 
-        # Update the image label with the new lines
-        self.lax_goal_label.setPixmap(self.pixmap_object)
+        screen_layout = QVBoxLayout()
+
+        self.toolbar = ToolbarComponent(
+            self.window_title, "Back to Goal Calib. \nSetup")
+        screen_layout.addWidget(self.toolbar)
+
+        self.info_label = ProfileLabel(
+            "Point Ball-E at the goal and click on Capture once the goal is outlined")
+        screen_layout.addWidget(self.info_label)
+
+        # The camera is read (and the goal is tracked) on a separate thread so that the GUI stays responsive
+        if frame_source is None:
+            frame_source = GStreamerFrameSource()
+        self.video_thread = VideoThread(frame_source, GoalTracker())
+        self.video_widget = VideoWidget()
+        self.video_widget.connect_thread(self.video_thread)
+        screen_layout.addWidget(self.video_widget)
+
+        self.button_layout = QHBoxLayout()
+        self.capture_button = GenericButton("Capture")
+        self.capture_button.clicked.connect(self.capture_corners)
+        self.next_page_button = GenericButton("Next")
+        self.next_page_button.setVisible(False)
+
+        self.button_layout.addWidget(self.capture_button)
+        self.button_layout.addWidget(self.next_page_button)
+
+        screen_layout.addLayout(self.button_layout)
+
+        # Stores the coordinates ((x,y) tuples format) of the goal's corners when the user clicked on Capture
+        self.selected_points = []
+
+        self.setLayout(screen_layout)
+
+        self.video_thread.start()
+
+    def capture_corners(self):
+        """capture_corners.
+
+        Keeps the corners of the goal that are currently being shown
+        """
+
+        if self.video_widget.corners is None:
+            self.info_label.setText(
+                "Could not find the goal. Please point Ball-E at the goal")
+            return
+
+        self.selected_points = list(self.video_widget.corners)
+        self.next_page_button.setVisible(True)
+        self.info_label.setText(
+            "These will be your bounds. If you would like to redo this, click on Capture again")
+
+    def closeEvent(self, event):
+        """closeEvent.
+
+        Stops the camera when the screen is closed
+
+        :param event: Close event
+        """
+
+        self.video_thread.stop()
+        super().closeEvent(event)
 
     def get_window_title(self):
         """get_window_title.
@@ -334,20 +527,29 @@ class FocalLengthFinder:
     This class finds the focal length of the camera and can be used to test the accuracy using the get_obj_distance function.
     """
 
-    def __init__(self, points_drawn):
+    def __init__(self, points_drawn, calibration_store=None, camera_id=DEFAULT_CAMERA_ID, resolution=DEFAULT_RESOLUTION,
+                 undistorter=None):
         """__init__.
 
         Initializes the class with required constants
 
         :param points_drawn: List of all the tuples consisting of the coordinates that the user has drawn
+        :param calibration_store: Optional CalibrationStore to load the focal length from (defaults to the default store)
+        :param camera_id: Name of the camera the picture was taken with
+        :param resolution: Width and height (in pixels) of the picture
+        :param undistorter: Optional LensUndistorter to remove the lens distortion from the points
         """
 
         # Lax Goal is 72 inches (i.e.: 6 ft) - it is also square.
         self.lax_goal_length = 72
 
         # Focal length of the camera
-        # NOTE: This is a random number that should be concretely set using the get_focal_length() function
-        self.focal_length = 10
+        # NOTE: This is loaded from the calibration store the first time it is used, and is a random number (10) until
+        # the camera has been calibrated using the get_focal_length() function
+        self._focal_length = None
+        self.calibration_store = calibration_store
+        self.camera_id = camera_id
+        self.resolution = resolution
 
         # Collection of the four points that user drew on the picture
         # NOTE: This list will always include points (tuples in (x,y)) in the following order:
@@ -355,8 +557,27 @@ class FocalLengthFinder:
         # 2. Top Right
         # 3. Bottom Right
         # 4. Bottom Left
-        self.points_drawn = points_drawn
+        # NOTE: Lens distortion bends the sides of the goal, so the points are undistorted first if possible
+        self.points_drawn = undistorter.undistort_points(
+            points_drawn) if undistorter is not None else points_drawn
 
+    @property
+    def focal_length(self):
+        """focal_length.
+
+        Focal length of the camera (in pixels), loaded from the calibration store the first time it is used
+        """
+
+        if self._focal_length is None:
+            self._focal_length = load_focal_length(
+                self.calibration_store, self.camera_id, self.resolution)
+        return self._focal_length
+
+    @focal_length.setter
+    def focal_length(self, focal_length):
+        self._focal_length = focal_length
+
+    @pipeline_metrics.timed("focal_length_finder.get_obj_distance")
     def get_obj_distance(self):
         """get_obj_distance.
 
@@ -401,23 +622,47 @@ def run_app():
     return calib_screen
 
 
+def run_live_app(frame_source=None):
+    """run_live_app.
+
+    Returns the LiveGoalCalibrationScreen object to get the corners that were captured
+
+    :param frame_source: Optional FrameSource to get frames from instead of the Jetson's CSI camera
+    """
+
+    app = QApplication(sys.argv)
+    calib_screen = LiveGoalCalibrationScreen(frame_source)
+    # Display the widget
+    win = TestWindow(calib_screen)
+    win.show()
+    app.exec_()
+    calib_screen.video_thread.stop()
+
+    return calib_screen
+
+
 def main():
     """main.
 
     Main prototype/testing area. Code prototyping and checking happens here.
     """
-    # 1. Move Ball-E set distance from the goal
+    # 1. Move Ball-E set distance (in inches) from the goal
+    # NOTE: For a more accurate focal length from many captures at several distances, use focal_length_calibration.py
+    known_distance = 180
     video_generator = VideoView()
     # 2. Take a picture with this camera and save it
     video_generator.run()
     # 3. Draw four points on the image to create a perimeter around the goal
     calib_screen = run_app()
-    # 4. Calculate the pixels perceived using the two bottom points
+    # 4. Calculate the pixels perceived using the two bottom points, without the lens distortion if it is calibrated
     focal_length_finder = FocalLengthFinder(
-        points_drawn=calib_screen.selected_points)
+        points_drawn=calib_screen.selected_points, undistorter=LensUndistorter.from_store())
+    bottom_right, bottom_left = focal_length_finder.points_drawn[2:]
+    pixels_perceived = math.sqrt(
+        (bottom_left[0] - bottom_right[0])**2 + (bottom_left[1] - bottom_right[1])**2)
     # 5. Get focal length
     print("Focal Length of Camera: {} pixels".format(
-        focal_length_finder.get_focal_length()))
+        focal_length_finder.get_focal_length(pixels_perceived, known_distance)))
 
 
 if __name__ == "__main__":
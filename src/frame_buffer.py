@@ -0,0 +1,186 @@
+"""
+frame_buffer.py
+---
+This file contains the FrameRingBuffer class, which is a bounded, thread-safe queue of camera frames that drops the oldest frame when it is full
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import threading
+import time
+from collections import deque, namedtuple
+
+# A frame along with its sequence number (in the order it was captured) and the time it was captured (from time.perf_counter)
+BufferedFrame = namedtuple("BufferedFrame", ["sequence", "timestamp", "frame"])
+
+
+class FrameRingBuffer:
+    """This class hands frames from a capture (producer) thread to a processing (consumer) thread.
+    When the buffer is full the oldest frame is dropped, so the consumer never falls behind the camera.
+    """
+
+    def __init__(self, capacity=2):
+        """Initializer for the frame ring buffer
+
+        Args:
+            capacity (int, optional): Most frames that can be waiting in the buffer. Defaults to 2.
+
+        Raises:
+            ValueError: If the capacity is less than 1
+        """
+
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+
+        self.capacity = capacity
+        self._frames = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._next_sequence = 0
+
+        # Counters for how well the consumer is keeping up
+        self.frames_put = 0
+        self.frames_dropped = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self):
+        """Number of frames currently waiting in the buffer"""
+
+        with self._condition:
+            return len(self._frames)
+
+    @property
+    def closed(self):
+        """Whether the producer has stopped putting frames in the buffer"""
+
+        with self._condition:
+            return self._closed
+
+    def put(self, frame):
+        """Adds a frame to the buffer, dropping the oldest frame if the buffer is full
+
+        Args:
+            frame (numpy.ndarray): Frame to add
+
+        Returns:
+            int: Sequence number given to the frame
+        """
+
+        with self._condition:
+            if len(self._frames) == self.capacity:
+                self._frames.popleft()
+                self.frames_dropped += 1
+
+            sequence = self._next_sequence
+            self._next_sequence += 1
+            self._frames.append(BufferedFrame(
+                sequence, time.perf_counter(), frame))
+
+            self.frames_put += 1
+            self.max_depth = max(self.max_depth, len(self._frames))
+            self._condition.notify()
+
+        return sequence
+
+    def get(self, timeout=None):
+        """Removes and returns the oldest frame in the buffer, waiting for one if the buffer is empty
+
+        Args:
+            timeout (float, optional): Most time (in seconds) to wait for a frame. Defaults to waiting forever.
+
+        Returns:
+            BufferedFrame: The oldest frame, or None if the buffer is closed or the wait timed out
+        """
+
+        with self._condition:
+            if not self._wait_for_frame(timeout):
+                return None
+            return self._frames.popleft()
+
+    def get_latest(self, timeout=None):
+        """Removes and returns the newest frame in the buffer, dropping every older frame
+
+        Args:
+            timeout (float, optional): Most time (in seconds) to wait for a frame. Defaults to waiting forever.
+
+        Returns:
+            BufferedFrame: The newest frame, or None if the buffer is closed or the wait timed out
+        """
+
+        with self._condition:
+            if not self._wait_for_frame(timeout):
+                return None
+            latest_frame = self._frames.pop()
+            self.frames_dropped += len(self._frames)
+            self._frames.clear()
+            return latest_frame
+
+    def _wait_for_frame(self, timeout):
+        """Waits until there is a frame in the buffer. Must be called while holding the condition.
+
+        Args:
+            timeout (float): Most time (in seconds) to wait for a frame, or None to wait forever
+
+        Returns:
+            bool: Whether there is a frame in the buffer
+        """
+
+        self._condition.wait_for(
+            lambda: self._frames or self._closed, timeout)
+
+        return len(self._frames) > 0
+
+    def close(self):
+        """Signals that no more frames will be added. Waiting consumers are woken up."""
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def stats(self):
+        """Snapshot of the buffer's counters
+
+        Returns:
+            dict: Frames put, frames dropped, current depth, and max depth
+        """
+
+        with self._condition:
+            return {
+                "frames_put": self.frames_put,
+                "frames_dropped": self.frames_dropped,
+                "depth": len(self._frames),
+                "max_depth": self.max_depth,
+            }
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    frame_buffer = FrameRingBuffer(capacity=2)
+
+    def produce():
+        for frame_number in range(100):
+            frame_buffer.put(frame_number)
+            time.sleep(0.001)
+        frame_buffer.close()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+
+    # Simulate a consumer that is slower than the camera
+    frames_seen = 0
+    while frame_buffer.get_latest() is not None:
+        frames_seen += 1
+        time.sleep(0.003)
+    producer.join()
+
+    print("Frames seen: {}\nStats: {}".format(frames_seen, frame_buffer.stats()))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
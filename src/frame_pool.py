@@ -0,0 +1,351 @@
+"""
+frame_pool.py
+---
+This file contains the FrameProcessPool class, which spreads CPU-heavy per-frame work (such as goal detection) across worker processes using shared-memory frame slots, and hands the results back in frame order
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+from collections import namedtuple
+from multiprocessing.sharedctypes import RawArray
+
+import numpy as np
+
+from frame_source import SyntheticGoalFrameSource
+from goal_corner_detector import GoalCornerDetector
+
+# Result of processing one frame
+# sequence: Number of the frame, in the order it was submitted
+# frame: The frame in its shared slot, which is only valid until the next result is requested
+# result: What the worker's function returned (None if it failed)
+# error: Traceback of the worker's function if it failed, otherwise None
+# process_time: Time the worker spent on the frame (in seconds)
+FrameResult = namedtuple(
+    "FrameResult", ["sequence", "frame", "result", "error", "process_time"])
+
+
+def make_goal_detector():
+    """Makes the default per-frame function of the workers, which finds the goal's corners
+
+    NOTE: This is a module level function so that it can be sent to worker processes
+
+    Returns:
+        function: Takes a BGR frame and returns its four corners, or None
+    """
+
+    return GoalCornerDetector().detect
+
+
+def frame_worker(shared_frames, frame_shape, num_slots, task_queue, result_queue, worker_factory):
+    """Processes frames from shared slots until it receives None
+
+    NOTE: This is a module level function so that it can be sent to worker processes
+
+    Args:
+        shared_frames (RawArray): Shared memory of every frame slot
+        frame_shape (tuple): Height, width, and channels of the frames
+        num_slots (int): Number of frame slots
+        task_queue (multiprocessing.Queue): Sequence numbers and slots of the frames to process
+        result_queue (multiprocessing.Queue): Where the sequence numbers, slots, and results go
+        worker_factory (function): Makes the function that processes each frame
+    """
+
+    frames = np.frombuffer(shared_frames, dtype=np.uint8).reshape(
+        (num_slots,) + tuple(frame_shape))
+    process_frame = worker_factory()
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            return
+
+        sequence, slot = task
+        start_time = time.perf_counter()
+        try:
+            result, error = process_frame(frames[slot]), None
+        except Exception:
+            result, error = None, traceback.format_exc()
+        result_queue.put((sequence, slot, result, error,
+                          time.perf_counter() - start_time))
+
+
+class FrameProcessPool:
+    """This class runs a per-frame function on several worker processes.
+
+    Frames are copied once into slots of a shared memory block (multiprocessing.sharedctypes.RawArray), and only the
+    sequence number and slot go through the queues, so no frames are pickled. Results come back in whatever order the
+    workers finish, and are held until every earlier frame is done so that they leave the pool in frame order.
+    """
+
+    def __init__(self, frame_shape, processes=None, num_slots=None, worker_factory=make_goal_detector, timeout=10.0):
+        """Initializer for the frame process pool
+
+        Args:
+            frame_shape (tuple): Height, width, and channels of the frames, e.g.: (1080, 1920, 3)
+            processes (int, optional): Number of worker processes. Defaults to the number of cores.
+            num_slots (int, optional): Number of shared frame slots. Defaults to twice the number of workers plus two.
+            worker_factory (function, optional): Module level function that makes the per-frame function in each worker. Defaults to make_goal_detector.
+            timeout (float, optional): Longest wait (in seconds) for a result before checking that the workers are alive. Defaults to 10.0.
+
+        Raises:
+            ValueError: If there are not more slots than workers
+        """
+
+        self.frame_shape = tuple(frame_shape)
+        self.processes = processes if processes is not None else (
+            os.cpu_count() or 1)
+        self.num_slots = num_slots if num_slots is not None else 2*self.processes + 2
+        if self.num_slots <= self.processes:
+            raise ValueError("There must be more frame slots than workers")
+        self.worker_factory = worker_factory
+        self.timeout = timeout
+
+        frame_bytes = int(np.prod(self.frame_shape))
+        self.shared_frames = RawArray("B", frame_bytes*self.num_slots)
+        self.frames = np.frombuffer(self.shared_frames, dtype=np.uint8).reshape(
+            (self.num_slots,) + self.frame_shape)
+
+        self.task_queue = None
+        self.result_queue = None
+        self.workers = []
+
+        self.free_slots = []
+        self.next_sequence = 0
+        self.next_to_emit = 0
+        self._finished = {}
+        self._emitted_slot = None
+        # Number of map_frames() calls, so that an abandoned call can tell that a newer one took over
+        self._run_id = 0
+
+    def start(self):
+        """Starts the worker processes"""
+
+        if self.workers:
+            return
+
+        self.task_queue = multiprocessing.Queue()
+        self.result_queue = multiprocessing.Queue()
+        self.workers = [multiprocessing.Process(target=frame_worker, daemon=True,
+                                                args=(self.shared_frames, self.frame_shape, self.num_slots,
+                                                      self.task_queue, self.result_queue, self.worker_factory))
+                        for _ in range(self.processes)]
+        for worker in self.workers:
+            worker.start()
+
+        self._reset()
+
+    def _reset(self):
+        """Frees every slot and restarts the sequence numbers at 0"""
+
+        self.free_slots = list(range(self.num_slots))
+        self.next_sequence = 0
+        self.next_to_emit = 0
+        self._finished = {}
+        self._emitted_slot = None
+
+    def _discard_in_flight(self):
+        """Waits for the frames still being processed and throws their results away, so the next run starts clean"""
+
+        while len(self._finished) < self.in_flight:
+            self._receive(block=True)
+        self._reset()
+
+    def _check_run(self, run_id):
+        """Makes sure that a map_frames() call is still the latest one
+
+        Args:
+            run_id (int): Number of the call
+
+        Raises:
+            RuntimeError: If map_frames() was called again since, which discarded this call's frames
+        """
+
+        if self._run_id != run_id:
+            raise RuntimeError("map_frames() was called again before this call finished")
+
+    def close(self):
+        """Stops the worker processes"""
+
+        for _ in self.workers:
+            self.task_queue.put(None)
+        for worker in self.workers:
+            worker.join(self.timeout)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def in_flight(self):
+        """Number of frames submitted that have not left the pool yet"""
+
+        return self.next_sequence - self.next_to_emit
+
+    def _receive(self, block):
+        """Moves one finished frame from the workers to the reorder buffer
+
+        Args:
+            block (bool): Whether to wait for a frame to finish
+
+        Raises:
+            RuntimeError: If a worker process died
+
+        Returns:
+            bool: Whether a frame was received
+        """
+
+        while True:
+            try:
+                sequence, slot, result, error, process_time = self.result_queue.get(
+                    block, self.timeout)
+                break
+            except queue.Empty:
+                if not block:
+                    return False
+                if not all(worker.is_alive() for worker in self.workers):
+                    raise RuntimeError("A frame worker process died")
+
+        self._finished[sequence] = (slot, result, error, process_time)
+        return True
+
+    def _release_emitted(self):
+        """Returns the slot of the last result handed out, which the caller is now done with"""
+
+        if self._emitted_slot is not None:
+            self.free_slots.append(self._emitted_slot)
+            self._emitted_slot = None
+
+    def _ready_results(self):
+        """Hands out every result whose earlier frames are all done, in frame order"""
+
+        while self.next_to_emit in self._finished:
+            self._release_emitted()
+            slot, result, error, process_time = self._finished.pop(
+                self.next_to_emit)
+            self._emitted_slot = slot
+            self.next_to_emit += 1
+            yield FrameResult(self.next_to_emit - 1, self.frames[slot], result, error, process_time)
+
+    def submit(self, frame):
+        """Copies a frame into a free slot and queues it. Only call this when a slot is free (see map_frames).
+
+        Args:
+            frame (numpy.ndarray): BGR frame with the pool's frame shape
+
+        Raises:
+            ValueError: If the frame is a different shape than the pool's frames
+
+        Returns:
+            int: Sequence number of the frame
+        """
+
+        if frame.shape != self.frame_shape:
+            raise ValueError("Frame is {} but the pool is {}".format(
+                frame.shape, self.frame_shape))
+
+        slot = self.free_slots.pop()
+        np.copyto(self.frames[slot], frame)
+        sequence = self.next_sequence
+        self.next_sequence += 1
+        self.task_queue.put((sequence, slot))
+
+        return sequence
+
+    def map_frames(self, frames):
+        """Processes frames on the workers and yields the results in frame order
+
+        NOTE: Each result's frame lives in a shared slot that is reused once the next result is requested, so copy it to keep it.
+        Stopping early discards the frames still being processed, and every call starts again at sequence number 0.
+
+        Args:
+            frames (iterable): BGR frames, e.g.: a FrameSource
+
+        Yields:
+            FrameResult: The result of each frame, in the order the frames were given
+        """
+
+        self.start()
+        # Results of an earlier call that was not run to the end must not leak into this one
+        self._discard_in_flight()
+        self._run_id += 1
+        run_id = self._run_id
+
+        try:
+            for frame in frames:
+                self._release_emitted()
+                # Wait for a slot, handing out results in order while waiting
+                while not self.free_slots:
+                    self._receive(block=True)
+                    for frame_result in self._ready_results():
+                        yield frame_result
+                        self._check_run(run_id)
+                    self._release_emitted()
+
+                self.submit(frame)
+
+                while self._receive(block=False):
+                    pass
+                for frame_result in self._ready_results():
+                    yield frame_result
+                    self._check_run(run_id)
+
+            # Wait for the frames still being processed
+            while self.in_flight:
+                if self.next_to_emit not in self._finished:
+                    self._receive(block=True)
+                for frame_result in self._ready_results():
+                    yield frame_result
+                    self._check_run(run_id)
+        finally:
+            # Also runs when the caller stops early (e.g.: breaks out of the loop), unless a newer call took over
+            if self.workers and self._run_id == run_id:
+                self._discard_in_flight()
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    from goal_distance_calculator import GoalDistanceCalculator
+
+    # Full resolution frames, as captured by gstreamer_pipeline()'s defaults
+    frame_size = (1920, 1080)
+    frames = [frame.copy() for frame in SyntheticGoalFrameSource(
+        distance=240, focal_length=2000, frame_size=frame_size, num_frames=60, noise_sigma=2).open()]
+
+    detector = GoalCornerDetector()
+    start_time = time.perf_counter()
+    for frame in frames:
+        detector.detect(frame)
+    single_fps = len(frames)/(time.perf_counter() - start_time)
+
+    with FrameProcessPool((frame_size[1], frame_size[0], 3)) as frame_pool:
+        start_time = time.perf_counter()
+        distances = []
+        for frame_result in frame_pool.map_frames(frames):
+            if frame_result.result is not None:
+                distance_calculator = GoalDistanceCalculator(frame_result.result)
+                distance_calculator.focal_length = 2000
+                distances.append(distance_calculator.get_obj_distance())
+        pool_fps = len(frames)/(time.perf_counter() - start_time)
+
+    print("Single process: {:.1f} fps\n{} processes: {:.1f} fps\nMedian distance: {:.2f} inches".format(
+        single_fps, frame_pool.processes, pool_fps, np.median(distances)))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -0,0 +1,339 @@
+"""
+frame_source.py
+---
+This file contains the FrameSource classes, which provide camera frames to VideoView (and the rest of the vision pipeline) from the Jetson's CSI camera, a video file, a directory of images, or a synthetic goal renderer
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import mmap
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+def gstreamer_pipeline(
+    capture_width=1920,
+    capture_height=1080,
+    display_width=960,
+    display_height=540,
+    framerate=30,
+    flip_method=0,
+):
+    """Uses gstreamer to talk to camera module
+
+    Args:
+        capture_width (int, optional): Width (in pixels) to capture feed. Defaults to 1920.
+        capture_height (int, optional): Height (in pixels) to capture feed. Defaults to 1080.
+        display_width (int, optional): Width (in pixels) to display feed. Defaults to 960.
+        display_height (int, optional): Height (in pixels) to display feed. Defaults to 540.
+        framerate (int, optional): Framerate (in fps) to display feed. Defaults to 30.
+        flip_method (int, optional): Argument for rotation of image capturing and displaying. Defaults to 0.
+
+    Returns:
+        string: The GStreamer pipeline description
+    """
+
+    return (
+        "nvarguscamerasrc ! "
+        "video/x-raw(memory:NVMM), "
+        "width=(int)%d, height=(int)%d, "
+        "format=(string)NV12, framerate=(fraction)%d/1 ! "
+        "nvvidconv flip-method=%d ! "
+        "video/x-raw, width=(int)%d, height=(int)%d, format=(string)BGRx ! "
+        "videoconvert ! "
+        "video/x-raw, format=(string)BGR ! appsink"
+        % (
+            capture_width,
+            capture_height,
+            framerate,
+            flip_method,
+            display_width,
+            display_height,
+        )
+    )
+
+
+class FrameSource:
+    """This is the base class for everything that provides frames. It follows the same read()/release() interface as
+    cv2.VideoCapture so that it can be used wherever a capture object is used.
+    """
+
+    def open(self):
+        """Opens the source. Must be called before reading frames.
+
+        Returns:
+            FrameSource: This source, so that it can be used as cap = source.open()
+        """
+
+        return self
+
+    def read(self):
+        """Reads the next frame
+
+        Returns:
+            tuple: Whether a frame was read, and the BGR frame (or None)
+        """
+
+        raise NotImplementedError
+
+    def release(self):
+        """Closes the source"""
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def __iter__(self):
+        """Iterates over every frame until the source runs out"""
+
+        while True:
+            ret, frame = self.read()
+            if not ret:
+                return
+            yield frame
+
+
+class VideoCaptureFrameSource(FrameSource):
+    """This class reads frames through cv2.VideoCapture"""
+
+    def __init__(self, capture_arg, api_preference=cv2.CAP_ANY):
+        """Initializer for the VideoCapture frame source
+
+        Args:
+            capture_arg (string/int): Anything that cv2.VideoCapture can open (file name, pipeline, or device index)
+            api_preference (int, optional): OpenCV capture backend. Defaults to cv2.CAP_ANY.
+        """
+
+        self.capture_arg = capture_arg
+        self.api_preference = api_preference
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.capture_arg, self.api_preference)
+        if not self.cap.isOpened():
+            raise IOError("Could not open {}".format(self.capture_arg))
+        return self
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class GStreamerFrameSource(VideoCaptureFrameSource):
+    """This class reads frames from the Jetson's CSI camera using GStreamer"""
+
+    def __init__(self, **pipeline_kwargs):
+        """Initializer for the GStreamer frame source
+
+        Args:
+            pipeline_kwargs: Keyword arguments for gstreamer_pipeline()
+        """
+
+        super().__init__(gstreamer_pipeline(**pipeline_kwargs), cv2.CAP_GSTREAMER)
+
+
+class VideoFileFrameSource(VideoCaptureFrameSource):
+    """This class reads frames from a video file as fast as they can be decoded"""
+
+    def __init__(self, file_path, loop=False):
+        """Initializer for the video file frame source
+
+        Args:
+            file_path (string): Location of the video file
+            loop (bool, optional): Whether to start over at the end of the video. Defaults to False.
+        """
+
+        super().__init__(str(file_path))
+        self.loop = loop
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            # Go back to the first frame
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+
+class ImageDirectoryFrameSource(FrameSource):
+    """This class reads frames from a directory of images in file name order.
+    Raw .npy frames are memory-mapped so they do not have to be decoded or copied, and encoded images
+    (.png, .jpg, etc.) are decoded straight out of a memory map of the file.
+    """
+
+    def __init__(self, directory, pattern="*", loop=False):
+        """Initializer for the image directory frame source
+
+        Args:
+            directory (string): Location of the directory
+            pattern (string, optional): Glob pattern of the images in the directory. Defaults to "*".
+            loop (bool, optional): Whether to start over after the last image. Defaults to False.
+        """
+
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.loop = loop
+        self.image_paths = []
+        self.index = 0
+
+    def open(self):
+        image_suffixes = {".npy", ".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+        self.image_paths = sorted(path for path in self.directory.glob(
+            self.pattern) if path.suffix.lower() in image_suffixes)
+        if not self.image_paths:
+            raise IOError("No images found in {}".format(self.directory))
+        self.index = 0
+        return self
+
+    def read(self):
+        if self.index == len(self.image_paths):
+            if not self.loop:
+                return False, None
+            self.index = 0
+
+        image_path = self.image_paths[self.index]
+        self.index += 1
+
+        return True, load_image(image_path)
+
+
+def load_image(image_path):
+    """Loads an image, memory-mapping it where possible
+
+    Args:
+        image_path (string): Location of the image (.npy or any format cv2.imdecode can read)
+
+    Returns:
+        numpy.ndarray: The BGR image
+    """
+
+    image_path = Path(image_path)
+
+    # Raw frames can be used straight from the page cache
+    if image_path.suffix.lower() == ".npy":
+        return np.load(str(image_path), mmap_mode="r")
+
+    with open(str(image_path), "rb") as image_file:
+        with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as image_map:
+            return cv2.imdecode(np.frombuffer(image_map, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+class SyntheticGoalFrameSource(FrameSource):
+    """This class renders an orange goal frame on a green field as if Ball-E were a known distance away from it.
+    The size of the goal follows the Triangle Similarity model that GoalDistanceCalculator uses, so the expected distance is known exactly.
+    """
+
+    def __init__(self, distance=180, focal_length=1000, lateral_offset=0, frame_size=(960, 540), num_frames=300,
+                 noise_sigma=0, framerate=None, seed=0):
+        """Initializer for the synthetic goal frame source
+
+        Args:
+            distance (float, optional): Distance of Ball-E from the Goal (in inches). Defaults to 180.
+            focal_length (float, optional): Focal length of the simulated camera (in pixels). Defaults to 1000.
+            lateral_offset (float, optional): How far the goal is to the right of the camera's center line (in inches). Defaults to 0.
+            frame_size (tuple, optional): Width and height of the frames (in pixels). Defaults to (960, 540).
+            num_frames (int, optional): Number of frames to render, or None to render forever. Defaults to 300.
+            noise_sigma (float, optional): Standard deviation of the Gaussian sensor noise. Defaults to 0.
+            framerate (float, optional): Frame rate (in fps) to pace the frames at, or None to go as fast as possible. Defaults to None.
+            seed (int, optional): Seed of the sensor noise. Defaults to 0.
+        """
+
+        # Lax Goal is 72 inches (i.e.: 6 ft) - it is also square.
+        self.lax_goal_length = 72
+
+        self.distance = distance
+        self.focal_length = focal_length
+        self.lateral_offset = lateral_offset
+        self.frame_size = frame_size
+        self.num_frames = num_frames
+        self.noise_sigma = noise_sigma
+        self.framerate = framerate
+        self.seed = seed
+
+        self.frames_read = 0
+        self.base_frame = None
+        self.corners = None
+        self.rng = None
+        self.last_frame_time = None
+
+    def open(self):
+        width, height = self.frame_size
+
+        # Pixels perceived = (Known object length * camera's focal length)/distance
+        goal_pixels = self.lax_goal_length*self.focal_length/self.distance
+        center_x = width/2 + self.lateral_offset*self.focal_length/self.distance
+        center_y = height/2
+
+        # Top Left, Top Right, Bottom Right, Bottom Left (the outer edge of the frame)
+        self.corners = [(center_x - goal_pixels/2, center_y - goal_pixels/2),
+                        (center_x + goal_pixels/2, center_y - goal_pixels/2),
+                        (center_x + goal_pixels/2, center_y + goal_pixels/2),
+                        (center_x - goal_pixels/2, center_y + goal_pixels/2)]
+
+        # Draw the goal frame just inside of its outer edge with sub-pixel precision
+        thickness = max(2, int(goal_pixels/40))
+        inner = np.array(self.corners) + \
+            np.array([(1, 1), (-1, 1), (-1, -1), (1, -1)])*thickness/2
+        shift = 4
+        self.base_frame = np.empty((height, width, 3), dtype=np.uint8)
+        self.base_frame[:] = (40, 120, 40)
+        cv2.polylines(self.base_frame, [np.round(inner*(1 << shift)).astype(np.int32)], True,
+                      (0, 128, 255), thickness, cv2.LINE_AA, shift)
+
+        self.frames_read = 0
+        self.rng = np.random.RandomState(self.seed)
+        self.last_frame_time = None
+
+        return self
+
+    def read(self):
+        if self.num_frames is not None and self.frames_read >= self.num_frames:
+            return False, None
+
+        # Wait until the next frame would be ready on a real camera
+        if self.framerate:
+            now = time.perf_counter()
+            if self.last_frame_time is not None:
+                time.sleep(max(0, self.last_frame_time +
+                           1/self.framerate - now))
+            self.last_frame_time = time.perf_counter()
+
+        frame = self.base_frame.copy()
+        if self.noise_sigma > 0:
+            noise = self.rng.normal(0, self.noise_sigma, frame.shape)
+            frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+        self.frames_read += 1
+
+        return True, frame
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    frame_source = SyntheticGoalFrameSource(distance=240, num_frames=100)
+
+    start_time = time.perf_counter()
+    with frame_source:
+        frames_read = sum(1 for _ in frame_source)
+    elapsed_time = time.perf_counter() - start_time
+
+    print("Read {} frames at {:.1f} fps\nExpected corners: {}".format(
+        frames_read, frames_read/elapsed_time, frame_source.corners))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -0,0 +1,309 @@
+"""
+goal_corner_detector.py
+---
+This file contains the GoalCornerDetector class, which automatically finds the four corners of the lacrosse goal's frame in a camera frame so that the user does not have to click on them
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+import pipeline_metrics
+from zone_grid import ZoneGrid
+
+# Names of the detection stages, in the order that they run
+DETECTION_STAGES = ("downsample", "preprocess", "mask",
+                    "contours", "quad_fit", "refine")
+
+
+class GoalCornerDetector:
+    """This class finds the goal frame using colour masking, picks the largest contour, and fits a quadrilateral to it.
+    The corners are returned in the same order as points_drawn: Top Left, Top Right, Bottom Right, Bottom Left
+
+    With pyramid levels, it runs coarse-to-fine: the goal is found in a frame downsampled by 2 for every level, and
+    only thin strips of the full resolution frame along the goal's sides are masked again to refine its corners.
+    """
+
+    def __init__(self, hsv_lower=(5, 120, 120), hsv_upper=(25, 255, 255), min_area_fraction=0.01, blur_size=5,
+                 pyramid_levels=0, refine_margin=None):
+        """Initializer for the goal corner detector
+
+        Args:
+            hsv_lower (tuple, optional): Lower HSV bound of the goal frame's colour. Defaults to orange.
+            hsv_upper (tuple, optional): Upper HSV bound of the goal frame's colour. Defaults to orange.
+            min_area_fraction (float, optional): Smallest fraction of the frame that the goal can take up. Defaults to 0.01.
+            blur_size (int, optional): Size of the Gaussian blur kernel (in pixels, odd). Defaults to 5.
+            pyramid_levels (int, optional): Number of times to halve the frame before finding the goal, or 0 to find it at full resolution. Defaults to 0.
+            refine_margin (int, optional): Half the width of the strips refined at full resolution (in pixels). Defaults to 4 pixels of the downsampled frame plus the blur size.
+        """
+
+        self.hsv_lower = np.array(hsv_lower, dtype=np.uint8)
+        self.hsv_upper = np.array(hsv_upper, dtype=np.uint8)
+        self.min_area_fraction = min_area_fraction
+        self.blur_size = blur_size
+        self.pyramid_levels = pyramid_levels
+        self.refine_margin = refine_margin if refine_margin is not None else 4*2**pyramid_levels + blur_size
+
+        # Closes small gaps in the mask, such as where the net hangs over the frame
+        self.morph_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+
+        # Time (in seconds) each stage took on the latest frame and in total across all frames
+        self.stage_times = OrderedDict((stage, 0.0)
+                                       for stage in DETECTION_STAGES)
+        self.total_stage_times = OrderedDict(
+            (stage, 0.0) for stage in DETECTION_STAGES)
+        self.frames_processed = 0
+
+    def detect(self, frame):
+        """Finds the goal's corners in a BGR frame
+
+        Args:
+            frame (numpy.ndarray): BGR image from the camera
+
+        Returns:
+            list: Four (x,y) tuples in Top Left, Top Right, Bottom Right, Bottom Left order, or None if no goal was found
+        """
+
+        stage_start = time.perf_counter()
+
+        # 0. Find the goal in a smaller image first, if coarse-to-fine
+        scale = 2**self.pyramid_levels
+        image = frame
+        # Halving one level at a time averages 2x2 blocks, which is much faster than one larger INTER_AREA resize
+        for _ in range(self.pyramid_levels):
+            image = cv2.resize(image, (image.shape[1]//2, image.shape[0]//2),
+                               interpolation=cv2.INTER_AREA)
+        stage_start = self._record_stage("downsample", stage_start)
+
+        corners, stage_start = self._find_goal(image, stage_start)
+
+        # Map the corners back to the full resolution frame and refine them there
+        if corners is not None and scale > 1:
+            corners = [((x + 0.5)*scale - 0.5, (y + 0.5)*scale - 0.5)
+                       for x, y in corners]
+            refined_corners = self.refine_corners(frame, corners)
+            if refined_corners is not None:
+                corners = refined_corners
+        self._record_stage("refine", stage_start)
+
+        self.frames_processed += 1
+
+        return corners
+
+    def _find_goal(self, image, stage_start):
+        """Runs the colour mask, contour, and quadrilateral stages on a whole image
+
+        Args:
+            image (numpy.ndarray): BGR image
+            stage_start (float): Time (from time.perf_counter) when the first stage started
+
+        Returns:
+            tuple: The corners (or None if no goal was found) and the time the last stage ended
+        """
+
+        # 1. Smooth out sensor noise and convert to HSV so the colour is independent of brightness
+        blurred = cv2.GaussianBlur(image, (self.blur_size, self.blur_size), 0)
+        hsv = cv2.cvtColor(blurred, cv2.COLOR_BGR2HSV)
+        stage_start = self._record_stage("preprocess", stage_start)
+
+        # 2. Keep only the pixels that are the colour of the goal frame
+        mask = cv2.inRange(hsv, self.hsv_lower, self.hsv_upper)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self.morph_kernel)
+        stage_start = self._record_stage("mask", stage_start)
+
+        # 3. The goal frame is the largest outer contour
+        contours = cv2.findContours(
+            mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+        goal_contour = max(contours, key=cv2.contourArea) if contours else None
+        stage_start = self._record_stage("contours", stage_start)
+
+        # 4. Fit a quadrilateral to the goal frame
+        corners = None
+        min_area = self.min_area_fraction*image.shape[0]*image.shape[1]
+        if goal_contour is not None and cv2.contourArea(goal_contour) >= min_area:
+            corners = self.fit_quadrilateral(goal_contour)
+        stage_start = self._record_stage("quad_fit", stage_start)
+
+        return corners, stage_start
+
+    def refine_corners(self, frame, corners):
+        """Finds the goal's corners again at full resolution, looking only in strips along the sides of the coarse goal
+
+        Args:
+            frame (numpy.ndarray): Full resolution BGR image from the camera
+            corners (list): Coarse corners in full resolution coordinates, in Top Left, Top Right, Bottom Right, Bottom Left order
+
+        Returns:
+            list: Four (x,y) tuples in Top Left, Top Right, Bottom Right, Bottom Left order, or None if no quadrilateral fits
+        """
+
+        frame_height, frame_width = frame.shape[:2]
+        corners = np.asarray(corners, dtype=float)
+
+        # Region of interest around the whole goal
+        x_start, y_start = np.maximum(
+            np.floor(corners.min(axis=0) - self.refine_margin), 0).astype(int)
+        x_end = int(min(frame_width, np.ceil(
+            corners[:, 0].max() + self.refine_margin) + 1))
+        y_end = int(min(frame_height, np.ceil(
+            corners[:, 1].max() + self.refine_margin) + 1))
+        if x_end <= x_start or y_end <= y_start:
+            return None
+        mask = np.zeros((y_end - y_start, x_end - x_start), dtype=np.uint8)
+
+        # Only the strips along each side are masked, which is where the goal frame's outer edge is
+        for start, end in zip(corners, np.roll(corners, -1, axis=0)):
+            strip_x_start, strip_y_start = np.maximum(np.floor(np.minimum(
+                start, end) - self.refine_margin).astype(int), (x_start, y_start))
+            strip_x_end, strip_y_end = np.minimum(np.ceil(np.maximum(
+                start, end) + self.refine_margin).astype(int) + 1, (x_end, y_end))
+            strip = frame[strip_y_start:strip_y_end,
+                          strip_x_start:strip_x_end]
+            hsv = cv2.cvtColor(cv2.GaussianBlur(
+                strip, (self.blur_size, self.blur_size), 0), cv2.COLOR_BGR2HSV)
+            mask[strip_y_start - y_start:strip_y_end - y_start, strip_x_start - x_start:strip_x_end - x_start] |= cv2.morphologyEx(
+                cv2.inRange(hsv, self.hsv_lower, self.hsv_upper), cv2.MORPH_CLOSE, self.morph_kernel)
+
+        contours = cv2.findContours(
+            mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+        if not contours:
+            return None
+        refined_corners = self.fit_quadrilateral(
+            max(contours, key=cv2.contourArea))
+        if refined_corners is None:
+            return None
+
+        return [(x + int(x_start), y + int(y_start)) for x, y in refined_corners]
+
+    def fit_quadrilateral(self, contour):
+        """Fits a quadrilateral to a contour
+
+        Args:
+            contour (numpy.ndarray): Contour of the goal frame
+
+        Returns:
+            list: Four (x,y) tuples in Top Left, Top Right, Bottom Right, Bottom Left order, or None if no quadrilateral fits
+        """
+
+        hull = cv2.convexHull(contour)
+        perimeter = cv2.arcLength(hull, True)
+
+        # Loosen the approximation until only four corners are left
+        for epsilon_fraction in (0.01, 0.02, 0.04, 0.08):
+            approx = cv2.approxPolyDP(hull, epsilon_fraction*perimeter, True)
+            if len(approx) == 4:
+                return order_corners(approx.reshape(4, 2))
+
+        return None
+
+    def _record_stage(self, stage, stage_start):
+        """Records how long a stage took
+
+        Args:
+            stage (string): Name of the stage
+            stage_start (float): Time (from time.perf_counter) when the stage started
+
+        Returns:
+            float: Time when the stage ended, which is when the next stage starts
+        """
+
+        stage_end = time.perf_counter()
+        self.stage_times[stage] = stage_end - stage_start
+        self.total_stage_times[stage] += stage_end - stage_start
+        pipeline_metrics.observe("detector." + stage,
+                                 (stage_end - stage_start)*1000)
+
+        return stage_end
+
+    def timing_summary(self):
+        """Average time each stage takes per frame
+
+        Returns:
+            OrderedDict: Average time (in ms) per stage, along with the total and the frame rate (in fps) it can keep up with
+        """
+
+        frames = max(self.frames_processed, 1)
+        summary = OrderedDict((stage, 1000*total/frames)
+                              for stage, total in self.total_stage_times.items())
+        summary["total"] = sum(summary.values())
+        summary["fps"] = 1000/summary["total"] if summary["total"] > 0 else 0.0
+
+        return summary
+
+
+def order_corners(points):
+    """Orders four points in the same order as points_drawn
+
+    Args:
+        points (array_like): Four (x,y) points in any order
+
+    Returns:
+        list: Four (x,y) tuples in Top Left, Top Right, Bottom Right, Bottom Left order
+    """
+
+    points = np.asarray(points, dtype=float).reshape(4, 2)
+    coord_sum = points.sum(axis=1)
+    coord_diff = points[:, 1] - points[:, 0]
+
+    # Top Left has the smallest x+y, Bottom Right the largest, Top Right the smallest y-x, and Bottom Left the largest
+    ordered = (points[np.argmin(coord_sum)], points[np.argmin(coord_diff)],
+               points[np.argmax(coord_sum)], points[np.argmax(coord_diff)])
+
+    return [(float(x), float(y)) for x, y in ordered]
+
+
+def draw_goal_overlay(frame, corners, color=(0, 255, 0), thickness=3, grid_rows=3, grid_cols=3):
+    """Draws the goal's perimeter and its grid of sections on a frame, the same way the calibration screen does
+
+    Args:
+        frame (numpy.ndarray): BGR image to draw on (modified in place)
+        corners (list): Four (x,y) tuples in Top Left, Top Right, Bottom Right, Bottom Left order
+        color (tuple, optional): BGR colour of the lines. Defaults to green.
+        thickness (int, optional): Thickness of the lines (in pixels). Defaults to 3.
+        grid_rows (int, optional): Number of rows of sections. Defaults to 3.
+        grid_cols (int, optional): Number of columns of sections. Defaults to 3.
+
+    Returns:
+        numpy.ndarray: The frame that was drawn on
+    """
+
+    zone_grid = ZoneGrid(corners, grid_rows, grid_cols)
+
+    # Perimeter
+    cv2.polylines(frame, [np.round(zone_grid.corners).astype(np.int32)],
+                  True, color, thickness)
+    # Perspective-correct latitudes and longitudes
+    cv2.polylines(frame, [np.round(np.array(line)).astype(np.int32)
+                          for line in zone_grid.grid_lines()], False, color, thickness)
+
+    return frame
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    # Draw an orange goal frame on a green field
+    frame = np.zeros((540, 960, 3), dtype=np.uint8)
+    frame[:] = (40, 120, 40)
+    goal = np.array([(330, 120), (640, 130), (630, 430), (340, 420)], dtype=np.int32)
+    cv2.polylines(frame, [goal], True, (0, 128, 255), 8)
+
+    detector = GoalCornerDetector()
+    for _ in range(100):
+        corners = detector.detect(frame)
+
+    print("Corners: {}".format(corners))
+    for stage, value in detector.timing_summary().items():
+        print("{}: {:.3f}".format(stage, value))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -6,28 +6,44 @@ This file contains the GoalDistanceCalculator class, which is used for calculati
 
 Author: Andrei Biswas (@codeabiswas)
 Date: May 4, 2021
-Last Modified: May 04, 2021
+Last Modified: Oct 17, 2026
 """
 
 import math
 
+import cv2
+import numpy as np
+
+import pipeline_metrics
+from calibration_store import (DEFAULT_CAMERA_ID, DEFAULT_RESOLUTION,
+                               load_focal_length)
+
 
 class GoalDistanceCalculator:
     """This helper class uses the Triangle Similarity algorithm to find the distance between the goal and Ball-E
     """
 
-    def __init__(self, points_drawn):
+    def __init__(self, points_drawn, calibration_store=None, camera_id=DEFAULT_CAMERA_ID, resolution=DEFAULT_RESOLUTION,
+                 undistorter=None):
         """Initializer for the distance finder between Ball-E and the Goal
 
         Args:
             points_drawn ([list]): List of tuples including (x,y) coordinates containing the user selected points on the picture
+            calibration_store ([CalibrationStore], optional): Store to load the focal length from. Defaults to the default store.
+            camera_id ([string], optional): Name of the camera the picture was taken with. Defaults to DEFAULT_CAMERA_ID.
+            resolution ([tuple], optional): Width and height (in pixels) of the picture. Defaults to DEFAULT_RESOLUTION.
+            undistorter ([LensUndistorter], optional): Removes the lens distortion from the points (refine_corners() then needs an undistorted picture). Defaults to None.
         """
 
         # Lax Goal is 72 inches (i.e.: 6 ft) - it is also square.
         self.lax_goal_length = 72
 
         # Focal length of the camera
-        self.focal_length = 10
+        # NOTE: This is loaded from the calibration store the first time it is used (see the focal_length property)
+        self._focal_length = None
+        self.calibration_store = calibration_store
+        self.camera_id = camera_id
+        self.resolution = resolution
 
         # Collection of the four points that user drew on the picture
         # NOTE: This list will always include points (tuples in (x,y)) in the following order:
@@ -35,8 +51,24 @@ class GoalDistanceCalculator:
         # 2. Top Right
         # 3. Bottom Right
         # 4. Bottom Left
-        self.points_drawn = points_drawn
+        # NOTE: Lens distortion bends the sides of the goal, so the points are undistorted first if possible
+        self.points_drawn = undistorter.undistort_points(
+            points_drawn) if undistorter is not None else points_drawn
+
+    @property
+    def focal_length(self):
+        """Focal length of the camera (in pixels), which is 10 if the camera has not been calibrated"""
+
+        if self._focal_length is None:
+            self._focal_length = load_focal_length(
+                self.calibration_store, self.camera_id, self.resolution)
+        return self._focal_length
 
+    @focal_length.setter
+    def focal_length(self, focal_length):
+        self._focal_length = focal_length
+
+    @pipeline_metrics.timed("goal_distance.get_obj_distance")
     def get_obj_distance(self):
         """Distance from Ball-E to goal calculator
 
@@ -51,6 +83,80 @@ class GoalDistanceCalculator:
         # New distance = (Known object distance * camera's focal length)/pixels perceived
         return (self.lax_goal_length * self.focal_length)/pixels_perceived
 
+    @pipeline_metrics.timed("goal_distance.refine_corners")
+    def refine_corners(self, image, window_size=5, max_iterations=30, epsilon=0.01):
+        """Refines the points drawn to sub-pixel accuracy by searching for the actual corner around each point
+
+        Args:
+            image (numpy.ndarray): BGR or grayscale image the points were drawn on
+            window_size (int, optional): Half of the side length of the search window (in pixels). Defaults to 5.
+            max_iterations (int, optional): Most iterations of the search per corner. Defaults to 30.
+            epsilon (float, optional): Movement (in pixels) below which the search stops. Defaults to 0.01.
+
+        Returns:
+            [list]: The refined points, which also replace points_drawn
+        """
+
+        gray_image = cv2.cvtColor(
+            image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        corners = np.array(self.points_drawn, dtype=np.float32).reshape(-1, 1, 2)
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER,
+                    max_iterations, epsilon)
+
+        corners = cv2.cornerSubPix(
+            gray_image, corners, (window_size, window_size), (-1, -1), criteria)
+
+        self.points_drawn = [(float(x), float(y))
+                             for x, y in corners.reshape(-1, 2)]
+
+        return self.points_drawn
+
+    @pipeline_metrics.timed("goal_distance.get_obj_distance_estimate")
+    def get_obj_distance_estimate(self, outlier_threshold=3.0, min_relative_std=0.005):
+        """Distance from Ball-E to goal using all four sides and both diagonals of the goal instead of only the bottom side
+
+        Every side and diagonal gives its own Triangle Similarity estimate. Estimates further than outlier_threshold
+        robust standard deviations (from the median absolute deviation) from the median are rejected, and the rest are averaged.
+
+        Args:
+            outlier_threshold (float, optional): How many robust standard deviations away an estimate can be before it is rejected. Defaults to 3.0.
+            min_relative_std (float, optional): Smallest robust standard deviation, as a fraction of the median, so that identical estimates do not turn off rejection. Defaults to 0.005.
+
+        Returns:
+            [tuple]: Distance from Ball-E to goal in inches, and its uncertainty (standard error, in inches)
+        """
+
+        top_left, top_right, bottom_right, bottom_left = [
+            np.asarray(point, dtype=float) for point in self.points_drawn]
+
+        # Pairs of points and the real length (in inches) of the line between them
+        diagonal_length = self.lax_goal_length*math.sqrt(2)
+        lines = [(top_left, top_right, self.lax_goal_length),
+                 (top_right, bottom_right, self.lax_goal_length),
+                 (bottom_right, bottom_left, self.lax_goal_length),
+                 (bottom_left, top_left, self.lax_goal_length),
+                 (top_left, bottom_right, diagonal_length),
+                 (top_right, bottom_left, diagonal_length)]
+
+        # New distance = (Known object distance * camera's focal length)/pixels perceived
+        estimates = np.array([(known_length * self.focal_length)/np.linalg.norm(end - start)
+                              for start, end, known_length in lines])
+
+        # Reject outliers using the median absolute deviation, which the outliers themselves cannot skew
+        median = np.median(estimates)
+        # NOTE: When more than half of the estimates agree exactly the deviation is 0, which is when a wild estimate most
+        # needs rejecting, so it is never allowed below a small fraction of the median
+        robust_std = max(1.4826*np.median(np.abs(estimates - median)),
+                         min_relative_std*abs(median))
+        inliers = estimates[np.abs(estimates - median) <=
+                            outlier_threshold*robust_std]
+
+        distance = float(inliers.mean())
+        uncertainty = float(inliers.std(ddof=1)/math.sqrt(len(inliers))
+                            ) if len(inliers) > 1 else 0.0
+
+        return distance, uncertainty
+
 
 def main():
     """Main prototype/testing area. Code prototyping and checking happens here."""
@@ -59,6 +165,18 @@ def main():
 
     print(distance_finder.get_obj_distance())
 
+    # A slightly skewed goal, where the bottom side alone would be misleading
+    distance_finder = GoalDistanceCalculator(
+        [(100, 100), (400, 102), (401, 400), (99, 403)])
+    print("Distance: {} in. +/- {} in.".format(*distance_finder.get_obj_distance_estimate()))
+
+    # A perfect square except for Bottom Left, which is swung 20 degrees around Top Left so that only the bottom side and
+    # one diagonal are wrong. The other four estimates agree exactly.
+    distance_finder = GoalDistanceCalculator(
+        [(100, 100), (400, 100), (400, 400), (100 + 300*math.sin(math.radians(20)), 100 + 300*math.cos(math.radians(20)))])
+    distance_finder.focal_length = 1000
+    print("Distance with one bad corner: {} in. +/- {} in.".format(*distance_finder.get_obj_distance_estimate()))
+
 
 if __name__ == "__main__":
     # Run the main function
@@ -0,0 +1,165 @@
+"""
+goal_pose_estimator.py
+---
+This file contains the GoalPoseEstimator class, which recovers where the lacrosse goal is relative to Ball-E (distance, lateral offset, and bearing) from the four corners of the goal, even when Ball-E is not facing the goal head-on
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import math
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from trajectory_algorithm import TrajectoryAlgorithm
+
+# Where the goal is relative to the camera. All distances are in inches and all angles are in degrees.
+# distance: Straight-line distance from the camera to the center of the goal
+# forward_distance: Distance along the camera's center line to the center of the goal
+# lateral_offset: How far the center of the goal is to the right of the camera's center line (negative to the left)
+# bearing: Angle from the camera's center line to the center of the goal (positive to the right)
+# goal_yaw: Angle the face of the goal is turned away from the camera
+# reprojection_error: Mean distance (in pixels) between the corners and the corners predicted by the pose
+GoalPose = namedtuple("GoalPose", ["distance", "forward_distance", "lateral_offset",
+                                   "bearing", "goal_yaw", "reprojection_error", "rvec", "tvec"])
+
+
+class GoalPoseEstimator:
+    """This class uses the known geometry of the goal (a 72 inch square) and the camera's intrinsics to solve for the
+    goal's full pose with solvePnP, instead of assuming the goal faces the camera like Triangle Similarity does
+    """
+
+    def __init__(self, focal_length=None, image_size=(960, 540), camera_matrix=None, dist_coeffs=None):
+        """Initializer for the goal pose estimator
+
+        Args:
+            focal_length (float, optional): Focal length of the camera (in pixels), used when there is no camera matrix. Defaults to None.
+            image_size (tuple, optional): Width and height of the image (in pixels), used when there is no camera matrix. Defaults to (960, 540).
+            camera_matrix (numpy.ndarray, optional): 3x3 intrinsic matrix of the camera. Defaults to None.
+            dist_coeffs (numpy.ndarray, optional): Lens distortion coefficients of the camera. Defaults to None.
+
+        Raises:
+            ValueError: If neither the focal length nor the camera matrix is given
+        """
+
+        # Lax Goal is 72 inches (i.e.: 6 ft) - it is also square.
+        self.lax_goal_length = 72
+
+        if camera_matrix is None:
+            if focal_length is None:
+                raise ValueError(
+                    "Either the focal length or the camera matrix is required")
+            # Assume square pixels and the principal point in the middle of the image
+            camera_matrix = np.array([[focal_length, 0, image_size[0]/2],
+                                      [0, focal_length, image_size[1]/2],
+                                      [0, 0, 1]], dtype=np.float64)
+
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64)
+        self.dist_coeffs = np.zeros(5) if dist_coeffs is None else np.asarray(
+            dist_coeffs, dtype=np.float64)
+
+        # Corners of the goal in the goal's own frame, in the same order and orientation as points_drawn:
+        # Top Left, Top Right, Bottom Right, Bottom Left, with x to the right and y down like the image
+        half_length = self.lax_goal_length/2
+        self.goal_points = np.array([[-half_length, -half_length, 0],
+                                     [half_length, -half_length, 0],
+                                     [half_length, half_length, 0],
+                                     [-half_length, half_length, 0]], dtype=np.float64)
+        # SOLVEPNP_IPPE_SQUARE requires the corners at (-h, h), (h, h), (h, -h), (-h, -h), which is
+        # Bottom Left, Bottom Right, Top Right, Top Left in the goal's frame
+        self.ippe_square_order = [3, 2, 1, 0]
+
+    def estimate(self, points_drawn):
+        """Estimates the pose of the goal
+
+        Args:
+            points_drawn (list): Four (x,y) tuples in Top Left, Top Right, Bottom Right, Bottom Left order
+
+        Returns:
+            GoalPose: Pose of the goal, or None if it could not be solved
+        """
+
+        image_points = np.array(points_drawn, dtype=np.float64).reshape(4, 2)
+
+        solved, rvec, tvec = cv2.solvePnP(self.goal_points[self.ippe_square_order], image_points[self.ippe_square_order],
+                                          self.camera_matrix, self.dist_coeffs, flags=cv2.SOLVEPNP_IPPE_SQUARE)
+        if not solved:
+            return None
+
+        projected_points = cv2.projectPoints(
+            self.goal_points, rvec, tvec, self.camera_matrix, self.dist_coeffs)[0]
+        reprojection_error = float(np.linalg.norm(
+            projected_points.reshape(4, 2) - image_points, axis=1).mean())
+
+        # The camera looks down its z axis and x is to the right
+        lateral_offset, _, forward_distance = tvec.ravel()
+        rotation_matrix = cv2.Rodrigues(rvec)[0]
+        goal_normal = rotation_matrix[:, 2]
+
+        return GoalPose(distance=float(np.linalg.norm(tvec)),
+                        forward_distance=float(forward_distance),
+                        lateral_offset=float(lateral_offset),
+                        bearing=math.degrees(math.atan2(
+                            lateral_offset, forward_distance)),
+                        goal_yaw=math.degrees(math.atan2(
+                            goal_normal[0], abs(goal_normal[2]))),
+                        reprojection_error=reprojection_error,
+                        rvec=rvec,
+                        tvec=tvec)
+
+    def trajectory_algorithm(self, points_drawn):
+        """Creates the TrajectoryAlgorithm for where the goal is, so that one frame gives both the range and the bearing
+
+        Args:
+            points_drawn (list): Four (x,y) tuples in Top Left, Top Right, Bottom Right, Bottom Left order
+
+        Returns:
+            TrajectoryAlgorithm: Trajectory algorithm for the goal's pose, or None if it could not be solved
+        """
+
+        pose = self.estimate(points_drawn)
+        if pose is None:
+            return None
+
+        # The trajectory algorithm works in feet
+        return TrajectoryAlgorithm(pose.forward_distance/12, lateral_offset=pose.lateral_offset/12)
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    pose_estimator = GoalPoseEstimator(focal_length=1000)
+
+    # Goal 20 ft. away and 3 ft. to the right, turned 20 degrees away from the camera. The corners are built in image
+    # order (y down) independently of goal_points, so a mirrored model of the goal would show up here.
+    half_length = pose_estimator.lax_goal_length/2
+    goal_corners = np.array([[-half_length, -half_length, 0], [half_length, -half_length, 0],
+                             [half_length, half_length, 0], [-half_length, half_length, 0]])
+    goal_yaw = math.radians(20)
+    rotation = np.array([[math.cos(goal_yaw), 0, math.sin(goal_yaw)],
+                         [0, 1, 0],
+                         [-math.sin(goal_yaw), 0, math.cos(goal_yaw)]])
+    camera_points = goal_corners.dot(rotation.T) + np.array([36.0, 0, 240.0])
+    points_drawn = camera_points[:, :2]/camera_points[:, 2:]*1000 + \
+        pose_estimator.camera_matrix[:2, 2]
+
+    # Top Left must be above and to the left of Bottom Right in the image
+    assert points_drawn[0][0] < points_drawn[2][0] and points_drawn[0][1] < points_drawn[2][1]
+    pose = pose_estimator.estimate(points_drawn)
+    print(pose[:6])
+    print("Actual: distance={:.2f}, lateral_offset=36.0, goal_yaw=20.0".format(
+        math.hypot(36.0, 240.0)))
+
+    trajectory_alg = pose_estimator.trajectory_algorithm(points_drawn)
+    for shot_loc in ["TL", "TM", "TR", "CL", "CM", "CR", "BL", "BM", "BR"]:
+        print("For {}:\nYaw={}\nPitch={}\n".format(shot_loc, trajectory_alg.calc_yaw(
+            shot_loc), trajectory_alg.calc_pitch(shot_loc)))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -0,0 +1,299 @@
+"""
+goal_tracker.py
+---
+This file contains the AlphaBetaFilter and GoalTracker classes, which carry the goal's corners and distance from frame to frame so that live video gives smooth distance estimates without running a full detection on every frame
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import time
+
+import numpy as np
+
+from calibration_store import DEFAULT_CAMERA_ID, DEFAULT_RESOLUTION
+from frame_source import SyntheticGoalFrameSource
+from goal_corner_detector import GoalCornerDetector
+from goal_distance_calculator import GoalDistanceCalculator
+
+
+class AlphaBetaFilter:
+    """This class is an alpha-beta filter, which is a steady-state Kalman filter for a constant velocity model.
+    It works on scalars or NumPy arrays of any shape.
+    """
+
+    def __init__(self, alpha=0.5, beta=0.1):
+        """Initializer for the alpha-beta filter
+
+        Args:
+            alpha (float, optional): How much of the position error is corrected each update (0 to 1). Defaults to 0.5.
+            beta (float, optional): How much of the position error is used to correct the velocity (0 to 2). Defaults to 0.1.
+        """
+
+        self.alpha = alpha
+        self.beta = beta
+        self.position = None
+        self.velocity = None
+
+    @property
+    def initialized(self):
+        """Whether the filter has had its first measurement"""
+
+        return self.position is not None
+
+    def reset(self, position=None):
+        """Restarts the filter
+
+        Args:
+            position (array_like, optional): Position to restart at, with no velocity. Defaults to having no position.
+        """
+
+        if position is None:
+            self.position = None
+            self.velocity = None
+        else:
+            self.position = np.array(position, dtype=float)
+            self.velocity = np.zeros_like(self.position)
+
+    def predict(self, dt):
+        """Predicts where the position will be
+
+        Args:
+            dt (float): Time since the last update (in seconds)
+
+        Returns:
+            numpy.ndarray: The predicted position
+        """
+
+        return self.position + self.velocity*dt
+
+    def update(self, measurement, dt):
+        """Corrects the filter with a new measurement
+
+        Args:
+            measurement (array_like): Measured position
+            dt (float): Time since the last update (in seconds)
+
+        Returns:
+            numpy.ndarray: The filtered position
+        """
+
+        if not self.initialized:
+            self.reset(measurement)
+            return self.position
+
+        predicted_position = self.predict(dt)
+        residual = np.asarray(measurement, dtype=float) - predicted_position
+
+        self.position = predicted_position + self.alpha*residual
+        if dt > 0:
+            self.velocity = self.velocity + (self.beta/dt)*residual
+
+        return self.position
+
+    def coast(self, dt):
+        """Moves the filter forward in time without a measurement
+
+        Args:
+            dt (float): Time since the last update (in seconds)
+
+        Returns:
+            numpy.ndarray: The predicted position
+        """
+
+        self.position = self.predict(dt)
+
+        return self.position
+
+
+class GoalTracker:
+    """This class tracks the goal's corners across frames. Between full detections, the goal is only searched for
+    in a small region of interest around where its corners are predicted to be. Both the corners and the distance are
+    smoothed with alpha-beta filters, which also give the distance's velocity.
+    """
+
+    def __init__(self, focal_length=None, detector=None, redetect_interval=30, roi_margin=0.25, max_misses=5,
+                 corner_alpha=0.6, corner_beta=0.1, distance_alpha=0.3, distance_beta=0.05, calibration_store=None,
+                 camera_id=DEFAULT_CAMERA_ID, resolution=DEFAULT_RESOLUTION):
+        """Initializer for the goal tracker
+
+        Args:
+            focal_length (float, optional): Focal length of the camera (in pixels) used for the distance. Defaults to the calibrated focal length.
+            detector (GoalCornerDetector, optional): Detector of the goal's corners. Defaults to a new GoalCornerDetector.
+            redetect_interval (int, optional): Number of frames between full-frame detections. Defaults to 30.
+            roi_margin (float, optional): Margin around the predicted goal to search, as a fraction of the goal's size. Defaults to 0.25.
+            max_misses (int, optional): Number of frames in a row the goal can be missing before the track is dropped. Defaults to 5.
+            corner_alpha (float, optional): Alpha of the corner filter. Defaults to 0.6.
+            corner_beta (float, optional): Beta of the corner filter. Defaults to 0.1.
+            distance_alpha (float, optional): Alpha of the distance filter. Defaults to 0.3.
+            distance_beta (float, optional): Beta of the distance filter. Defaults to 0.05.
+            calibration_store (CalibrationStore, optional): Store to load the focal length from. Defaults to the default store.
+            camera_id (string, optional): Name of the camera the frames come from. Defaults to DEFAULT_CAMERA_ID.
+            resolution (tuple, optional): Width and height (in pixels) of the frames. Defaults to DEFAULT_RESOLUTION.
+        """
+
+        self.focal_length = focal_length
+        self.calibration_store = calibration_store
+        self.camera_id = camera_id
+        self.resolution = resolution
+        self.detector = detector if detector is not None else GoalCornerDetector()
+        self.redetect_interval = redetect_interval
+        self.roi_margin = roi_margin
+        self.max_misses = max_misses
+
+        self.corner_filter = AlphaBetaFilter(corner_alpha, corner_beta)
+        self.distance_filter = AlphaBetaFilter(distance_alpha, distance_beta)
+
+        self.last_timestamp = None
+        self.frames_since_detection = 0
+        self.misses = 0
+
+        # Counters for how often each kind of search was used
+        self.full_detections = 0
+        self.roi_detections = 0
+
+    @property
+    def tracking(self):
+        """Whether the goal is currently being tracked"""
+
+        return self.corner_filter.initialized
+
+    @property
+    def corners(self):
+        """Smoothed corners in Top Left, Top Right, Bottom Right, Bottom Left order, or None if the goal is not being tracked"""
+
+        if not self.tracking:
+            return None
+        return [(float(x), float(y)) for x, y in self.corner_filter.position]
+
+    @property
+    def distance(self):
+        """Smoothed distance from Ball-E to goal in inches, or None if the goal is not being tracked"""
+
+        if not self.distance_filter.initialized:
+            return None
+        return float(self.distance_filter.position)
+
+    @property
+    def distance_velocity(self):
+        """How fast the distance from Ball-E to goal is changing in inches per second, or None if the goal is not being tracked"""
+
+        if not self.distance_filter.initialized:
+            return None
+        return float(self.distance_filter.velocity)
+
+    def reset(self):
+        """Drops the track so that the next frame runs a full detection"""
+
+        self.corner_filter.reset()
+        self.distance_filter.reset()
+        self.frames_since_detection = 0
+        self.misses = 0
+
+    def update(self, frame, timestamp=None):
+        """Tracks the goal in a new frame
+
+        Args:
+            frame (numpy.ndarray): BGR image from the camera
+            timestamp (float, optional): Time the frame was captured (in seconds). Defaults to now.
+
+        Returns:
+            list: Smoothed corners in Top Left, Top Right, Bottom Right, Bottom Left order, or None if the goal is not being tracked
+        """
+
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        dt = timestamp - self.last_timestamp if self.last_timestamp is not None else 0.0
+        self.last_timestamp = timestamp
+
+        measured_corners = None
+
+        # Only search around where the goal should be, unless it is time for a full detection
+        if self.tracking and self.frames_since_detection < self.redetect_interval:
+            measured_corners = self.detect_in_roi(
+                frame, self.corner_filter.predict(dt))
+            if measured_corners is not None:
+                self.roi_detections += 1
+
+        if measured_corners is None:
+            measured_corners = self.detector.detect(frame)
+            self.frames_since_detection = 0
+            if measured_corners is not None:
+                self.full_detections += 1
+        else:
+            self.frames_since_detection += 1
+
+        if measured_corners is None:
+            self.misses += 1
+            if self.misses > self.max_misses:
+                self.reset()
+            elif self.tracking:
+                self.corner_filter.coast(dt)
+                self.distance_filter.coast(dt)
+            return self.corners
+
+        self.misses = 0
+        self.corner_filter.update(measured_corners, dt)
+
+        # New distance = (Known object distance * camera's focal length)/pixels perceived
+        distance_calculator = GoalDistanceCalculator(
+            measured_corners, self.calibration_store, self.camera_id, self.resolution)
+        # NOTE: Without a focal length, the calculator loads the calibrated one from the store
+        if self.focal_length is not None:
+            distance_calculator.focal_length = self.focal_length
+        self.distance_filter.update(
+            distance_calculator.get_obj_distance(), dt)
+
+        return self.corners
+
+    def detect_in_roi(self, frame, predicted_corners):
+        """Searches for the goal only in the region around where its corners are predicted to be
+
+        Args:
+            frame (numpy.ndarray): BGR image from the camera
+            predicted_corners (numpy.ndarray): Predicted corners with shape (4, 2)
+
+        Returns:
+            list: Four (x,y) tuples in full frame coordinates, or None if the goal was not found
+        """
+
+        frame_height, frame_width = frame.shape[:2]
+        top_left = predicted_corners.min(axis=0)
+        bottom_right = predicted_corners.max(axis=0)
+        margin = self.roi_margin*(bottom_right - top_left).max()
+
+        x_start = int(max(0, top_left[0] - margin))
+        y_start = int(max(0, top_left[1] - margin))
+        x_end = int(min(frame_width, bottom_right[0] + margin + 1))
+        y_end = int(min(frame_height, bottom_right[1] + margin + 1))
+        if x_end <= x_start or y_end <= y_start:
+            return None
+
+        corners = self.detector.detect(frame[y_start:y_end, x_start:x_end])
+        if corners is None:
+            return None
+
+        return [(x + x_start, y + y_start) for x, y in corners]
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    goal_tracker = GoalTracker(focal_length=1000)
+
+    # Ball-E backing away from the goal at 12 in/s, filmed at 30 fps
+    for frame_number in range(90):
+        distance = 180 + 12*frame_number/30
+        frame_source = SyntheticGoalFrameSource(
+            distance=distance, num_frames=1, noise_sigma=3, seed=frame_number).open()
+        goal_tracker.update(frame_source.read()[1], frame_number/30)
+
+    print("Distance: {:.1f} in. (actual {:.1f} in.)\nVelocity: {:.1f} in/s\nFull detections: {}\nROI detections: {}".format(
+        goal_tracker.distance, distance, goal_tracker.distance_velocity, goal_tracker.full_detections, goal_tracker.roi_detections))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -0,0 +1,273 @@
+"""
+lens_undistortion.py
+---
+This file contains the LensUndistorter class, which removes the camera lens' distortion from frames or from detected corner points using remap tables that are built once per calibration profile
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import hashlib
+import os
+import time
+import zipfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from calibration_store import (DEFAULT_CAMERA_ID, DEFAULT_RESOLUTION,
+                               get_default_store)
+
+DEFAULT_CACHE_DIR = Path.home() / ".ball_e" / "remap_tables"
+
+# Remap tables already built or loaded by this process, keyed by profile_fingerprint()
+_remap_tables = {}
+
+
+def profile_fingerprint(profile):
+    """Fingerprint of everything in a calibration profile that the remap tables depend on
+
+    Args:
+        profile (CalibrationProfile): The profile
+
+    Returns:
+        string: Hex digest that changes whenever the resolution, intrinsics, or distortion coefficients change
+    """
+
+    fingerprint = hashlib.sha1()
+    fingerprint.update(np.asarray(profile.resolution, dtype=np.int64).tobytes())
+    fingerprint.update(profile.camera_matrix.tobytes())
+    fingerprint.update(profile.dist_coeffs.tobytes())
+
+    return fingerprint.hexdigest()[:16]
+
+
+class LensUndistorter:
+    """This class undoes the lens distortion of one calibration profile.
+
+    Whole frames are undistorted with cv2.remap() and fixed-point remap tables, which are built the first time they are
+    needed and then kept in memory and in an .npz file so that later runs only have to load them. When only the goal's
+    corners are needed, undistort_points() skips the frame entirely. The undistorted image keeps the profile's camera
+    matrix, so the calibrated focal length still applies.
+    """
+
+    def __init__(self, profile, cache_dir=DEFAULT_CACHE_DIR, interpolation=cv2.INTER_LINEAR):
+        """Initializer for the lens undistorter
+
+        Args:
+            profile (CalibrationProfile): Calibration of the camera, with its camera matrix and distortion coefficients
+            cache_dir (string, optional): Folder to keep the remap tables in, or None to only keep them in memory. Defaults to ~/.ball_e/remap_tables.
+            interpolation (int, optional): OpenCV interpolation used to remap frames. Defaults to cv2.INTER_LINEAR.
+        """
+
+        self.profile = profile
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.interpolation = interpolation
+
+        # Without intrinsics or distortion coefficients there is nothing to undo
+        self.enabled = (profile is not None and profile.camera_matrix is not None and
+                        profile.dist_coeffs is not None and bool(np.any(profile.dist_coeffs)))
+        self.fingerprint = profile_fingerprint(profile) if self.enabled else None
+        self._tables = None
+
+    @classmethod
+    def from_store(cls, calibration_store=None, camera_id=DEFAULT_CAMERA_ID, resolution=DEFAULT_RESOLUTION, **kwargs):
+        """Makes an undistorter for the calibration of a camera at a resolution
+
+        Args:
+            calibration_store (CalibrationStore, optional): Store to load from. Defaults to the default store.
+            camera_id (string, optional): Name of the camera. Defaults to DEFAULT_CAMERA_ID.
+            resolution (tuple, optional): Width and height (in pixels) the camera captures at. Defaults to DEFAULT_RESOLUTION.
+
+        Returns:
+            LensUndistorter: The undistorter, which does nothing if the camera has no calibrated distortion
+        """
+
+        if calibration_store is None:
+            calibration_store = get_default_store()
+
+        return cls(calibration_store.get(camera_id, resolution), **kwargs)
+
+    @property
+    def cache_path(self):
+        """Location of the .npz file of the remap tables, or None if they are only kept in memory"""
+
+        if self.cache_dir is None or not self.enabled:
+            return None
+        return self.cache_dir / "{}-{}.npz".format(self.profile.key, self.fingerprint)
+
+    def build_tables(self):
+        """Builds the remap tables from the profile
+
+        Returns:
+            tuple: Fixed-point maps (see cv2.initUndistortRectifyMap() with cv2.CV_16SC2)
+        """
+
+        return cv2.initUndistortRectifyMap(self.profile.camera_matrix, self.profile.dist_coeffs, None,
+                                           self.profile.camera_matrix, self.profile.resolution, cv2.CV_16SC2)
+
+    def _load_tables(self):
+        """Loads the remap tables from the cache file
+
+        Returns:
+            tuple: The maps, or None if there is no usable cache file
+        """
+
+        cache_path = self.cache_path
+        if cache_path is None or not cache_path.exists():
+            return None
+
+        try:
+            with np.load(str(cache_path)) as saved:
+                if str(saved["fingerprint"]) != self.fingerprint:
+                    return None
+                return saved["map_xy"], saved["map_interpolation"]
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            # A damaged file is rebuilt rather than trusted
+            return None
+
+    def _save_tables(self, tables):
+        """Saves the remap tables to the cache file
+
+        Args:
+            tables (tuple): The maps
+        """
+
+        cache_path = self.cache_path
+        if cache_path is None:
+            return
+
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_suffix(".tmp.npz")
+        np.savez(str(temp_path), fingerprint=self.fingerprint,
+                 map_xy=tables[0], map_interpolation=tables[1])
+        # Replace the old file in one step
+        os.replace(str(temp_path), str(cache_path))
+
+    @property
+    def tables(self):
+        """Remap tables of the profile, from memory, the cache file, or built and saved the first time"""
+
+        if self._tables is None:
+            tables = _remap_tables.get(self.fingerprint)
+            if tables is None:
+                tables = self._load_tables()
+                if tables is None:
+                    tables = self.build_tables()
+                    self._save_tables(tables)
+                _remap_tables[self.fingerprint] = tables
+            self._tables = tables
+
+        return self._tables
+
+    def undistort_frame(self, frame, dst=None):
+        """Removes the lens distortion from a whole frame
+
+        Args:
+            frame (numpy.ndarray): Image from the camera, at the profile's resolution
+            dst (numpy.ndarray, optional): Image to write into, so that no new image is allocated per frame. Defaults to None.
+
+        Raises:
+            ValueError: If the frame is not at the profile's resolution
+
+        Returns:
+            numpy.ndarray: The undistorted frame (the frame itself if there is no distortion)
+        """
+
+        if not self.enabled:
+            return frame
+
+        if (frame.shape[1], frame.shape[0]) != self.profile.resolution:
+            raise ValueError("Frame is {}x{} but the profile is {}x{}".format(
+                frame.shape[1], frame.shape[0], *self.profile.resolution))
+
+        map_xy, map_interpolation = self.tables
+
+        return cv2.remap(frame, map_xy, map_interpolation, self.interpolation, dst=dst)
+
+    def undistort_points(self, points):
+        """Removes the lens distortion from points, such as the goal's corners, without touching the frame
+
+        Args:
+            points (list): (x,y) tuples in the distorted frame
+
+        Returns:
+            list: (x,y) tuples where the points would be in the undistorted frame
+        """
+
+        if not self.enabled:
+            return [(float(x), float(y)) for x, y in points]
+
+        undistorted_points = cv2.undistortPoints(np.asarray(points, dtype=np.float64).reshape(-1, 1, 2),
+                                                 self.profile.camera_matrix, self.profile.dist_coeffs,
+                                                 P=self.profile.camera_matrix)
+
+        return [(float(x), float(y)) for x, y in undistorted_points.reshape(-1, 2)]
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    import shutil
+    import tempfile
+
+    from calibration_store import CalibrationProfile
+    from goal_distance_calculator import GoalDistanceCalculator
+
+    # A wide-angle lens with strong barrel distortion
+    focal_length = 1000
+    resolution = (1920, 1080)
+    camera_matrix = np.array([[focal_length, 0, resolution[0]/2],
+                              [0, focal_length, resolution[1]/2],
+                              [0, 0, 1]])
+    profile = CalibrationProfile(DEFAULT_CAMERA_ID, resolution, focal_length,
+                                 camera_matrix=camera_matrix, dist_coeffs=(-0.3, 0.1, 0, 0, 0))
+
+    # Goal 240 inches away and off to the side, where the distortion is strong
+    goal_points = np.array([(-20, -36, 240), (52, -36, 240),
+                            (52, 36, 240), (-20, 36, 240)], dtype=np.float64)
+    distorted_corners = cv2.projectPoints(goal_points, np.zeros(3), np.zeros(3),
+                                          camera_matrix, profile.dist_coeffs)[0].reshape(4, 2)
+
+    # Keep the cache file out of the source tree, and remove it at the end
+    cache_dir = tempfile.mkdtemp()
+    lens_undistorter = LensUndistorter(profile, cache_dir=cache_dir)
+    for label, corners in (("Distorted", distorted_corners),
+                           ("Undistorted", lens_undistorter.undistort_points(distorted_corners))):
+        distance_calculator = GoalDistanceCalculator(corners)
+        distance_calculator.focal_length = focal_length
+        print("{} corners: {:.2f} in. (actual 240 in.)".format(
+            label, distance_calculator.get_obj_distance()))
+
+    for label in ("First use", "In memory"):
+        start_time = time.perf_counter()
+        LensUndistorter(profile, cache_dir=cache_dir).tables
+        print("{} tables: {:.2f} ms".format(
+            label, (time.perf_counter() - start_time)*1000))
+    _remap_tables.clear()
+    start_time = time.perf_counter()
+    LensUndistorter(profile, cache_dir=cache_dir).tables
+    print("From cache file: {:.2f} ms".format(
+        (time.perf_counter() - start_time)*1000))
+
+    frame = np.zeros((resolution[1], resolution[0], 3), dtype=np.uint8)
+    undistorted_frame = np.empty_like(frame)
+    start_time = time.perf_counter()
+    for _ in range(20):
+        lens_undistorter.undistort_frame(frame, dst=undistorted_frame)
+    print("Frame: {:.2f} ms".format((time.perf_counter() - start_time)*1000/20))
+
+    start_time = time.perf_counter()
+    for _ in range(1000):
+        lens_undistorter.undistort_points(distorted_corners)
+    print("Corners: {:.3f} ms".format((time.perf_counter() - start_time)))
+
+    shutil.rmtree(cache_dir)
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
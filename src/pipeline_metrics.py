@@ -0,0 +1,431 @@
+"""
+pipeline_metrics.py
+---
+This file contains the MetricsRegistry and MetricsExporter classes, which collect stage timers, counters, and histograms from across the vision pipeline and periodically export snapshots of them to a file or socket so that stalls can be found in the field
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import bisect
+import functools
+import json
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+# Upper bounds of the histogram buckets (in ms for stage timers), roughly 1-2-5 steps from 10 us to 10 s
+HISTOGRAM_BOUNDS = tuple(scale*step for scale in (0.01, 0.1, 1, 10, 100, 1000)
+                         for step in (1, 2, 5)) + (10000,)
+
+
+class Histogram:
+    """This class counts values into fixed buckets, so recording a value is O(log buckets) and takes no extra memory.
+    Percentiles are estimated by interpolating within a bucket.
+    """
+
+    def __init__(self, bounds=HISTOGRAM_BOUNDS):
+        """Initializer for the histogram
+
+        Args:
+            bounds (tuple, optional): Upper bounds of the buckets, in increasing order. Defaults to HISTOGRAM_BOUNDS.
+        """
+
+        self.bounds = bounds
+        self.reset()
+
+    def reset(self):
+        """Removes every value"""
+
+        # The last bucket holds everything above the last bound
+        self.bucket_counts = [0]*(len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def observe(self, value):
+        """Records a value
+
+        Args:
+            value (float): The value
+        """
+
+        self.bucket_counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Estimates a percentile of the values
+
+        Args:
+            percent (float): Percentile between 0 and 100
+
+        Returns:
+            float: The estimate, or 0 if there are no values
+        """
+
+        if self.count == 0:
+            return 0.0
+
+        rank = percent/100*self.count
+        seen = 0
+        for bucket, bucket_count in enumerate(self.bucket_counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.bounds[bucket - 1] if bucket > 0 else self.min
+                upper = self.bounds[bucket] if bucket < len(self.bounds) else self.max
+                # The bucket's edges are clamped to the values seen so that the estimate never leaves [min, max]
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower)*(rank - seen)/bucket_count
+            seen += bucket_count
+
+        return self.max
+
+    def summary(self):
+        """Summary of the values
+
+        Returns:
+            OrderedDict: Count, mean, min, max, and the 50th, 90th, and 99th percentiles
+        """
+
+        if self.count == 0:
+            return OrderedDict((("count", 0), ("mean", 0.0), ("min", 0.0), ("max", 0.0),
+                                ("p50", 0.0), ("p90", 0.0), ("p99", 0.0)))
+
+        return OrderedDict((("count", self.count), ("mean", self.total/self.count), ("min", self.min), ("max", self.max),
+                            ("p50", self.percentile(50)), ("p90", self.percentile(90)), ("p99", self.percentile(99))))
+
+
+class _StageTimer:
+    """Context manager that records how long its block takes (in ms) into a histogram of the registry"""
+
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, (time.perf_counter() - self.start)*1000)
+        return False
+
+
+class _NullTimer:
+    """Context manager that does nothing, handed out while the registry is disabled"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """This class holds every counter and histogram of the pipeline by name (e.g.: "video_view.capture").
+
+    It starts disabled, in which case every call returns right after checking the enabled flag, so the instrumentation
+    can be left in place. Updates take a lock since the pipeline records from several threads.
+    """
+
+    def __init__(self, enabled=False):
+        """Initializer for the metrics registry
+
+        Args:
+            enabled (bool, optional): Whether metrics are recorded. Defaults to False.
+        """
+
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.counters = OrderedDict()
+        self.histograms = OrderedDict()
+        self.start_time = time.time()
+
+    def stage(self, name):
+        """Times a block of code, e.g.: `with registry.stage("video_view.capture"):`
+
+        Args:
+            name (string): Name of the stage
+
+        Returns:
+            Context manager that records the block's time (in ms) into the stage's histogram
+        """
+
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name)
+
+    def increment(self, name, amount=1):
+        """Adds to a counter
+
+        Args:
+            name (string): Name of the counter
+            amount (int, optional): Amount to add. Defaults to 1.
+        """
+
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        """Records a value into a histogram
+
+        Args:
+            name (string): Name of the histogram
+            value (float): The value (in ms for stage timers)
+        """
+
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def reset(self):
+        """Removes every counter and histogram"""
+
+        with self._lock:
+            self.counters = OrderedDict()
+            self.histograms = OrderedDict()
+            self.start_time = time.time()
+
+    def snapshot(self):
+        """Copies the current state of every metric
+
+        Returns:
+            dict: Snapshot that can be saved as JSON
+        """
+
+        with self._lock:
+            now = time.time()
+            return {
+                "time": now,
+                "uptime": now - self.start_time,
+                "counters": OrderedDict(self.counters),
+                "histograms": OrderedDict((name, histogram.summary()) for name, histogram in self.histograms.items()),
+            }
+
+    def format_summary(self):
+        """Formats the metrics as a text table
+
+        Returns:
+            string: The table
+        """
+
+        snapshot = self.snapshot()
+        lines = ["{:<44} {:>8} {:>10} {:>10} {:>10} {:>10}".format(
+            "Stage", "Count", "Mean (ms)", "p50 (ms)", "p99 (ms)", "Max (ms)")]
+        for name, summary in snapshot["histograms"].items():
+            lines.append("{:<44} {:>8} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                name, summary["count"], summary["mean"], summary["p50"], summary["p99"], summary["max"]))
+
+        if snapshot["counters"]:
+            lines.append("")
+            lines.append("{:<44} {:>8} {:>10}".format("Counter", "Value", "Per sec"))
+            for name, value in snapshot["counters"].items():
+                lines.append("{:<44} {:>8} {:>10.2f}".format(
+                    name, value, value/snapshot["uptime"] if snapshot["uptime"] > 0 else 0.0))
+
+        return "\n".join(lines)
+
+
+# Registry shared by the whole pipeline
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    """Gets the registry shared by the whole pipeline
+
+    Returns:
+        MetricsRegistry: The shared registry
+    """
+
+    return _registry
+
+
+def enable():
+    """Starts recording metrics in the shared registry"""
+
+    _registry.enabled = True
+
+
+def disable():
+    """Stops recording metrics in the shared registry"""
+
+    _registry.enabled = False
+
+
+def stage(name):
+    """Times a block of code in the shared registry (see MetricsRegistry.stage)"""
+
+    return _registry.stage(name)
+
+
+def increment(name, amount=1):
+    """Adds to a counter in the shared registry (see MetricsRegistry.increment)"""
+
+    _registry.increment(name, amount)
+
+
+def observe(name, value):
+    """Records a value into a histogram in the shared registry (see MetricsRegistry.observe)"""
+
+    _registry.observe(name, value)
+
+
+def timed(name):
+    """Decorator that times every call of a function as a stage in the shared registry
+
+    Args:
+        name (string): Name of the stage
+
+    Returns:
+        The decorator
+    """
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _registry.enabled:
+                return function(*args, **kwargs)
+            with _StageTimer(_registry, name):
+                return function(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+class MetricsExporter:
+    """This class writes a snapshot of a registry every few seconds on a background thread, as one JSON object per line.
+    Snapshots go to a file (appended to), a UDP address, and/or a Unix datagram socket. Datagrams are used so that
+    nothing blocks when no one is listening.
+    """
+
+    def __init__(self, registry=None, interval=5.0, file_path=None, address=None, unix_path=None):
+        """Initializer for the metrics exporter
+
+        Args:
+            registry (MetricsRegistry, optional): Registry to export. Defaults to the shared registry.
+            interval (float, optional): Time between snapshots (in seconds). Defaults to 5.0.
+            file_path (string, optional): File to append snapshots to. Defaults to None.
+            address (tuple, optional): Host and port to send snapshots to over UDP. Defaults to None.
+            unix_path (string, optional): Unix datagram socket to send snapshots to. Defaults to None.
+
+        Raises:
+            ValueError: If there is nowhere to export to
+        """
+
+        if file_path is None and address is None and unix_path is None:
+            raise ValueError("A file, address, or Unix socket is needed")
+
+        self.registry = registry if registry is not None else get_registry()
+        self.interval = interval
+        self.file_path = file_path
+        self.address = address
+        self.unix_path = unix_path
+
+        self.snapshots_sent = 0
+        self.send_errors = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def export(self):
+        """Exports one snapshot now"""
+
+        line = json.dumps(self.registry.snapshot()) + "\n"
+
+        if self.file_path is not None:
+            with open(self.file_path, "a") as metrics_file:
+                metrics_file.write(line)
+
+        for family, destination in ((socket.AF_INET, self.address), (getattr(socket, "AF_UNIX", None), self.unix_path)):
+            if destination is None or family is None:
+                continue
+            try:
+                with socket.socket(family, socket.SOCK_DGRAM) as sock:
+                    sock.sendto(line.encode(), destination)
+            except OSError:
+                # A missing listener should never take down the pipeline
+                self.send_errors += 1
+
+        self.snapshots_sent += 1
+
+    def _run(self):
+        """Exports snapshots until stopped"""
+
+        while not self._stop_event.wait(self.interval):
+            self.export()
+
+    def start(self):
+        """Starts exporting on a background thread"""
+
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops exporting, after exporting one last snapshot"""
+
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self.export()
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    # NOTE: The pipeline records into the imported module's registry, not the one of this script (which runs as __main__)
+    import pipeline_metrics
+    from frame_source import SyntheticGoalFrameSource
+    from goal_corner_detector import GoalCornerDetector
+    from goal_distance_calculator import GoalDistanceCalculator
+
+    pipeline_metrics.enable()
+    exporter = pipeline_metrics.MetricsExporter(
+        interval=1.0, file_path="pipeline_metrics.jsonl")
+    exporter.start()
+
+    detector = GoalCornerDetector()
+    for frame in SyntheticGoalFrameSource(num_frames=60, noise_sigma=2).open():
+        frame_start = time.perf_counter()
+        with pipeline_metrics.stage("main.detect"):
+            corners = detector.detect(frame)
+        if corners is None:
+            pipeline_metrics.increment("main.frames_without_goal")
+            continue
+        pipeline_metrics.increment("main.frames")
+        GoalDistanceCalculator(corners).get_obj_distance_estimate()
+        # Histograms are shown in ms, so only latencies go into them
+        pipeline_metrics.observe(
+            "main.frame", (time.perf_counter() - frame_start)*1000)
+
+    exporter.stop()
+    print(pipeline_metrics.get_registry().format_summary())
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -0,0 +1,450 @@
+"""
+session_recorder.py
+---
+This file contains the SessionRecorder and SessionReader classes, which save camera frames along with their timestamps and the camera's calibration to a compact chunked session file, and read them back (memory-mapped) as a FrameSource
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import json
+import mmap
+import struct
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from frame_source import FrameSource, SyntheticGoalFrameSource
+
+# Identifies a session file and the version of its layout
+SESSION_FILE_MAGIC = b"BESS"
+SESSION_FILE_VERSION = 1
+# Magic, version, storage, frame width, frame height, length of the JSON metadata that follows
+SESSION_FILE_HEADER = struct.Struct("<4sHBxIII")
+# Tag, number of frames, length of the frame data. Followed by one FRAME_ENTRY per frame, and then the frame data.
+CHUNK_TAG = b"CHNK"
+CHUNK_HEADER = struct.Struct("<4sII")
+# Timestamp (in seconds since the first frame), offset of the frame from the start of the chunk's frame data, length of the frame
+FRAME_ENTRY = struct.Struct("<dQI")
+# Offset of the chunk in the file, number of the chunk's first frame, number of frames in the chunk
+CHUNK_INDEX_ENTRY = struct.Struct("<QII")
+# Offset of the chunk index, number of chunks, end tag. Only written when the recording is closed properly.
+SESSION_END_TAG = b"BEND"
+SESSION_TRAILER = struct.Struct("<QI4s")
+
+# How frames are stored
+STORAGE_RAW = 0
+STORAGE_JPEG = 1
+STORAGE_NAMES = {"raw": STORAGE_RAW, "jpeg": STORAGE_JPEG}
+
+# Raw frames start on a multiple of this many bytes
+RAW_ALIGNMENT = 64
+
+
+class SessionRecorder:
+    """This class writes frames to a session file in chunks. Each chunk has a small index of frame timestamps and offsets,
+    and the whole file ends with an index of the chunks so that any frame can be found without reading the others.
+    If the recording is cut short (e.g.: by a crash), every complete chunk can still be read.
+
+    Frames are stored either as JPEG (small) or raw BGR (large, but read back without decoding or copying).
+    """
+
+    def __init__(self, file_path, storage="jpeg", jpeg_quality=90, chunk_frames=64, metadata=None, calibration_profile=None):
+        """Initializer for the session recorder
+
+        Args:
+            file_path (string): Location of the session file
+            storage (string, optional): "jpeg" or "raw". Defaults to "jpeg".
+            jpeg_quality (int, optional): JPEG quality from 0 to 100. Defaults to 90.
+            chunk_frames (int, optional): Frames per chunk. Defaults to 64.
+            metadata (dict, optional): Anything else worth keeping with the session (must be JSON serializable). Defaults to None.
+            calibration_profile (CalibrationProfile, optional): Calibration of the camera the session is recorded with. Defaults to None.
+
+        Raises:
+            ValueError: If the storage is unknown
+        """
+
+        if storage not in STORAGE_NAMES:
+            raise ValueError("Storage must be one of: {}".format(
+                ", ".join(STORAGE_NAMES)))
+
+        self.file_path = Path(file_path)
+        self.storage = STORAGE_NAMES[storage]
+        self.jpeg_quality = jpeg_quality
+        self.chunk_frames = chunk_frames
+
+        self.metadata = dict(metadata) if metadata is not None else {}
+        if calibration_profile is not None:
+            self.metadata["calibration"] = calibration_profile.to_dict()
+
+        self.session_file = None
+        self.frame_size = None
+        self.frames_written = 0
+        self.start_time = None
+        self._pending = []
+        self._chunk_index = []
+
+    def open(self, frame_size):
+        """Creates the session file
+
+        Args:
+            frame_size (tuple): Width and height (in pixels) of the frames
+        """
+
+        self.frame_size = tuple(int(side) for side in frame_size)
+        self.metadata.setdefault("recorded", time.time())
+        metadata_bytes = json.dumps(self.metadata).encode()
+
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self.session_file = open(str(self.file_path), "wb")
+        self.session_file.write(SESSION_FILE_HEADER.pack(SESSION_FILE_MAGIC, SESSION_FILE_VERSION, self.storage,
+                                                         self.frame_size[0], self.frame_size[1], len(metadata_bytes)))
+        self.session_file.write(metadata_bytes)
+
+        self.frames_written = 0
+        self.start_time = None
+        self._pending = []
+        self._chunk_index = []
+
+    def write(self, frame, timestamp=None):
+        """Adds a frame to the session
+
+        Args:
+            frame (numpy.ndarray): BGR frame with the session's frame size (the first frame sets the size if open() was not called)
+            timestamp (float, optional): Time the frame was captured (from time.perf_counter). Defaults to now.
+
+        Raises:
+            ValueError: If the frame is a different size than the session's frames
+            IOError: If the frame could not be encoded
+        """
+
+        if self.session_file is None:
+            self.open((frame.shape[1], frame.shape[0]))
+        if frame.shape != (self.frame_size[1], self.frame_size[0], 3):
+            raise ValueError("Frame is {} but the session is {}x{}x3".format(
+                "x".join(str(side) for side in frame.shape), self.frame_size[1], self.frame_size[0]))
+
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = timestamp
+
+        if self.storage == STORAGE_JPEG:
+            ret, encoded = cv2.imencode(
+                ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ret:
+                raise IOError("Could not encode frame {}".format(self.frames_written))
+            frame_bytes = encoded.tobytes()
+        else:
+            frame_bytes = np.ascontiguousarray(frame).tobytes()
+
+        self._pending.append((timestamp - self.start_time, frame_bytes))
+        self.frames_written += 1
+        if len(self._pending) == self.chunk_frames:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        """Writes the pending frames as one chunk"""
+
+        if not self._pending:
+            return
+
+        chunk_offset = self.session_file.tell()
+        entries_end = chunk_offset + CHUNK_HEADER.size + \
+            FRAME_ENTRY.size*len(self._pending)
+        # Raw frames are aligned so that they can be used straight out of a memory map
+        padding = (-entries_end) % RAW_ALIGNMENT if self.storage == STORAGE_RAW else 0
+
+        entries = []
+        offset = padding
+        for timestamp, frame_bytes in self._pending:
+            entries.append(FRAME_ENTRY.pack(timestamp, offset, len(frame_bytes)))
+            offset += len(frame_bytes)
+
+        self.session_file.write(CHUNK_HEADER.pack(
+            CHUNK_TAG, len(self._pending), offset))
+        self.session_file.write(b"".join(entries))
+        self.session_file.write(b"\0"*padding)
+        for _, frame_bytes in self._pending:
+            self.session_file.write(frame_bytes)
+
+        self._chunk_index.append(
+            (chunk_offset, self.frames_written - len(self._pending), len(self._pending)))
+        self._pending = []
+
+    def close(self):
+        """Writes the last chunk and the chunk index, and closes the session file"""
+
+        if self.session_file is None:
+            return
+
+        self._write_chunk()
+        index_offset = self.session_file.tell()
+        for chunk_offset, first_frame, num_frames in self._chunk_index:
+            self.session_file.write(CHUNK_INDEX_ENTRY.pack(
+                chunk_offset, first_frame, num_frames))
+        self.session_file.write(SESSION_TRAILER.pack(
+            index_offset, len(self._chunk_index), SESSION_END_TAG))
+
+        self.session_file.close()
+        self.session_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class RecordingFrameSource(FrameSource):
+    """This class records every frame read from another frame source, e.g.: VideoView(RecordingFrameSource(GStreamerFrameSource(), recorder))
+    """
+
+    def __init__(self, frame_source, session_recorder):
+        """Initializer for the recording frame source
+
+        Args:
+            frame_source (FrameSource): Source to read frames from
+            session_recorder (SessionRecorder): Recorder to write the frames to
+        """
+
+        self.frame_source = frame_source
+        self.session_recorder = session_recorder
+        self.cap = None
+
+    def open(self):
+        self.cap = self.frame_source.open()
+        return self
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret:
+            self.session_recorder.write(frame)
+        return ret, frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        self.session_recorder.close()
+
+
+class SessionReader:
+    """This class reads a session file through a memory map. Raw frames are returned as read-only views of the map, so
+    reading them does not copy anything, and JPEG frames are decoded straight out of it.
+    """
+
+    def __init__(self, file_path):
+        """Initializer for the session reader. Reads the header and the frame index.
+
+        Args:
+            file_path (string): Location of the session file
+
+        Raises:
+            ValueError: If the file is not a session file
+        """
+
+        self.file_path = Path(file_path)
+
+        with open(str(self.file_path), "rb") as session_file:
+            self._map = mmap.mmap(session_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < SESSION_FILE_HEADER.size:
+            raise ValueError("{} is not a session file".format(file_path))
+        magic, version, self.storage, width, height, metadata_length = SESSION_FILE_HEADER.unpack_from(
+            self._map)
+        if magic != SESSION_FILE_MAGIC or version != SESSION_FILE_VERSION:
+            raise ValueError("{} is not a version {} session file".format(
+                file_path, SESSION_FILE_VERSION))
+
+        self.frame_size = (width, height)
+        metadata_start = SESSION_FILE_HEADER.size
+        self.metadata = json.loads(
+            bytes(self._map[metadata_start:metadata_start + metadata_length]).decode())
+        self.complete = True
+
+        # Timestamp, absolute offset, and length of every frame
+        self.timestamps, self._offsets, self._lengths = self._read_index(
+            metadata_start + metadata_length)
+
+    def _chunk_offsets(self, first_chunk_offset):
+        """Offsets of every chunk, from the chunk index if the file was closed properly or by walking the chunks if not"""
+
+        if len(self._map) >= first_chunk_offset + SESSION_TRAILER.size:
+            index_offset, num_chunks, end_tag = SESSION_TRAILER.unpack_from(
+                self._map, len(self._map) - SESSION_TRAILER.size)
+            if end_tag == SESSION_END_TAG:
+                return [CHUNK_INDEX_ENTRY.unpack_from(self._map, index_offset + chunk*CHUNK_INDEX_ENTRY.size)[0]
+                        for chunk in range(num_chunks)]
+
+        # The recording was cut short, so keep every chunk that was written completely
+        self.complete = False
+        chunk_offsets = []
+        offset = first_chunk_offset
+        while offset + CHUNK_HEADER.size <= len(self._map):
+            tag, num_frames, data_length = CHUNK_HEADER.unpack_from(self._map, offset)
+            chunk_end = offset + CHUNK_HEADER.size + \
+                FRAME_ENTRY.size*num_frames + data_length
+            if tag != CHUNK_TAG or chunk_end > len(self._map):
+                break
+            chunk_offsets.append(offset)
+            offset = chunk_end
+
+        return chunk_offsets
+
+    def _read_index(self, first_chunk_offset):
+        """Reads the frame entries of every chunk"""
+
+        timestamps, offsets, lengths = [], [], []
+        for chunk_offset in self._chunk_offsets(first_chunk_offset):
+            _, num_frames, _ = CHUNK_HEADER.unpack_from(self._map, chunk_offset)
+            entries_start = chunk_offset + CHUNK_HEADER.size
+            data_start = entries_start + FRAME_ENTRY.size*num_frames
+            for frame in range(num_frames):
+                timestamp, offset, length = FRAME_ENTRY.unpack_from(
+                    self._map, entries_start + frame*FRAME_ENTRY.size)
+                timestamps.append(timestamp)
+                offsets.append(data_start + offset)
+                lengths.append(length)
+
+        return np.array(timestamps, dtype=float), offsets, lengths
+
+    @property
+    def calibration(self):
+        """Calibration profile dictionary the session was recorded with, or None"""
+
+        return self.metadata.get("calibration")
+
+    @property
+    def duration(self):
+        """Time (in seconds) from the first frame to the last frame"""
+
+        return float(self.timestamps[-1]) if len(self.timestamps) else 0.0
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def frame(self, index):
+        """Gets a frame
+
+        Args:
+            index (int): Number of the frame
+
+        Returns:
+            numpy.ndarray: The BGR frame (read-only for raw sessions)
+        """
+
+        offset, length = self._offsets[index], self._lengths[index]
+        width, height = self.frame_size
+
+        if self.storage == STORAGE_RAW:
+            return np.frombuffer(self._map, dtype=np.uint8, count=length, offset=offset).reshape(height, width, 3)
+
+        return cv2.imdecode(np.frombuffer(self._map, dtype=np.uint8, count=length, offset=offset), cv2.IMREAD_COLOR)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.frame(index)
+
+    def close(self):
+        """Closes the memory map"""
+
+        try:
+            self._map.close()
+        except BufferError:
+            # Raw frames that are still in use keep the map open until they are gone
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SessionFrameSource(FrameSource):
+    """This class plays a recorded session back as a frame source, either as fast as possible or at the recorded pace"""
+
+    def __init__(self, file_path, realtime=False, loop=False, frame_range=None):
+        """Initializer for the session frame source
+
+        Args:
+            file_path (string): Location of the session file
+            realtime (bool, optional): Whether to wait between frames as long as when they were recorded. Defaults to False.
+            loop (bool, optional): Whether to start over after the last frame. Defaults to False.
+            frame_range (tuple, optional): First and last (exclusive) frame to play. Defaults to every frame.
+        """
+
+        self.file_path = file_path
+        self.realtime = realtime
+        self.loop = loop
+        self.frame_range = frame_range
+
+        self.reader = None
+        self.index = 0
+        self.play_start = None
+
+    def open(self):
+        self.reader = SessionReader(self.file_path)
+        self.start_index, self.end_index = self.frame_range if self.frame_range is not None else (
+            0, len(self.reader))
+        self.index = self.start_index
+        self.play_start = None
+        return self
+
+    def read(self):
+        if self.index >= self.end_index:
+            if not self.loop or self.end_index == self.start_index:
+                return False, None
+            self.index = self.start_index
+            self.play_start = None
+
+        if self.realtime:
+            # Wait until the frame's time since the first frame has passed
+            now = time.perf_counter()
+            frame_time = self.reader.timestamps[self.index] - \
+                self.reader.timestamps[self.start_index]
+            if self.play_start is None:
+                self.play_start = now
+            time.sleep(max(0, self.play_start + frame_time - now))
+
+        frame = self.reader.frame(self.index)
+        self.index += 1
+
+        return True, frame
+
+    def release(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    for storage in STORAGE_NAMES:
+        file_path = "session_{}.bes".format(storage)
+        frame_source = RecordingFrameSource(SyntheticGoalFrameSource(num_frames=100, noise_sigma=2, framerate=30),
+                                            SessionRecorder(file_path, storage=storage, metadata={"note": "synthetic"}))
+        with frame_source:
+            for _ in frame_source:
+                pass
+
+        with SessionReader(file_path) as session_reader:
+            start_time = time.perf_counter()
+            for frame in session_reader:
+                pass
+            read_time = time.perf_counter() - start_time
+
+            print("{}: {} frames over {:.2f} s, {:.1f} MB, read at {:.0f} fps".format(
+                storage, len(session_reader), session_reader.duration, Path(file_path).stat().st_size/1e6,
+                len(session_reader)/read_time))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
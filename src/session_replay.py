@@ -0,0 +1,259 @@
+"""
+session_replay.py
+---
+This file contains the SessionReplay class, which runs recorded sessions through goal detection, distance estimation, and the trajectory algorithm faster than real time, and compares the results against an earlier run to catch regressions
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from calibration_store import load_focal_length
+from goal_corner_detector import GoalCornerDetector
+from goal_distance_calculator import GoalDistanceCalculator
+from session_recorder import SessionReader, SessionRecorder
+from trajectory_algorithm import Target, TrajectoryAlgorithm
+
+# Result of replaying a session. Per-frame arrays are NaN for frames the goal was not found in.
+# timestamps: Time of each frame (in seconds since the first frame)
+# distances: Distance from Ball-E to the goal (in inches)
+# uncertainties: Standard error of each distance (in inches)
+# yaw, pitch: Motor angles (in degrees) for every section of the goal, with shape (frames, sections)
+# elapsed: Time the replay took (in seconds)
+# speedup: How many times faster than real time the replay ran
+ReplayResult = namedtuple("ReplayResult", [
+                          "timestamps", "distances", "uncertainties", "yaw", "pitch", "elapsed", "speedup"])
+
+
+def replay_frames(task):
+    """Finds the goal and its distance in a range of frames of a session
+
+    NOTE: This is a module level function so that it can be sent to worker processes
+
+    Args:
+        task (tuple): Location of the session, first frame, last frame (exclusive), and focal length (in pixels)
+
+    Returns:
+        tuple: Arrays of the distances and uncertainties (in inches), NaN where the goal was not found
+    """
+
+    file_path, start, end, focal_length = task
+    detector = GoalCornerDetector()
+    distances = np.full(end - start, np.nan)
+    uncertainties = np.full(end - start, np.nan)
+
+    with SessionReader(file_path) as session_reader:
+        for index in range(start, end):
+            corners = detector.detect(session_reader.frame(index))
+            if corners is None:
+                continue
+            distance_calculator = GoalDistanceCalculator(corners)
+            distance_calculator.focal_length = focal_length
+            distances[index - start], uncertainties[index -
+                                                    start] = distance_calculator.get_obj_distance_estimate()
+
+    return distances, uncertainties
+
+
+class SessionReplay:
+    """This class replays a recorded session through the vision pipeline without waiting between frames.
+    Frames are split into batches that run on several processes, and the trajectory algorithm runs once over every
+    distance at the end.
+    """
+
+    def __init__(self, file_path, focal_length=None, trajectory_alg=None, processes=None, batch_frames=64):
+        """Initializer for the session replay
+
+        Args:
+            file_path (string): Location of the session file
+            focal_length (float, optional): Focal length (in pixels). Defaults to the calibration saved with the session, or the calibration store.
+            trajectory_alg (TrajectoryAlgorithm, optional): Source of the offsets, constants, and gear ratios. Defaults to TrajectoryAlgorithm's defaults.
+            processes (int, optional): Number of worker processes. Defaults to the number of cores.
+            batch_frames (int, optional): Frames per batch of work. Defaults to 64.
+        """
+
+        self.file_path = str(file_path)
+        self.trajectory_alg = trajectory_alg if trajectory_alg is not None else TrajectoryAlgorithm(
+            1)
+        self.processes = processes
+        self.batch_frames = batch_frames
+
+        with SessionReader(self.file_path) as session_reader:
+            self.num_frames = len(session_reader)
+            self.timestamps = session_reader.timestamps.copy()
+            self.duration = session_reader.duration
+            calibration = session_reader.calibration
+
+        # Replays are only reproducible with the calibration the session was recorded with
+        if focal_length is None:
+            focal_length = calibration["focal_length"] if calibration is not None else load_focal_length()
+        self.focal_length = focal_length
+
+    def run(self):
+        """Replays the whole session
+
+        Returns:
+            ReplayResult: Distances and motor angles for every frame, and how fast the replay ran
+        """
+
+        start_time = time.perf_counter()
+
+        tasks = [(self.file_path, start, min(start + self.batch_frames, self.num_frames), self.focal_length)
+                 for start in range(0, self.num_frames, self.batch_frames)]
+        if self.processes == 1 or len(tasks) < 2:
+            results = [replay_frames(task) for task in tasks]
+        else:
+            with multiprocessing.Pool(self.processes) as pool:
+                results = pool.map(replay_frames, tasks)
+
+        distances = np.concatenate(
+            [result[0] for result in results]) if results else np.zeros(0)
+        uncertainties = np.concatenate(
+            [result[1] for result in results]) if results else np.zeros(0)
+
+        # Every section of the goal for every frame the goal was found in, in one pass (the algorithm works in ft.)
+        found = ~np.isnan(distances)
+        yaw = np.full((len(distances), len(Target)), np.nan)
+        pitch = np.full((len(distances), len(Target)), np.nan)
+        if np.any(found):
+            yaw[found], pitch[found] = self.trajectory_alg.calc_batch(
+                distances[found, np.newaxis]/12, np.arange(len(Target)))
+
+        elapsed = time.perf_counter() - start_time
+
+        return ReplayResult(timestamps=self.timestamps, distances=distances, uncertainties=uncertainties, yaw=yaw,
+                            pitch=pitch, elapsed=elapsed, speedup=self.duration/elapsed if elapsed > 0 else 0.0)
+
+
+def save_result(replay_result, file_path):
+    """Saves a replay result so that later builds can be compared against it
+
+    Args:
+        replay_result (ReplayResult): The result
+        file_path (string): Location of the .npz file
+    """
+
+    np.savez_compressed(file_path, **replay_result._asdict())
+
+
+def load_result(file_path):
+    """Loads a replay result saved with save_result()
+
+    Args:
+        file_path (string): Location of the .npz file
+
+    Returns:
+        ReplayResult: The result
+    """
+
+    with np.load(file_path) as saved:
+        return ReplayResult(**{field: saved[field] if saved[field].ndim else float(saved[field])
+                               for field in ReplayResult._fields})
+
+
+def compare_results(baseline, replay_result, distance_tolerance=0.01, angle_tolerance=1e-6):
+    """Compares a replay against a baseline replay of the same session
+
+    Args:
+        baseline (ReplayResult): The earlier replay
+        replay_result (ReplayResult): The new replay
+        distance_tolerance (float, optional): Largest allowed change of a distance (in inches). Defaults to 0.01.
+        angle_tolerance (float, optional): Largest allowed change of a motor angle (in degrees). Defaults to 1e-6.
+
+    Raises:
+        ValueError: If the replays are of a different number of frames
+
+    Returns:
+        dict: Frames the goal is now found or lost in, the largest changes, and whether the replay matches the baseline
+    """
+
+    if len(baseline.distances) != len(replay_result.distances):
+        raise ValueError("The replays are of different sessions")
+
+    baseline_found = ~np.isnan(baseline.distances)
+    found = ~np.isnan(replay_result.distances)
+    both = baseline_found & found
+
+    def largest_change(old, new):
+        return float(np.max(np.abs(new[both] - old[both]))) if np.any(both) else 0.0
+
+    comparison = {
+        "newly_found": int(np.sum(found & ~baseline_found)),
+        "newly_lost": int(np.sum(baseline_found & ~found)),
+        "max_distance_change": largest_change(baseline.distances, replay_result.distances),
+        "max_yaw_change": largest_change(baseline.yaw, replay_result.yaw),
+        "max_pitch_change": largest_change(baseline.pitch, replay_result.pitch),
+        "speedup_change": replay_result.speedup/baseline.speedup if baseline.speedup > 0 else 0.0,
+    }
+    comparison["matches"] = (comparison["newly_found"] == 0 and comparison["newly_lost"] == 0 and
+                             comparison["max_distance_change"] <= distance_tolerance and
+                             max(comparison["max_yaw_change"], comparison["max_pitch_change"]) <= angle_tolerance)
+
+    return comparison
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    parser = argparse.ArgumentParser(
+        description="Replays a recorded session through the vision pipeline")
+    parser.add_argument("session", nargs="?",
+                        help="Session file to replay (records a synthetic one if left out)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Number of worker processes")
+    parser.add_argument("--output", help="Save the result to this .npz file")
+    parser.add_argument("--compare", help="Compare the result against this .npz file")
+    args = parser.parse_args()
+
+    file_path = args.session
+    temp_dir = None
+    if file_path is None:
+        import os
+        import tempfile
+
+        from calibration_store import DEFAULT_CAMERA_ID, CalibrationProfile
+        from frame_source import SyntheticGoalFrameSource
+
+        # The synthetic camera's focal length is known exactly, so it is saved with the session
+        temp_dir = tempfile.mkdtemp()
+        file_path = os.path.join(temp_dir, "synthetic_session.bes")
+        calibration_profile = CalibrationProfile(
+            DEFAULT_CAMERA_ID, (960, 540), focal_length=1000)
+        with SessionRecorder(file_path, metadata={"note": "synthetic"}, calibration_profile=calibration_profile) as session_recorder:
+            frame_source = SyntheticGoalFrameSource(
+                distance=240, focal_length=1000, num_frames=300, noise_sigma=2).open()
+            # Pretend the frames came in at 30 fps
+            for index, frame in enumerate(frame_source):
+                session_recorder.write(frame, timestamp=index/30)
+
+    try:
+        replay_result = SessionReplay(file_path, processes=args.processes).run()
+        print("{} frames in {:.2f} s ({:.1f}x real time), median distance {:.2f} inches".format(
+            len(replay_result.distances), replay_result.elapsed, replay_result.speedup, np.nanmedian(replay_result.distances)))
+
+        if args.output:
+            save_result(replay_result, args.output)
+        if args.compare:
+            comparison = compare_results(load_result(args.compare), replay_result)
+            print(comparison)
+            if not comparison["matches"]:
+                sys.exit(1)
+    finally:
+        # Don't leave the synthetic session behind
+        if temp_dir is not None:
+            import shutil
+
+            shutil.rmtree(temp_dir)
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -0,0 +1,520 @@
+"""
+shot_control_service.py
+---
+This file contains the ShotControlService class, which keeps the latest distance to the goal and a warm trajectory table, and answers motor angle requests from other processes (such as the motor controller and the tablet UI) over a local socket
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import asyncio
+import json
+import math
+import socket
+import threading
+import time
+
+import numpy as np
+
+from trajectory_algorithm import Target, TrajectoryAlgorithm
+from trajectory_table import TrajectoryTable
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5805
+
+# Below this many angle requests in one batch, scalar table lookups are faster than one NumPy lookup
+MIN_VECTOR_BATCH = 8
+
+# Compact JSON, since every byte is sent for every request
+# NaN and infinity are not valid JSON, so they are never sent to clients
+_encode_json = json.JSONEncoder(separators=(",", ":"), allow_nan=False).encode
+
+
+class ShotControlService:
+    """This class serves motor angles over JSON lines on a TCP and/or Unix socket.
+
+    Every request is one JSON object per line, and every response is one JSON object per line in the same order. The
+    "id" of a request (if any) is copied into its response, and failed requests get an "error" instead of results:
+
+        {"op": "angles", "target": "TL", "id": 7}            -> {"id":7,"yaw":...,"pitch":...,"distance":...}
+        {"op": "angles", "target": "BR", "distance": 180}    -> angles at 180 inches instead of the latest distance
+        {"op": "distance"}                                   -> {"distance":...,"uncertainty":...,"age":...}
+        {"op": "set_distance", "distance": 180}              -> {"ok":true}
+        {"op": "ping"}                                       -> {"ok":true}
+
+    Distances are in inches, like the distance calculators. Requests from every client go through one queue, and
+    whatever has arrived by the time the previous batch is answered is answered together with one table lookup. The
+    vision loop only hands over its latest distance with update_distance(), which never waits on the service.
+    """
+
+    def __init__(self, trajectory_table=None, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None,
+                 max_distance_age=None, max_batch=256):
+        """Initializer for the shot control service
+
+        Args:
+            trajectory_table (TrajectoryTable, optional): Table to answer angle requests from. Defaults to a table of TrajectoryAlgorithm's defaults.
+            host (string, optional): Address to listen on over TCP, or None to not use TCP. Defaults to 127.0.0.1.
+            port (int, optional): Port to listen on over TCP (0 for any free port). Defaults to DEFAULT_PORT.
+            unix_path (string, optional): Unix socket to listen on. Defaults to None.
+            max_distance_age (float, optional): Age (in seconds) after which the latest distance is too old to shoot with. Defaults to never.
+            max_batch (int, optional): Most requests answered in one batch. Defaults to 256.
+
+        Raises:
+            ValueError: If there is nowhere to listen on
+        """
+
+        if host is None and unix_path is None:
+            raise ValueError("A host or Unix socket is needed")
+
+        self.trajectory_table = trajectory_table if trajectory_table is not None else TrajectoryTable(
+            TrajectoryAlgorithm(1))
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.max_distance_age = max_distance_age
+        self.max_batch = max_batch
+
+        # Latest distance (in inches), its uncertainty, and when it was measured, swapped in as one tuple so that
+        # readers never see half of an update
+        self._latest_distance = None
+
+        self.requests_served = 0
+        self.batches_served = 0
+
+        self._loop = None
+        self._servers = []
+        self._requests = None
+        self._batch_task = None
+        self._thread = None
+
+        # Warm up the table's lookup paths so the first request is as fast as the rest
+        self.trajectory_table.lookup(self.trajectory_table.min_distance, "CM")
+        self.trajectory_table.lookup_batch(
+            [self.trajectory_table.min_distance], ["CM"])
+
+    def update_distance(self, distance, uncertainty=0.0, timestamp=None):
+        """Hands over the latest distance to the goal. This is safe to call from any thread.
+
+        Args:
+            distance (float): Distance from Ball-E to the goal (in inches)
+            uncertainty (float, optional): Standard error of the distance (in inches). Defaults to 0.0.
+            timestamp (float, optional): Time (from time.perf_counter) the distance was measured. Defaults to now.
+
+        Raises:
+            ValueError: If the distance or its uncertainty is not a finite number
+        """
+
+        distance, uncertainty = float(distance), float(uncertainty)
+        if not (math.isfinite(distance) and math.isfinite(uncertainty)):
+            raise ValueError("Distance {} in. and uncertainty {} in. must be finite".format(
+                distance, uncertainty))
+
+        self._latest_distance = (distance, uncertainty,
+                                 time.perf_counter() if timestamp is None else timestamp)
+
+    @property
+    def latest_distance(self):
+        """Latest distance (in inches), its uncertainty (in inches), and its age (in seconds), or None if there is no distance yet"""
+
+        latest_distance = self._latest_distance
+        if latest_distance is None:
+            return None
+        distance, uncertainty, timestamp = latest_distance
+        return distance, uncertainty, time.perf_counter() - timestamp
+
+    def _shot_distance(self, request):
+        """Finds the distance (in inches) to answer an angle request at
+
+        Args:
+            request (dict): The request
+
+        Raises:
+            ValueError: If there is no usable distance
+
+        Returns:
+            float: The distance
+        """
+
+        if "distance" in request:
+            return float(request["distance"])
+
+        latest_distance = self.latest_distance
+        if latest_distance is None:
+            raise ValueError("No distance yet")
+        if self.max_distance_age is not None and latest_distance[2] > self.max_distance_age:
+            raise ValueError("Distance is {:.3f} s old".format(latest_distance[2]))
+
+        return latest_distance[0]
+
+    def handle_requests(self, lines):
+        """Answers a batch of requests, doing one table lookup for all of the angle requests in it
+
+        Args:
+            lines (list): Requests, each a line of JSON (bytes)
+
+        Returns:
+            list: Response lines (bytes), in the same order as the requests
+        """
+
+        responses = [None]*len(lines)
+        # Index, response, distance (in ft.), and target code of every angle request that can be answered
+        angle_requests = []
+
+        for index, line in enumerate(lines):
+            response = {}
+            try:
+                request = json.loads(line.decode())
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be a JSON object")
+                if "id" in request:
+                    response["id"] = request["id"]
+
+                op = request.get("op")
+                if op == "angles":
+                    target = request.get("target")
+                    # JSON true and false would otherwise be taken as the codes 1 and 0
+                    if isinstance(target, bool):
+                        raise ValueError("Unknown target: {}".format(target))
+                    code = Target.parse(target).value
+                    # The trajectory algorithm works in ft.
+                    distance = self._shot_distance(request)
+                    if not self.trajectory_table.min_distance <= distance/12 <= self.trajectory_table.max_distance:
+                        raise ValueError("Distance {} in. is outside of the table".format(distance))
+                    response["distance"] = distance
+                    angle_requests.append((index, response, distance/12, code))
+                    continue
+                elif op == "distance":
+                    latest_distance = self.latest_distance
+                    if latest_distance is None:
+                        raise ValueError("No distance yet")
+                    response["distance"], response["uncertainty"], response["age"] = latest_distance
+                elif op == "set_distance":
+                    self.update_distance(
+                        request["distance"], request.get("uncertainty", 0.0))
+                    response["ok"] = True
+                elif op == "ping":
+                    response["ok"] = True
+                else:
+                    raise ValueError("Unknown op: {}".format(op))
+            except (ValueError, TypeError, KeyError) as error:
+                response["error"] = str(error)
+
+            responses[index] = response
+
+        if len(angle_requests) >= MIN_VECTOR_BATCH:
+            yaw, pitch = self.trajectory_table.lookup_batch([angle_request[2] for angle_request in angle_requests],
+                                                            np.array([angle_request[3] for angle_request in angle_requests]))
+            for (index, response, _, _), shot_yaw, shot_pitch in zip(angle_requests, yaw.tolist(), pitch.tolist()):
+                response["yaw"], response["pitch"] = shot_yaw, shot_pitch
+                responses[index] = response
+        else:
+            for index, response, distance, code in angle_requests:
+                response["yaw"], response["pitch"] = self.trajectory_table.lookup(
+                    distance, code)
+                responses[index] = response
+
+        self.requests_served += len(lines)
+        self.batches_served += 1
+
+        return [(self._encode_response(response) + "\n").encode() for response in responses]
+
+    @staticmethod
+    def _encode_response(response):
+        """Encodes a response as JSON
+
+        Args:
+            response (dict): The response
+
+        Returns:
+            string: The response, or an error if it held something that is not valid JSON (e.g.: a NaN id)
+        """
+
+        try:
+            return _encode_json(response)
+        except (ValueError, TypeError) as error:
+            return _encode_json({"error": str(error)})
+
+    async def _handle_client(self, reader, writer):
+        """Queues every request line of a client until it disconnects
+
+        Args:
+            reader (asyncio.StreamReader): Reads from the client
+            writer (asyncio.StreamWriter): Writes to the client
+        """
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self._requests.put_nowait((line, writer))
+        except (ConnectionError, ValueError):
+            # A dropped connection or an overly long line ends this client only
+            pass
+        finally:
+            writer.close()
+
+    async def _answer_batches(self):
+        """Answers queued requests in batches until cancelled"""
+
+        while True:
+            batch = [await self._requests.get()]
+            while len(batch) < self.max_batch and not self._requests.empty():
+                batch.append(self._requests.get_nowait())
+
+            responses = self.handle_requests([line for line, _ in batch])
+
+            writers = []
+            for (_, writer), response in zip(batch, responses):
+                if writer.transport.is_closing():
+                    continue
+                writer.write(response)
+                if writer not in writers:
+                    writers.append(writer)
+
+            # Only slow clients make this wait, and only once their socket buffer is full
+            for writer in writers:
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    pass
+
+    async def start(self):
+        """Starts listening and answering requests on the running event loop"""
+
+        self._loop = asyncio.get_event_loop()
+        self._requests = asyncio.Queue()
+        self._batch_task = self._loop.create_task(self._answer_batches())
+
+        if self.host is not None:
+            server = await asyncio.start_server(self._handle_client, self.host, self.port)
+            # Port 0 picks any free port, so keep the one that was picked
+            self.port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+        if self.unix_path is not None:
+            self._servers.append(await asyncio.start_unix_server(self._handle_client, self.unix_path))
+
+    async def stop(self):
+        """Stops listening and answering requests"""
+
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+
+        if self._batch_task is not None:
+            self._batch_task.cancel()
+            try:
+                await self._batch_task
+            except asyncio.CancelledError:
+                pass
+            self._batch_task = None
+
+    def run(self):
+        """Serves requests on this thread until interrupted (Ctrl+C)"""
+
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(self.start())
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            loop.run_until_complete(self.stop())
+
+    def start_in_thread(self):
+        """Serves requests on a background thread with its own event loop, so that the vision loop is never blocked
+
+        Raises:
+            OSError: If the service could not start listening, e.g.: the port is already in use
+
+        Returns:
+            threading.Thread: The thread
+        """
+
+        started = threading.Event()
+        start_errors = []
+
+        def serve():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except Exception as error:
+                # e.g.: the port is already in use, which is raised again on the calling thread
+                start_errors.append(error)
+                loop.run_until_complete(self.stop())
+                loop.close()
+                return
+            finally:
+                started.set()
+            loop.run_forever()
+            loop.run_until_complete(self.stop())
+            loop.close()
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        started.wait()
+        if start_errors:
+            thread.join()
+            raise start_errors[0]
+
+        self._thread = thread
+        return self._thread
+
+    def stop_thread(self):
+        """Stops the background thread started by start_in_thread()"""
+
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+
+class ShotControlClient:
+    """This class is a blocking client of the shot control service, for processes that are not asyncio based
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None, timeout=1.0):
+        """Initializer for the shot control client. Connects to the service.
+
+        Args:
+            host (string, optional): Address of the service over TCP. Defaults to 127.0.0.1.
+            port (int, optional): Port of the service over TCP. Defaults to DEFAULT_PORT.
+            unix_path (string, optional): Unix socket of the service, used instead of TCP if given. Defaults to None.
+            timeout (float, optional): Longest wait (in seconds) for a response. Defaults to 1.0.
+        """
+
+        if unix_path is not None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(unix_path)
+        else:
+            self.sock = socket.create_connection((host, port))
+            # Requests are tiny, so send them right away instead of waiting to fill a packet
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(timeout)
+        self.sock_file = self.sock.makefile("rb")
+
+    def request(self, op, **fields):
+        """Sends a request and waits for its response
+
+        Args:
+            op (string): The request's op (angles, distance, set_distance, or ping)
+            **fields: The rest of the request, e.g.: target="TL"
+
+        Raises:
+            ValueError: If the service could not answer the request
+
+        Returns:
+            dict: The response
+        """
+
+        fields["op"] = op
+        self.sock.sendall((_encode_json(fields) + "\n").encode())
+        line = self.sock_file.readline()
+        if not line:
+            raise IOError("The shot control service closed the connection")
+
+        response = json.loads(line.decode())
+        if "error" in response:
+            raise ValueError(response["error"])
+
+        return response
+
+    def angles(self, target, distance=None):
+        """Gets the motor angles for a section of the goal
+
+        Args:
+            target (string/int): Section of the goal (TL, TM, TR, CL, CM, CR, BL, BM, BR) or its code
+            distance (float, optional): Distance from Ball-E to the goal (in inches). Defaults to the service's latest distance.
+
+        Returns:
+            tuple: The yaw and pitch angles in degrees
+        """
+
+        fields = {"target": int(target) if isinstance(target, Target) else target}
+        if distance is not None:
+            fields["distance"] = distance
+        response = self.request("angles", **fields)
+
+        return response["yaw"], response["pitch"]
+
+    def close(self):
+        """Disconnects from the service"""
+
+        self.sock_file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    num_clients = 32
+    requests_per_client = 200
+
+    shot_control_service = ShotControlService(port=0)
+    shot_control_service.start_in_thread()
+    port = shot_control_service.port
+
+    # Pretend to be the vision loop, handing over a new distance at 30 fps
+    vision_running = threading.Event()
+    vision_running.set()
+
+    def vision_loop():
+        frame_number = 0
+        while vision_running.is_set():
+            shot_control_service.update_distance(180 + (frame_number % 30), 0.5)
+            frame_number += 1
+            time.sleep(1/30)
+
+    vision_thread = threading.Thread(target=vision_loop, daemon=True)
+    vision_thread.start()
+    time.sleep(0.05)
+
+    with ShotControlClient(port=port) as shot_control_client:
+        print("Angles for TL: {}".format(shot_control_client.angles("TL")))
+        print("Latest distance: {}".format(shot_control_client.request("distance")))
+
+    # Many clients at once, each waiting for its response before sending the next request
+    async def client(targets, latencies):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for target in targets:
+            start_time = time.perf_counter()
+            writer.write((_encode_json({"op": "angles", "target": target}) + "\n").encode())
+            json.loads((await reader.readline()).decode())
+            latencies.append(time.perf_counter() - start_time)
+        writer.close()
+
+    latencies = []
+    target_names = [target.name for target in Target]
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    start_time = time.perf_counter()
+    clients = [loop.create_task(client([target_names[(index + request) % len(target_names)]
+                                        for request in range(requests_per_client)], latencies))
+               for index in range(num_clients)]
+    loop.run_until_complete(asyncio.wait(clients))
+    elapsed = time.perf_counter() - start_time
+    loop.close()
+
+    vision_running.clear()
+    shot_control_service.stop_thread()
+
+    latencies_ms = 1000*np.array(latencies)
+    print("{} clients: {:.0f} requests/s, latency p50 {:.3f} ms, p99 {:.3f} ms, {:.1f} requests per batch".format(
+        num_clients, len(latencies)/elapsed, np.percentile(latencies_ms, 50), np.percentile(latencies_ms, 99),
+        shot_control_service.requests_served/shot_control_service.batches_served))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
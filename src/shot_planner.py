@@ -0,0 +1,390 @@
+"""
+shot_planner.py
+---
+This file contains the MotorCostModel class, which estimates how long the yaw and pitch motors take to move between shots, and the ShotOrderOptimizer class, which reorders a randomised set of targets to get the most shots per minute without giving up zone coverage
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import copy
+from collections import namedtuple
+
+import numpy as np
+
+from trajectory_algorithm import Target, TrajectoryAlgorithm, encode_targets
+
+# Result of optimizing the order of shots
+# targets: Targets in the order they should be fired
+# order: Indices into the given targets, in the order they should be fired
+# cycle_time: Time to fire every shot (in seconds), including moves and firing
+# shots_per_minute: Throughput of the order
+# violations: Number of coverage constraints that the order breaks (0 unless the constraints can not all be met)
+ShotPlan = namedtuple("ShotPlan", [
+                      "targets", "order", "cycle_time", "shots_per_minute", "violations"])
+
+
+class MotorCostModel:
+    """This class models each axis with a trapezoidal velocity profile: it accelerates at its limit up to its top speed,
+    cruises, and decelerates to a stop. Moves that are too short to reach top speed follow a triangular profile instead.
+    Yaw and pitch move at the same time, so a move takes as long as the slower of the two axes.
+
+    Limits are given for the shooter head (in degrees of the head) and scaled by the gear ratios into motor degrees, which
+    is what TrajectoryAlgorithm returns.
+    """
+
+    def __init__(self, gear_ratio_yaw=12.8, gear_ratio_pitch=9, max_velocity=(120, 90), max_acceleration=(600, 450),
+                 settle_time=0.05, shot_time=0.4):
+        """Initializer for the motor cost model
+
+        Args:
+            gear_ratio_yaw (float, optional): Gear ratio of the yaw motor. Defaults to 12.8.
+            gear_ratio_pitch (float, optional): Gear ratio of the pitch motor. Defaults to 9.
+            max_velocity (tuple, optional): Top speed of the head in yaw and pitch (in degrees/s). Defaults to (120, 90).
+            max_acceleration (tuple, optional): Acceleration of the head in yaw and pitch (in degrees/s^2). Defaults to (600, 450).
+            settle_time (float, optional): Time for the head to settle after any move (in seconds). Defaults to 0.05.
+            shot_time (float, optional): Time to feed and fire one ball once the head is in place (in seconds). Defaults to 0.4.
+
+        Raises:
+            ValueError: If any limit is not positive
+        """
+
+        if min(max_velocity) <= 0 or min(max_acceleration) <= 0:
+            raise ValueError("Velocity and acceleration limits must be positive")
+
+        self.gear_ratios = np.array(
+            [gear_ratio_yaw, gear_ratio_pitch], dtype=float)
+        # Limits of the motors (in motor degrees)
+        self.max_velocity = np.asarray(
+            max_velocity, dtype=float)*self.gear_ratios
+        self.max_acceleration = np.asarray(
+            max_acceleration, dtype=float)*self.gear_ratios
+        self.settle_time = settle_time
+        self.shot_time = shot_time
+
+    @classmethod
+    def from_trajectory_algorithm(cls, trajectory_alg, **kwargs):
+        """Makes a cost model with the same gear ratios as a trajectory algorithm
+
+        Args:
+            trajectory_alg (TrajectoryAlgorithm): Source of the gear ratios
+            **kwargs: Any other arguments of __init__
+
+        Returns:
+            MotorCostModel: The cost model
+        """
+
+        return cls(gear_ratio_yaw=trajectory_alg.gear_ratio_yaw, gear_ratio_pitch=trajectory_alg.gear_ratio_pitch, **kwargs)
+
+    def move_time(self, start, end):
+        """Time to move between two sets of angles
+
+        Args:
+            start (array_like): Yaw and pitch (in motor degrees) with shape (..., 2)
+            end (array_like): Yaw and pitch (in motor degrees) with shape (..., 2)
+
+        Returns:
+            numpy.ndarray: Move times (in seconds) with the broadcast shape of start and end, without the last axis
+        """
+
+        travel = np.abs(np.asarray(end, dtype=float) -
+                        np.asarray(start, dtype=float))
+
+        # Distance covered while speeding up to top speed and slowing back down
+        ramp_distance = self.max_velocity**2/self.max_acceleration
+        axis_times = np.where(travel < ramp_distance,
+                              2*np.sqrt(travel/self.max_acceleration),
+                              travel/self.max_velocity + self.max_velocity/self.max_acceleration)
+        times = np.max(axis_times, axis=-1)
+
+        return np.where(times > 0, times + self.settle_time, 0.0)
+
+    def cycle_time(self, angles, start=(0, 0)):
+        """Time to fire a sequence of shots
+
+        Args:
+            angles (array_like): Yaw and pitch (in motor degrees) of each shot with shape (shots, 2)
+            start (array_like, optional): Yaw and pitch (in motor degrees) before the first shot. Defaults to (0, 0).
+
+        Returns:
+            float: The time (in seconds)
+        """
+
+        angles = np.asarray(angles, dtype=float).reshape(-1, 2)
+        if len(angles) == 0:
+            return 0.0
+
+        path = np.concatenate(
+            (np.asarray(start, dtype=float)[np.newaxis], angles))
+
+        return float(np.sum(self.move_time(path[:-1], path[1:])) + len(angles)*self.shot_time)
+
+    def shots_per_minute(self, angles, start=(0, 0)):
+        """Throughput of a sequence of shots
+
+        Args:
+            angles (array_like): Yaw and pitch (in motor degrees) of each shot with shape (shots, 2)
+            start (array_like, optional): Yaw and pitch (in motor degrees) before the first shot. Defaults to (0, 0).
+
+        Returns:
+            float: Shots per minute
+        """
+
+        num_shots = np.asarray(angles).size//2
+        cycle_time = self.cycle_time(angles, start)
+
+        return 60*num_shots/cycle_time if cycle_time > 0 else 0.0
+
+
+class ShotOrderOptimizer:
+    """This class reorders the shots of a drill to cut down the cycle time, subject to coverage constraints so that the
+    drill is not reduced to firing at one zone over and over:
+
+        - No zone is shot at more than max_consecutive times in a row
+        - Every coverage_window consecutive shots hit at least min_coverage different zones (if coverage_window is set)
+
+    A greedy order (always move to the cheapest allowed zone next) is improved with pairwise swaps. A swap is kept if it
+    breaks fewer constraints, or breaks as many and saves time. Both are checked locally, so each swap costs O(window).
+    """
+
+    def __init__(self, cost_model=None, trajectory_alg=None, max_consecutive=1, coverage_window=None, min_coverage=None,
+                 max_passes=20, home=(0, 0)):
+        """Initializer for the shot order optimizer
+
+        Args:
+            cost_model (MotorCostModel, optional): Model of the motors. Defaults to one with the trajectory algorithm's gear ratios.
+            trajectory_alg (TrajectoryAlgorithm, optional): Source of the offsets, constants, and gear ratios. Defaults to TrajectoryAlgorithm's defaults.
+            max_consecutive (int, optional): Most shots in a row at the same zone. Defaults to 1.
+            coverage_window (int, optional): Length of the coverage window (in shots). Defaults to no coverage window.
+            min_coverage (int, optional): Fewest different zones in each coverage window. Defaults to the window length, capped at the number of zones in the drill.
+            max_passes (int, optional): Most passes of the swap search. Defaults to 20.
+            home (tuple, optional): Yaw and pitch (in motor degrees) of the motors before the first shot. Defaults to (0, 0).
+
+        Raises:
+            ValueError: If max_consecutive is less than 1
+        """
+
+        if max_consecutive < 1:
+            raise ValueError("max_consecutive must be at least 1")
+
+        self.trajectory_alg = trajectory_alg if trajectory_alg is not None else TrajectoryAlgorithm(
+            1)
+        self.cost_model = cost_model if cost_model is not None else MotorCostModel.from_trajectory_algorithm(
+            self.trajectory_alg)
+        self.max_consecutive = max_consecutive
+        self.coverage_window = coverage_window
+        self.min_coverage = min_coverage
+        self.max_passes = max_passes
+        self.home = home
+
+    def move_times(self, distance, lateral_offset=0):
+        """Times of every move between zones at a distance
+
+        Args:
+            distance (float): Distance of Ball-E from the Goal (in ft.)
+            lateral_offset (float, optional): How far the center of the goal is to the right of Ball-E (in ft.). Defaults to 0.
+
+        Returns:
+            list: Move times (in seconds) where [a][b] is the move from zone code a to zone code b, and index len(Target) is home
+        """
+
+        trajectory_alg = copy.copy(self.trajectory_alg)
+        trajectory_alg.distance_from_goal = distance
+        trajectory_alg.lateral_offset = lateral_offset
+        yaw, pitch = trajectory_alg.calc_batch(
+            distance, np.arange(len(Target)))
+        angles = np.concatenate((np.stack((yaw, pitch), axis=-1),
+                                 np.asarray(self.home, dtype=float)[np.newaxis]))
+
+        # Plain lists since the search looks up single entries
+        return self.cost_model.move_time(angles[:, np.newaxis], angles[np.newaxis]).tolist()
+
+    def _windows(self, num_shots, min_coverage):
+        """Sizes and least allowed number of different zones of every constraint window"""
+
+        windows = [(self.max_consecutive + 1, 2)]
+        if self.coverage_window is not None and min_coverage > 1:
+            windows.append((self.coverage_window, min_coverage))
+
+        return [(size, least) for size, least in windows if size <= num_shots]
+
+    @staticmethod
+    def _window_violations(codes, windows, positions):
+        """Counts the constraint windows that contain any of the positions and hit too few different zones"""
+
+        violations = 0
+        for size, least in windows:
+            starts = set()
+            for position in positions:
+                starts.update(range(max(0, position - size + 1),
+                                    min(position, len(codes) - size) + 1))
+            violations += sum(1 for start in starts if len(
+                set(codes[start:start + size])) < least)
+
+        return violations
+
+    def count_violations(self, codes, min_coverage=None):
+        """Counts every constraint window that an order of shots breaks
+
+        Args:
+            codes (list): Target codes in the order they are fired
+            min_coverage (int, optional): Fewest different zones in each coverage window. Defaults to the optimizer's setting.
+
+        Returns:
+            int: Number of constraint windows broken
+        """
+
+        codes = list(codes)
+        if min_coverage is None:
+            min_coverage = self._min_coverage(codes)
+
+        return self._window_violations(codes, self._windows(len(codes), min_coverage), range(len(codes)))
+
+    def _min_coverage(self, codes):
+        """Fewest different zones in each coverage window, capped at what the shots can cover"""
+
+        if self.coverage_window is None:
+            return 0
+        least = self.min_coverage if self.min_coverage is not None else self.coverage_window
+
+        return min(least, self.coverage_window, len(set(codes)))
+
+    def greedy_order(self, codes, move_times):
+        """Builds an order by always moving to the quickest zone that keeps to the constraints
+
+        Args:
+            codes (list): Target codes of the shots
+            move_times (list): Move times from move_times()
+
+        Returns:
+            list: Indices into codes in the order they are fired
+        """
+
+        home = len(Target)
+        remaining = {}
+        for index, code in enumerate(codes):
+            remaining.setdefault(code, []).append(index)
+
+        order = []
+        order_codes = []
+        current = home
+        while remaining:
+            def allowed(code):
+                # Would the shot make max_consecutive + 1 in a row at the same zone
+                tail = order_codes[-self.max_consecutive:]
+                return not (len(tail) == self.max_consecutive and all(previous == code for previous in tail))
+
+            candidates = [code for code in remaining if allowed(code)] or list(remaining)
+            # The quickest move, with ties going to the zone with the most shots left so it is not stranded at the end
+            code = min(candidates, key=lambda code: (
+                move_times[current][code], -len(remaining[code]), code))
+
+            order.append(remaining[code].pop(0))
+            order_codes.append(code)
+            if not remaining[code]:
+                del remaining[code]
+            current = code
+
+        return order
+
+    def optimize(self, targets, distance, lateral_offset=0):
+        """Finds a quick order for a set of shots
+
+        Args:
+            targets (array_like): Targets of the shots, as Target members, codes, or names
+            distance (float): Distance of Ball-E from the Goal (in ft.)
+            lateral_offset (float, optional): How far the center of the goal is to the right of Ball-E (in ft.). Defaults to 0.
+
+        Returns:
+            ShotPlan: The order along with its cycle time and throughput
+        """
+
+        codes = encode_targets(targets).ravel().tolist()
+        num_shots = len(codes)
+        move_times = self.move_times(distance, lateral_offset)
+        home = len(Target)
+        min_coverage = self._min_coverage(codes)
+        windows = self._windows(num_shots, min_coverage)
+
+        def total_time(sequence):
+            path = [home] + sequence
+            return sum(move_times[path[k]][path[k + 1]] for k in range(len(sequence)))
+
+        def edge_time(sequence, edges):
+            # Edge k is the move into shot k (from the shot before it, or from home)
+            return sum(move_times[sequence[k - 1] if k > 0 else home][sequence[k]] for k in edges)
+
+        # Start from whichever is better out of the order given and the greedy order
+        starts = [list(range(num_shots)), self.greedy_order(codes, move_times)]
+        best_order = min(starts, key=lambda order: (self.count_violations([codes[index] for index in order], min_coverage),
+                                                    total_time([codes[index] for index in order])))
+        sequence = [codes[index] for index in best_order]
+
+        for _ in range(self.max_passes):
+            improved = False
+            for i in range(num_shots - 1):
+                for j in range(i + 1, num_shots):
+                    if sequence[i] == sequence[j]:
+                        continue
+
+                    edges = {edge for edge in (i, i + 1, j, j + 1) if edge < num_shots}
+                    before = (self._window_violations(sequence, windows, (i, j)),
+                              edge_time(sequence, edges))
+                    sequence[i], sequence[j] = sequence[j], sequence[i]
+                    after = (self._window_violations(sequence, windows, (i, j)),
+                             edge_time(sequence, edges))
+
+                    if after[0] < before[0] or (after[0] == before[0] and after[1] < before[1] - 1e-12):
+                        best_order[i], best_order[j] = best_order[j], best_order[i]
+                        improved = True
+                    else:
+                        sequence[i], sequence[j] = sequence[j], sequence[i]
+            if not improved:
+                break
+
+        cycle_time = total_time(sequence) + num_shots*self.cost_model.shot_time
+
+        return ShotPlan(targets=[Target(code) for code in sequence], order=best_order, cycle_time=cycle_time,
+                        shots_per_minute=60*num_shots/cycle_time if cycle_time > 0 else 0.0,
+                        violations=self.count_violations(sequence, min_coverage))
+
+
+def random_target_set(shots_per_zone=3, zones=tuple(Target), seed=None):
+    """Makes a randomised set of targets with the same number of shots at each zone
+
+    Args:
+        shots_per_zone (int, optional): Shots at each zone. Defaults to 3.
+        zones (tuple, optional): Zones to shoot at. Defaults to every section of the goal.
+        seed (int, optional): Seed of the shuffle. Defaults to a random seed.
+
+    Returns:
+        numpy.ndarray: Target codes in a random order
+    """
+
+    codes = np.repeat(encode_targets(list(zones)), shots_per_zone)
+    np.random.RandomState(seed).shuffle(codes)
+
+    return codes
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    targets = random_target_set(shots_per_zone=4, seed=7)
+    optimizer = ShotOrderOptimizer(max_consecutive=1, coverage_window=9, min_coverage=6)
+
+    # Throughput of the randomised order as it is, and after optimizing it, at 15 ft.
+    as_given = optimizer.cost_model.cycle_time(np.stack(
+        optimizer.trajectory_alg.calc_batch(15, targets), axis=-1), optimizer.home)
+    shot_plan = optimizer.optimize(targets, 15)
+
+    print("Randomised: {:.2f} s ({:.1f} shots/min)\nOptimized: {:.2f} s ({:.1f} shots/min), {} violations\n{}".format(
+        as_given, 60*len(targets)/as_given, shot_plan.cycle_time, shot_plan.shots_per_minute, shot_plan.violations,
+        " ".join(target.name for target in shot_plan.targets)))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -6,24 +6,140 @@ This file contains the TrajectoryAlgorithm class, which is used for calculating
 
 Author: Andrei Biswas (@codeabiswas)
 Date: May 4, 2021
-Last Modified: May 04, 2021
+Last Modified: Oct 17, 2026
 """
 
 import math
+from collections import OrderedDict
+from enum import IntEnum
+
+import numpy as np
+
+import pipeline_metrics
+
+# Number of rows and columns the goal is split into
+NUM_ROWS = 3
+NUM_COLS = 3
+
+
+class Target(IntEnum):
+    """Sections of the goal that the ball can be shot at. Each code is row*NUM_COLS + col, where row 0 is the top of the goal
+    and column 0 is the left of the goal, so arrays of codes can be used in place of strings
+    """
+
+    TL = 0
+    TM = 1
+    TR = 2
+    CL = 3
+    CM = 4
+    CR = 5
+    BL = 6
+    BM = 7
+    BR = 8
+
+    @property
+    def row(self):
+        """Row (pitch) index of the section"""
+
+        return self.value // NUM_COLS
+
+    @property
+    def col(self):
+        """Column (yaw) index of the section"""
+
+        return self.value % NUM_COLS
+
+    @classmethod
+    def parse(cls, target):
+        """Converts a target given as a Target, a code, or a name (e.g.: "TL") into a Target
+
+        Args:
+            target (Target/int/string): The target
+
+        Raises:
+            ValueError: If the target is not one of the nine sections of the goal
+
+        Returns:
+            Target: The target
+        """
+
+        if isinstance(target, str):
+            try:
+                return cls[target]
+            except KeyError:
+                raise ValueError("Unknown target: {}".format(target))
+
+        return cls(target)
+
+
+# Row (pitch) and column (yaw) index of every section of the goal, by name
+ZONE_INDICES = OrderedDict((target.name, (target.row, target.col))
+                           for target in Target)
+
+# Row and column of every target code, so that arrays of codes can be split without any branching
+TARGET_ROWS = np.array([target.row for target in Target], dtype=np.intp)
+TARGET_COLS = np.array([target.col for target in Target], dtype=np.intp)
+
+# Sign of the angle for each column (Left, Middle, Right) and each row (Top, Center, Bottom). 0 means the angle is a constant.
+YAW_SIGNS = (-1, 0, 1)
+PITCH_SIGNS = (1, 0, -1)
+
+# Yaw and pitch sign of every target, keyed by both its name and its code (Target members hash the same as their codes)
+TARGET_SIGNS = {}
+for _target in Target:
+    TARGET_SIGNS[_target.name] = TARGET_SIGNS[_target.value] = (
+        YAW_SIGNS[_target.col], PITCH_SIGNS[_target.row])
+del _target
+
+
+def encode_targets(targets):
+    """Converts targets into an array of target codes
+
+    Args:
+        targets (array_like): Targets as Target members, codes, or names (TL, TM, TR, CL, CM, CR, BL, BM, BR)
+
+    Raises:
+        ValueError: If any of the targets is not one of the nine sections of the goal
+
+    Returns:
+        numpy.ndarray: Target codes (see Target) with the same shape as targets
+    """
+
+    targets = np.asarray(targets)
+
+    if targets.dtype.kind in "iu":
+        codes = targets.astype(np.intp, copy=False)
+        if codes.size and (codes.min() < 0 or codes.max() >= len(Target)):
+            raise ValueError("Target codes must be within 0 and {}".format(len(Target) - 1))
+        return codes
+
+    # Names are looked up exactly, and only once per distinct name
+    unique_targets, target_inverse = np.unique(
+        targets.ravel(), return_inverse=True)
+    unique_codes = np.array([Target.parse(str(target))
+                             for target in unique_targets], dtype=np.intp)
+
+    return unique_codes[target_inverse.ravel()].reshape(targets.shape)
 
 
 class TrajectoryAlgorithm:
     """This class contains all the helper methods required to calculate the trajectory of the lacrosse ball, given the distance from Ball-E to the goal. It uses simple inverse tan to calculate pitch and yaw (i.e.: invtan(Opposite/Adjacent))
     """
 
-    def __init__(self, distance_from_goal):
+    def __init__(self, distance_from_goal, lateral_offset=0, pitch_model=None):
         """Initialization method for Trajectory Algorithm. This will initialize all the distances from the center of the goal (for yaw) and distances from the ground (for pitch)
 
         Args:
             distance_from_goal ([float]): The distance of Ball-E from the Goal (in ft.)
+            lateral_offset ([float], optional): How far the center of the goal is to the right of Ball-E's center line (in ft.), e.g.: from GoalPoseEstimator. Defaults to 0.
+            pitch_model ([BallisticSolver/BallisticTable], optional): Model of the ball's flight to aim the pitch with, instead of a straight line. Defaults to None.
         """
         # Distance of Ball-E from the Goal
         self.distance_from_goal = distance_from_goal
+        # Distance of the center of the Goal to the right of Ball-E (negative when it is to the left)
+        self.lateral_offset = lateral_offset
+        # Gives the launch pitch (in degrees) for a distance and target height, accounting for gravity and drag
+        self.pitch_model = pitch_model
 
         # Required distances for yaw (in ft.)
         self.straight_dist_from_center = 2
@@ -46,41 +162,146 @@ class TrajectoryAlgorithm:
         """Calculates the yaw of the trajectory from the center of the goal
 
         Args:
-            target (string): Which section of the goal the ball will be shot at (TL, TM, TR, CL, CM, CR, BL, BM, BR)
+            target (Target/int/string): Which section of the goal the ball will be shot at (TL, TM, TR, CL, CM, CR, BL, BM, BR)
 
         Returns:
             float/int: The angle in degrees
         """
 
-        # If target is to the left, then it is a negative angle based on a diagonal distance
-        if "L" in target:
-            return -math.degrees(math.atan(self.straight_dist_from_center/self.distance_from_goal))*self.gear_ratio_yaw
-        # If target is M, then yaw angle is 0 (since there is no change from the center of the goal)
-        elif "M" in target:
-            return self.mid_yaw_const
-        # If target is to the right, then it is a positive angle based on a diagonal distance
-        elif "R" in target:
-            return math.degrees(math.atan(self.straight_dist_from_center/self.distance_from_goal))*self.gear_ratio_yaw
+        try:
+            sign = TARGET_SIGNS[target][0]
+        except KeyError:
+            raise ValueError("Unknown target: {}".format(target))
+
+        # If target is M, then yaw angle is 0 (since there is no change from the center of the goal) unless the goal is off to the side
+        if sign == 0:
+            return self.mid_yaw_const + math.degrees(math.atan(self.lateral_offset/self.distance_from_goal))*self.gear_ratio_yaw
+        # If target is to the left, then it is a negative angle based on a diagonal distance (and positive to the right)
+        return sign*math.degrees(math.atan((self.straight_dist_from_center + sign*self.lateral_offset)/self.distance_from_goal))*self.gear_ratio_yaw
 
     def calc_pitch(self, target):
         """Calculates the pitch of the trajectory from the ground
 
+        With a pitch model, every section (including the center) is aimed along the ball's actual flight, offset by center_pitch_const.
+
         Args:
-            target (string): Which section of the goal the ball will be shot at (TL, TM, TR, CL, CM, CR, BL, BM, BR)
+            target (Target/int/string): Which section of the goal the ball will be shot at (TL, TM, TR, CL, CM, CR, BL, BM, BR)
 
         Returns:
             float/int: The angle in degrees
         """
 
-        # If target is top of the goal, then it is positive angle
-        if "T" in target:
-            return math.degrees(math.atan(self.top_dist/self.distance_from_goal))*self.gear_ratio_pitch
-        # If target is center of the goal, then it is positive angle
-        elif "C" in target:
+        try:
+            sign = TARGET_SIGNS[target][1]
+        except KeyError:
+            raise ValueError("Unknown target: {}".format(target))
+
+        if self.pitch_model is not None:
+            target_height = (self.top_dist, self.middle_dist, -self.bottom_dist)[1 - sign]
+            return self.center_pitch_const + self.pitch_model.pitch(self.distance_from_goal, target_height)*self.gear_ratio_pitch
+
+        # If target is center of the goal, then it is a constant angle
+        if sign == 0:
             return self.center_pitch_const
-        # If target is Bottom of the goal, then it is negative angle
-        elif "B" in target:
-            return -math.degrees(math.atan(self.bottom_dist/self.distance_from_goal))*self.gear_ratio_pitch
+        # If target is top of the goal, then it is positive angle (and negative at the bottom)
+        vertical_dist = self.top_dist if sign > 0 else self.bottom_dist
+        return sign*math.degrees(math.atan(vertical_dist/self.distance_from_goal))*self.gear_ratio_pitch
+
+    @pipeline_metrics.timed("trajectory.calc_batch")
+    def calc_batch(self, distances, targets):
+        """Calculates the yaw and pitch for many distances and targets at once
+
+        Distances and targets are broadcast against each other, so a single distance can be paired with many targets (or vice versa).
+        The results match calc_yaw and calc_pitch exactly for every (distance, target) pair (to within the pitch model's tolerance if there is one).
+
+        Args:
+            distances (array_like): Distances of Ball-E from the Goal (in ft.)
+            targets (array_like): Sections of the goal the ball will be shot at, as Target codes or names (see encode_targets)
+
+        Raises:
+            ValueError: If any of the targets is not one of the nine sections of the goal
+
+        Returns:
+            tuple: Arrays of yaw and pitch angles in degrees, in the broadcast shape of distances and targets
+        """
+
+        distances, codes = np.broadcast_arrays(
+            np.asarray(distances, dtype=float), encode_targets(targets))
+        rows = TARGET_ROWS[codes]
+        cols = TARGET_COLS[codes]
+
+        # Only evaluate inverse tan once per distinct distance. math.atan is used (rather than np.arctan) so that the
+        # results are bit-for-bit identical to the scalar methods
+        unique_distances, distance_inverse = np.unique(
+            distances.ravel(), return_inverse=True)
+        distance_inverse = distance_inverse.reshape(distances.shape)
+
+        def atan_degrees(opposite):
+            return np.degrees(np.array([math.atan(opposite/distance) for distance in unique_distances], dtype=float))[distance_inverse]
+
+        left_angle = atan_degrees(
+            self.straight_dist_from_center - self.lateral_offset)*self.gear_ratio_yaw
+        mid_angle = self.mid_yaw_const + \
+            atan_degrees(self.lateral_offset)*self.gear_ratio_yaw
+        right_angle = atan_degrees(
+            self.straight_dist_from_center + self.lateral_offset)*self.gear_ratio_yaw
+        top_angle = atan_degrees(self.top_dist)*self.gear_ratio_pitch
+        bottom_angle = atan_degrees(self.bottom_dist)*self.gear_ratio_pitch
+
+        # Left is a negative angle, Middle is constant, and Right is a positive angle
+        yaw = np.choose(cols, (-left_angle, mid_angle, right_angle))
+        # Top is a positive angle, Center is constant, and Bottom is a negative angle
+        pitch = np.choose(rows, (top_angle, np.full_like(
+            top_angle, self.center_pitch_const), -bottom_angle))
+
+        if self.pitch_model is not None:
+            target_heights = np.choose(rows, (self.top_dist, self.middle_dist, -self.bottom_dist))
+            pitch = self.center_pitch_const + \
+                self.pitch_model.pitch_batch(distances, target_heights)*self.gear_ratio_pitch
+
+        return yaw, pitch
+
+    @pipeline_metrics.timed("trajectory.calc_grid_batch")
+    def calc_grid_batch(self, distances, rows, cols, grid_rows=3, grid_cols=3):
+        """Calculates the yaw and pitch for the centers of cells in any NxM grid over the goal (see ZoneGrid)
+
+        The goal is assumed to be as wide as 3*straight_dist_from_center, as tall above its center as 3*top_dist,
+        and as tall below its center as 3*bottom_dist, so a 3x3 grid gives the same angles as calc_batch (to within rounding).
+
+        Args:
+            distances (array_like): Distances of Ball-E from the Goal (in ft.)
+            rows (array_like): Rows of the cells, where row 0 is the top of the goal
+            cols (array_like): Columns of the cells, where column 0 is the left of the goal
+            grid_rows (int, optional): Number of rows in the grid. Defaults to 3.
+            grid_cols (int, optional): Number of columns in the grid. Defaults to 3.
+
+        Returns:
+            tuple: Arrays of yaw and pitch angles in degrees, in the broadcast shape of distances, rows, and cols
+        """
+
+        distances, rows, cols = np.broadcast_arrays(np.asarray(distances, dtype=float),
+                                                    np.asarray(rows), np.asarray(cols))
+
+        # Offsets of the cell centers from the center of the goal, in multiples of half a cell
+        half_cells_right = 2*cols + 1 - grid_cols
+        half_cells_up = grid_rows - 1 - 2*rows
+
+        # Horizontal and vertical distance of the cell centers from the center of the goal (in ft.)
+        horizontal_dist = half_cells_right*3*self.straight_dist_from_center / \
+            (2*grid_cols) + self.lateral_offset
+        vertical_dist = np.where(half_cells_up > 0, half_cells_up*3*self.top_dist,
+                                 half_cells_up*3*self.bottom_dist)/(2*grid_rows)
+
+        # The constants only apply to cells in the middle column and center row
+        yaw = np.degrees(np.arctan(horizontal_dist/distances))*self.gear_ratio_yaw + \
+            np.where(half_cells_right == 0, self.mid_yaw_const, 0)
+        pitch = np.where(half_cells_up == 0, self.center_pitch_const,
+                         np.degrees(np.arctan(vertical_dist/distances))*self.gear_ratio_pitch)
+        if self.pitch_model is not None:
+            pitch = self.center_pitch_const + \
+                self.pitch_model.pitch_batch(distances, np.where(half_cells_up == 0, self.middle_dist, vertical_dist))*self.gear_ratio_pitch
+
+        return yaw, pitch
 
 
 def main():
@@ -88,10 +309,15 @@ def main():
 
     # Assume 15 ft. away
     trajectory_alg = TrajectoryAlgorithm(15)
-    for shot_loc in ["TL", "TM", "TR", "CL", "CM", "CR", "BL", "BM", "BR"]:
-        print("For {}:\nYaw={}\nPitch={}\n".format(shot_loc, trajectory_alg.calc_yaw(
+    for shot_loc in Target:
+        print("For {}:\nYaw={}\nPitch={}\n".format(shot_loc.name, trajectory_alg.calc_yaw(
             shot_loc), trajectory_alg.calc_pitch(shot_loc)))
 
+    # Sweep every section of the goal from 5 ft. to 30 ft. away in one pass
+    distances = np.arange(5, 31)[:, np.newaxis]
+    yaw, pitch = trajectory_alg.calc_batch(distances, np.arange(len(Target)))
+    print("Batch yaw:\n{}\nBatch pitch:\n{}".format(yaw, pitch))
+
 
 if __name__ == "__main__":
     # Run the main function
@@ -0,0 +1,289 @@
+"""
+trajectory_table.py
+---
+This file contains the TrajectoryTable class, which precomputes the yaw and pitch motor angles from the TrajectoryAlgorithm class on a grid of distances so that each shot only needs a table lookup
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import math
+import struct
+
+import numpy as np
+
+from trajectory_algorithm import (ZONE_INDICES, Target, TrajectoryAlgorithm,
+                                  encode_targets)
+
+# Identifies a trajectory table file and the version of its layout
+TABLE_FILE_MAGIC = b"BETT"
+TABLE_FILE_VERSION = 2
+# Magic, version, number of distances, first distance, distance step, followed by the TrajectoryAlgorithm constants
+# (straight_dist_from_center, lateral_offset, top_dist, bottom_dist, mid_yaw_const, center_pitch_const, gear_ratio_yaw, gear_ratio_pitch)
+TABLE_FILE_HEADER = struct.Struct("<4sHI10d")
+
+
+class TrajectoryTable:
+    """This class stores the yaw and pitch motor angles for all nine sections of the goal on a uniform grid of distances.
+    Queries in between grid points are answered with linear interpolation.
+
+    The interpolation error for a distance d between two grid points h apart is bounded by (h^2/8)*max|f''| where
+    f(d) = gear_ratio*degrees(atan(a/d)) and a is the offset of the section from the center of the goal.
+    See error_bound() for the bound over the whole table.
+    """
+
+    def __init__(self, trajectory_alg, min_distance=3, max_distance=60, distance_step=0.25):
+        """Initializer for the trajectory table. Precomputes every angle on the distance grid.
+
+        Args:
+            trajectory_alg (TrajectoryAlgorithm): Source of the offsets, constants, and gear ratios used for the table
+            min_distance (float, optional): Closest distance of Ball-E from the Goal (in ft.). Defaults to 3.
+            max_distance (float, optional): Furthest distance of Ball-E from the Goal (in ft.). Defaults to 60.
+            distance_step (float, optional): Spacing of the distance grid (in ft.). Defaults to 0.25.
+
+        Raises:
+            ValueError: If the distance grid is empty or not positive
+        """
+
+        if min_distance <= 0 or distance_step <= 0 or max_distance <= min_distance:
+            raise ValueError("Distance grid must be positive and increasing")
+
+        self.trajectory_alg = trajectory_alg
+        self.min_distance = float(min_distance)
+        self.distance_step = float(distance_step)
+
+        # Make sure that the grid always reaches max_distance
+        num_distances = int(
+            math.ceil((max_distance - min_distance)/distance_step)) + 1
+        self.distances = self.min_distance + \
+            self.distance_step*np.arange(num_distances)
+        self.max_distance = float(self.distances[-1])
+
+        # Table of angles with shape (distances, sections, [yaw, pitch])
+        yaw, pitch = trajectory_alg.calc_batch(
+            self.distances[:, np.newaxis], np.arange(len(Target)))
+        self._set_table(np.stack((yaw, pitch), axis=-1))
+
+    def _set_table(self, table):
+        """Stores the table along with a plain list copy of it for the scalar lookup path
+
+        Args:
+            table (numpy.ndarray): Table of angles with shape (distances, sections, [yaw, pitch])
+        """
+
+        self.table = np.ascontiguousarray(table, dtype=np.float64)
+        # Indexing Python lists is considerably cheaper than indexing NumPy arrays one element at a time
+        self._table_list = self.table.tolist()
+        # Columns of the table are in target code order, and can be found by either name or code
+        self._zone_columns = {target.name: target.value for target in Target}
+        self._zone_columns.update((target.value, target.value)
+                                  for target in Target)
+
+    def _grid_position(self, distance):
+        """Finds the grid cell the distance falls in
+
+        Args:
+            distance (float): Distance of Ball-E from the Goal (in ft.)
+
+        Raises:
+            ValueError: If the distance is outside of the table
+
+        Returns:
+            tuple: Index of the lower grid point and the fraction of the way to the next grid point
+        """
+
+        if not self.min_distance <= distance <= self.max_distance:
+            raise ValueError("Distance {} ft. is outside of the table ({} ft. to {} ft.)".format(
+                distance, self.min_distance, self.max_distance))
+
+        position = (distance - self.min_distance)/self.distance_step
+        index = min(int(position), len(self._table_list) - 2)
+
+        return index, position - index
+
+    def lookup(self, distance, target):
+        """Interpolates the yaw and pitch for a single shot
+
+        Args:
+            distance (float): Distance of Ball-E from the Goal (in ft.)
+            target (Target/int/string): Which section of the goal the ball will be shot at (TL, TM, TR, CL, CM, CR, BL, BM, BR)
+
+        Raises:
+            ValueError: If the distance is outside of the table or the target is unknown
+
+        Returns:
+            tuple: The yaw and pitch angles in degrees
+        """
+
+        index, fraction = self._grid_position(distance)
+        try:
+            column = self._zone_columns[target]
+        except KeyError:
+            raise ValueError("Unknown target: {}".format(target))
+        lower_yaw, lower_pitch = self._table_list[index][column]
+        upper_yaw, upper_pitch = self._table_list[index + 1][column]
+
+        return (lower_yaw + fraction*(upper_yaw - lower_yaw), lower_pitch + fraction*(upper_pitch - lower_pitch))
+
+    def lookup_batch(self, distances, targets):
+        """Interpolates the yaw and pitch for many shots at once
+
+        Args:
+            distances (array_like): Distances of Ball-E from the Goal (in ft.)
+            targets (array_like): Sections of the goal the ball will be shot at, as Target codes or names (see encode_targets)
+
+        Raises:
+            ValueError: If any distance is outside of the table or any target is unknown
+
+        Returns:
+            tuple: Arrays of yaw and pitch angles in degrees, in the broadcast shape of distances and targets
+        """
+
+        distances, columns = np.broadcast_arrays(
+            np.asarray(distances, dtype=float), encode_targets(targets))
+
+        # NaN fails both comparisons, so it is rejected along with distances outside of the table
+        if not np.all((distances >= self.min_distance) & (distances <= self.max_distance)):
+            raise ValueError("Distances must be within {} ft. and {} ft.".format(
+                self.min_distance, self.max_distance))
+
+        positions = (distances - self.min_distance)/self.distance_step
+        indices = np.minimum(positions.astype(np.intp), len(self.table) - 2)
+        fractions = (positions - indices)[..., np.newaxis]
+        angles = self.table[indices, columns] + fractions * \
+            (self.table[indices + 1, columns] - self.table[indices, columns])
+
+        return angles[..., 0], angles[..., 1]
+
+    def error_bound(self):
+        """Upper bound of the interpolation error anywhere in the table
+
+        NOTE: With a pitch model (e.g.: BallisticTable) there is no closed form for the pitch, so its bound is estimated
+        from the second differences of the table, which is (h^2)*f'' between neighbouring grid points
+
+        Returns:
+            tuple: Largest possible yaw and pitch error in degrees
+        """
+
+        def atan_bound(offset, gear_ratio):
+            if offset == 0:
+                return 0.0
+            # |f''(d)| = 2ad/(d^2+a^2)^2 peaks at d = a/sqrt(3) and decreases after that
+            peak_distance = min(
+                max(self.min_distance, abs(offset)/math.sqrt(3)), self.max_distance)
+            second_derivative = 2*abs(offset)*peak_distance / \
+                (peak_distance**2 + offset**2)**2
+            return math.degrees(second_derivative*self.distance_step**2/8)*abs(gear_ratio)
+
+        alg = self.trajectory_alg
+        yaw_bound = max(atan_bound(offset, alg.gear_ratio_yaw) for offset in (alg.straight_dist_from_center - alg.lateral_offset,
+                                                                               alg.lateral_offset,
+                                                                               alg.straight_dist_from_center + alg.lateral_offset))
+        if alg.pitch_model is None:
+            pitch_bound = max(atan_bound(alg.top_dist, alg.gear_ratio_pitch),
+                              atan_bound(alg.bottom_dist, alg.gear_ratio_pitch))
+        else:
+            pitch_bound = float(
+                np.max(np.abs(np.diff(self.table[..., 1], n=2, axis=0))))/8 if len(self.table) > 2 else 0.0
+
+        return yaw_bound, pitch_bound
+
+    def save(self, file_path):
+        """Saves the table to a compact binary file
+
+        Args:
+            file_path (string): Location of the file
+
+        Raises:
+            ValueError: If the table was made with a pitch model, which the file can not describe
+        """
+
+        alg = self.trajectory_alg
+        if alg.pitch_model is not None:
+            raise ValueError(
+                "Tables made with a pitch model can not be saved, since loading them would lose the pitch model")
+        header = TABLE_FILE_HEADER.pack(TABLE_FILE_MAGIC, TABLE_FILE_VERSION, len(self.table), self.min_distance,
+                                        self.distance_step, alg.straight_dist_from_center, alg.lateral_offset, alg.top_dist, alg.bottom_dist,
+                                        alg.mid_yaw_const, alg.center_pitch_const, alg.gear_ratio_yaw, alg.gear_ratio_pitch)
+
+        with open(file_path, "wb") as table_file:
+            table_file.write(header)
+            table_file.write(self.table.astype("<f8").tobytes())
+
+    @classmethod
+    def load(cls, file_path):
+        """Loads a table that was saved with save() without recomputing any angles
+
+        Args:
+            file_path (string): Location of the file
+
+        Raises:
+            ValueError: If the file is not a trajectory table or is truncated
+
+        Returns:
+            TrajectoryTable: The loaded table
+        """
+
+        with open(file_path, "rb") as table_file:
+            contents = table_file.read()
+
+        if len(contents) < TABLE_FILE_HEADER.size:
+            raise ValueError("{} is not a trajectory table".format(file_path))
+
+        (magic, version, num_distances, min_distance, distance_step, straight_dist_from_center, lateral_offset, top_dist, bottom_dist,
+         mid_yaw_const, center_pitch_const, gear_ratio_yaw, gear_ratio_pitch) = TABLE_FILE_HEADER.unpack_from(contents)
+
+        if magic != TABLE_FILE_MAGIC or version != TABLE_FILE_VERSION:
+            raise ValueError("{} is not a version {} trajectory table".format(
+                file_path, TABLE_FILE_VERSION))
+
+        table = np.frombuffer(contents, dtype="<f8", offset=TABLE_FILE_HEADER.size)
+        if table.size != num_distances*len(Target)*2:
+            raise ValueError("{} is truncated".format(file_path))
+
+        # Rebuild the algorithm constants that the table was made with
+        trajectory_alg = TrajectoryAlgorithm(min_distance, lateral_offset)
+        trajectory_alg.straight_dist_from_center = straight_dist_from_center
+        trajectory_alg.top_dist = top_dist
+        trajectory_alg.bottom_dist = bottom_dist
+        trajectory_alg.mid_yaw_const = mid_yaw_const
+        trajectory_alg.center_pitch_const = center_pitch_const
+        trajectory_alg.gear_ratio_yaw = gear_ratio_yaw
+        trajectory_alg.gear_ratio_pitch = gear_ratio_pitch
+
+        # Skip the precomputation in __init__ since the angles are already in the file
+        trajectory_table = cls.__new__(cls)
+        trajectory_table.trajectory_alg = trajectory_alg
+        trajectory_table.min_distance = min_distance
+        trajectory_table.distance_step = distance_step
+        trajectory_table.distances = min_distance + \
+            distance_step*np.arange(num_distances)
+        trajectory_table.max_distance = float(trajectory_table.distances[-1])
+        trajectory_table._set_table(
+            table.reshape(num_distances, len(Target), 2))
+
+        return trajectory_table
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    trajectory_table = TrajectoryTable(TrajectoryAlgorithm(15))
+    print("Interpolation error bound (yaw, pitch): {}".format(
+        trajectory_table.error_bound()))
+
+    trajectory_table.save("trajectory_table.bin")
+    trajectory_table = TrajectoryTable.load("trajectory_table.bin")
+
+    # Assume 15.1 ft. away
+    trajectory_alg = TrajectoryAlgorithm(15.1)
+    for shot_loc in ZONE_INDICES:
+        print("For {}:\nTable={}\nExact=({}, {})\n".format(shot_loc, trajectory_table.lookup(
+            15.1, shot_loc), trajectory_alg.calc_yaw(shot_loc), trajectory_alg.calc_pitch(shot_loc)))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()
@@ -0,0 +1,165 @@
+"""
+zone_grid.py
+---
+This file contains the ZoneGrid class, which splits the goal into any NxM grid of target zones using a homography so that the zones are perspective-correct in the image
+---
+
+Author: Andrei Biswas (@codeabiswas)
+Date: Oct 17, 2026
+Last Modified: Oct 17, 2026
+"""
+
+import cv2
+import numpy as np
+
+from trajectory_algorithm import TrajectoryAlgorithm
+
+
+class ZoneGrid:
+    """This class maps the face of the goal (a unit square) onto the four corners of the goal in the image.
+    Every vertex, cell polygon, and cell center of the grid is precomputed once, with NumPy, when the grid is made.
+
+    Cells are indexed by (row, column), where row 0 is the top of the goal and column 0 is the left of the goal.
+    """
+
+    def __init__(self, corners, rows=3, cols=3):
+        """Initializer for the zone grid
+
+        Args:
+            corners (list): Four (x,y) tuples in Top Left, Top Right, Bottom Right, Bottom Left order
+            rows (int, optional): Number of rows of zones. Defaults to 3.
+            cols (int, optional): Number of columns of zones. Defaults to 3.
+
+        Raises:
+            ValueError: If there are fewer than one row or column
+        """
+
+        if rows < 1 or cols < 1:
+            raise ValueError("The grid needs at least one row and one column")
+
+        self.rows = rows
+        self.cols = cols
+        self.corners = np.asarray(corners, dtype=np.float64).reshape(4, 2)
+
+        # Homography from the face of the goal (u to the right, v down, both from 0 to 1) to the image
+        unit_square = np.array(
+            [[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float32)
+        self.homography = cv2.getPerspectiveTransform(
+            unit_square, self.corners.astype(np.float32)).astype(np.float64)
+        self.inverse_homography = np.linalg.inv(self.homography)
+
+        # Vertices of the grid with shape (rows + 1, cols + 1, 2)
+        u, v = np.meshgrid(np.linspace(0, 1, cols + 1),
+                           np.linspace(0, 1, rows + 1))
+        self.vertices = self.to_image(np.stack((u, v), axis=-1))
+
+        # Polygons of the cells (Top Left, Top Right, Bottom Right, Bottom Left) with shape (rows, cols, 4, 2)
+        self.cell_polygons = np.stack((self.vertices[:-1, :-1], self.vertices[:-1, 1:],
+                                       self.vertices[1:, 1:], self.vertices[1:, :-1]), axis=2)
+
+        # Centers of the cells, mapped from the center of each cell on the face of the goal (not the average of its corners)
+        self.cell_uv_centers = np.stack(np.meshgrid((np.arange(cols) + 0.5)/cols,
+                                                    (np.arange(rows) + 0.5)/rows), axis=-1)
+        self.cell_centers = self.to_image(self.cell_uv_centers)
+
+    def to_image(self, uv_points):
+        """Maps points on the face of the goal to the image
+
+        Args:
+            uv_points (array_like): Points with shape (..., 2), where (0, 0) is the Top Left corner and (1, 1) is the Bottom Right corner
+
+        Returns:
+            numpy.ndarray: Points in the image (in pixels) with the same shape
+        """
+
+        uv_points = np.asarray(uv_points, dtype=np.float64)
+        homogeneous = uv_points @ self.homography[:, :2].T + \
+            self.homography[:, 2]
+
+        return homogeneous[..., :2]/homogeneous[..., 2:]
+
+    def to_goal(self, image_points):
+        """Maps points in the image to the face of the goal
+
+        Args:
+            image_points (array_like): Points (in pixels) with shape (..., 2)
+
+        Returns:
+            numpy.ndarray: Points on the face of the goal with the same shape
+        """
+
+        image_points = np.asarray(image_points, dtype=np.float64)
+        homogeneous = image_points @ self.inverse_homography[:, :2].T + \
+            self.inverse_homography[:, 2]
+
+        return homogeneous[..., :2]/homogeneous[..., 2:]
+
+    def cell_at(self, image_points):
+        """Finds which cell points in the image fall in
+
+        Args:
+            image_points (array_like): Points (in pixels) with shape (..., 2)
+
+        Returns:
+            tuple: Arrays of the rows and columns of the cells, which are -1 for points outside of the goal
+        """
+
+        uv_points = self.to_goal(image_points)
+        inside = np.all((uv_points >= 0) & (uv_points <= 1), axis=-1)
+
+        cell_rows = np.minimum((uv_points[..., 1]*self.rows).astype(int), self.rows - 1)
+        cell_cols = np.minimum((uv_points[..., 0]*self.cols).astype(int), self.cols - 1)
+
+        return np.where(inside, cell_rows, -1), np.where(inside, cell_cols, -1)
+
+    def grid_lines(self):
+        """Line segments of the grid inside of the goal's perimeter
+
+        Returns:
+            list: Pairs of (x,y) end points. Latitudes (from the top down) come first, then longitudes (from left to right).
+        """
+
+        def point(vertex):
+            return (float(vertex[0]), float(vertex[1]))
+
+        latitudes = [(point(self.vertices[row, 0]), point(self.vertices[row, -1]))
+                     for row in range(1, self.rows)]
+        longitudes = [(point(self.vertices[0, col]), point(self.vertices[-1, col]))
+                      for col in range(1, self.cols)]
+
+        return latitudes + longitudes
+
+    def calc_angles(self, trajectory_alg, distances):
+        """Calculates the yaw and pitch for the center of every cell
+
+        Args:
+            trajectory_alg (TrajectoryAlgorithm): Trajectory algorithm to calculate the angles with
+            distances (array_like): Distances of Ball-E from the Goal (in ft.)
+
+        Returns:
+            tuple: Arrays of yaw and pitch angles in degrees with shape (distances..., rows, cols)
+        """
+
+        distances = np.asarray(distances, dtype=float)[..., np.newaxis, np.newaxis]
+        cell_rows, cell_cols = np.indices((self.rows, self.cols))
+
+        return trajectory_alg.calc_grid_batch(distances, cell_rows, cell_cols, self.rows, self.cols)
+
+
+def main():
+    """Main prototype/testing area. Code prototyping and checking happens here."""
+
+    # A goal seen from slightly to the side
+    zone_grid = ZoneGrid([(300, 100), (620, 130), (610, 430), (310, 420)], rows=4, cols=5)
+
+    print("Cell centers:\n{}".format(np.round(zone_grid.cell_centers, 1)))
+    print("Cell of (450, 250): {}".format(zone_grid.cell_at((450, 250))))
+
+    # Assume 15 ft. away
+    yaw, pitch = zone_grid.calc_angles(TrajectoryAlgorithm(15), 15)
+    print("Yaw:\n{}\nPitch:\n{}".format(np.round(yaw, 2), np.round(pitch, 2)))
+
+
+if __name__ == "__main__":
+    # Run the main function
+    main()